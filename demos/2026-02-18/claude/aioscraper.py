@@ -0,0 +1,247 @@
+"""Asyncio scraping engine using the same `auth_config` dictionaries as `scraper`.
+
+Fetches run on one aiohttp session whose connector keeps a connection pool per
+host, so thousands of requests can be in flight at once. Parsing is CPU-bound
+and runs in a process pool behind a semaphore, so the event loop never blocks
+on it and at most `max_parses` documents are parsed at the same time.
+
+Errors are raised as the `requests` exceptions that `scraper` raises, so code
+handling `scrape_titles` failures works with both engines.
+"""
+
+import asyncio
+import os
+from collections.abc import AsyncIterator, Iterable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+import aiohttp
+import requests
+
+from scraper import ScrapeResult, _validate_url, extract_titles
+
+
+class AsyncScraper:
+    """Reusable async scraper; use as `async with AsyncScraper(...) as scraper`.
+
+    Entering the context opens the HTTP session (running a `session`-type
+    login once, whose cookies are then sent with every request) and the parse
+    pool; leaving it closes both.
+    """
+
+    def __init__(
+        self,
+        selector: str = "h2",
+        timeout: int = 10,
+        auth_config: dict | None = None,
+        parser: str = "html.parser",
+        max_connections: int = 1000,
+        per_host: int = 8,
+        max_parses: int | None = None,
+        executor: Executor | None = None,
+    ) -> None:
+        """
+        Args:
+            selector: CSS selector for title elements, as for `scrape_titles`.
+            timeout: Total timeout per request in seconds.
+            auth_config: Optional authentication, as for `scrape_titles`.
+            parser: Parser backend, as for `scrape_titles`.
+            max_connections: Open connections across all hosts.
+            per_host: Open connections per host.
+            max_parses: Documents parsed concurrently (default: CPU count).
+            executor: Executor to parse in; by default a process pool with
+                `max_parses` workers is created and shut down with the scraper.
+        """
+        self.selector = selector
+        self.timeout = timeout
+        self.auth_config = auth_config
+        self.parser = parser
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.max_parses = max_parses or os.cpu_count() or 1
+        self.executor = executor
+        self._owns_executor = executor is None
+        self._session: aiohttp.ClientSession | None = None
+        self._parse_slots: asyncio.Semaphore | None = None
+
+    async def __aenter__(self) -> "AsyncScraper":
+        auth = None
+        headers = {}
+        auth_type = (self.auth_config or {}).get("type")
+        if auth_type == "basic":
+            auth = aiohttp.BasicAuth(self.auth_config["username"], self.auth_config["password"])
+        elif auth_type == "bearer":
+            headers["Authorization"] = f"Bearer {self.auth_config['token']}"
+        elif auth_type == "header":
+            headers[self.auth_config["name"]] = self.auth_config["value"]
+
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.per_host),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            # Like requests, keep cookies set by hosts given as IP addresses.
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
+            auth=auth,
+            headers=headers,
+        )
+        self._parse_slots = asyncio.Semaphore(self.max_parses)
+        if self._owns_executor:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_parses)
+        try:
+            if auth_type == "session":
+                async with self._session.post(self.auth_config["login_url"], data=self.auth_config["credentials"]):
+                    pass
+        except BaseException:
+            await self.close()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._owns_executor and self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def fetch_titles(self, url: str) -> list[str]:
+        """Fetch one page and extract its titles.
+
+        Raises:
+            ValueError: If the URL is empty or invalid.
+            requests.ConnectionError: If the page cannot be reached.
+            requests.HTTPError: If the server returns an error status code.
+            requests.Timeout: If the request exceeds the timeout.
+        """
+        if self._session is None:
+            raise RuntimeError("AsyncScraper must be used as an async context manager")
+        _validate_url(url)
+        try:
+            async with self._session.get(url) as response:
+                if response.status >= 400:
+                    raise _http_error(response)
+                # Decoded with the declared charset, as `response.text` is in `scraper`.
+                html = await response.text(errors="replace")
+        except asyncio.TimeoutError as e:
+            raise requests.Timeout(f"Request to {url!r} timed out") from e
+        except aiohttp.ClientError as e:
+            raise requests.ConnectionError(str(e)) from e
+
+        async with self._parse_slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, extract_titles, html, self.selector, self.parser)
+
+    async def scrape_many(self, urls: Iterable[str], max_in_flight: int = 1000) -> AsyncIterator[ScrapeResult]:
+        """Scrape many URLs, yielding a `ScrapeResult` per URL as each finishes.
+
+        At most `max_in_flight` URLs are being fetched or parsed at once, and
+        `urls` is consumed lazily, so very long (or endless) inputs use
+        bounded memory. Failures are reported in `error`, as in
+        `scraper.scrape_many`.
+        """
+        results: asyncio.Queue[ScrapeResult | None] = asyncio.Queue()
+        url_iter = iter(urls)
+
+        async def worker() -> None:
+            try:
+                for url in url_iter:
+                    try:
+                        await results.put(ScrapeResult(url, await self.fetch_titles(url)))
+                    except Exception as e:
+                        # Any failure, including a parse error in the pool, is
+                        # reported for its URL rather than dropping it.
+                        await results.put(ScrapeResult(url, [], e))
+            finally:
+                await results.put(None)
+
+        workers = [asyncio.create_task(worker()) for _ in range(max_in_flight)]
+        try:
+            remaining = len(workers)
+            while remaining:
+                result = await results.get()
+                if result is None:
+                    remaining -= 1
+                else:
+                    yield result
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+
+def _http_error(response: aiohttp.ClientResponse) -> requests.HTTPError:
+    """Build the `requests.HTTPError` that `raise_for_status` would raise."""
+    shim = requests.Response()
+    shim.status_code = response.status
+    shim.reason = response.reason
+    shim.url = str(response.url)
+    shim.headers.update(response.headers)
+    kind = "Client" if response.status < 500 else "Server"
+    return requests.HTTPError(f"{response.status} {kind} Error: {response.reason} for url: {shim.url}", response=shim)
+
+
+async def scrape_titles_async(
+    url: str,
+    selector: str = "h2",
+    timeout: int = 10,
+    auth_config: dict | None = None,
+    parser: str = "html.parser",
+) -> list[str]:
+    """Async counterpart of `scraper.scrape_titles` (same arguments and errors).
+
+    A single page is parsed in a worker thread rather than a process pool,
+    which would cost more to start than the parse itself.
+    """
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        async with AsyncScraper(selector, timeout, auth_config, parser, max_parses=1, executor=pool) as scraper:
+            return await scraper.fetch_titles(url)
+
+
+async def scrape_many_async(
+    urls: Iterable[str],
+    selector: str = "h2",
+    timeout: int = 10,
+    auth_config: dict | None = None,
+    max_in_flight: int = 1000,
+    per_host: int = 8,
+    parser: str = "html.parser",
+    max_parses: int | None = None,
+) -> AsyncIterator[ScrapeResult]:
+    """Async counterpart of `scraper.scrape_many` for large batches.
+
+    Args:
+        urls: URLs to scrape.
+        selector: CSS selector for title elements.
+        timeout: Request timeout in seconds.
+        auth_config: Optional authentication, as for `scrape_titles`.
+        max_in_flight: URLs being fetched or parsed at once.
+        per_host: Open connections per host.
+        parser: Parser backend.
+        max_parses: Documents parsed concurrently in the process pool.
+
+    Yields:
+        A `ScrapeResult` per URL in completion order.
+    """
+    async with AsyncScraper(
+        selector, timeout, auth_config, parser, max_connections=max_in_flight, per_host=per_host, max_parses=max_parses
+    ) as scraper:
+        async for result in scraper.scrape_many(urls, max_in_flight):
+            yield result
+
+
+def scrape_titles(
+    url: str,
+    selector: str = "h2",
+    timeout: int = 10,
+    auth_config: dict | None = None,
+    parser: str = "html.parser",
+) -> list[str]:
+    """Blocking wrapper with the same errors as `scraper.scrape_titles`.
+
+    Takes the same arguments except `cache`: the async engine does not use
+    the HTTP cache. Must not be called from a running event loop; await
+    `scrape_titles_async` there instead.
+    """
+    return asyncio.run(scrape_titles_async(url, selector, timeout, auth_config, parser))
+
@@ -0,0 +1,300 @@
+"""On-disk HTTP response and title cache for the scraper sessions.
+
+`HTTPCache` stores GET responses in SQLite with zlib-compressed bodies, keyed
+by URL plus the identity the request was made with: an identity string set on
+the adapter (e.g. derived from the auth configuration), the `Authorization`
+header and any extra identity headers. Pages fetched with different
+credentials never share an entry. Cookies are not part of the key, since
+session cookies rotate between runs and would make every entry miss; callers
+whose pages depend on a login cookie pass an identity naming that login. `CachingAdapter` serves fresh
+entries (per `Cache-Control: max-age`) without touching the network and
+revalidates stale ones with `If-None-Match` / `If-Modified-Since`; a `304 Not
+Modified` answer is turned back into the cached `200` response.
+
+Parsed titles are cached too, keyed by a hash of the page body and the
+extractor settings, so a revalidated (or otherwise identical) page skips
+parsing entirely.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Request headers that identify who a response was fetched for.
+IDENTITY_HEADERS = ("Authorization",)
+
+# Headers describing the transfer rather than the (already decoded) body.
+_TRANSFER_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+# Headers a 304 response may update on the stored entry.
+_REVALIDATION_HEADERS = ("Cache-Control", "Date", "ETag", "Expires", "Last-Modified", "Vary")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    vary TEXT NOT NULL,
+    body BLOB NOT NULL,
+    stored_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS titles (
+    digest TEXT NOT NULL,
+    extractor TEXT NOT NULL,
+    titles TEXT NOT NULL,
+    PRIMARY KEY (digest, extractor)
+);
+"""
+
+
+def _cache_control(headers: CaseInsensitiveDict) -> dict[str, str | None]:
+    directives: dict[str, str | None] = {}
+    for part in headers.get("Cache-Control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+class HTTPCache:
+    """SQLite-backed store for GET responses and parsed titles.
+
+    The store is safe to share between the threads of one session.
+    `stats` counts `hit` (served without a request), `revalidated` (304),
+    `miss`, `title_hit` and `title_miss` events.
+    """
+
+    def __init__(self, path: str = "scraper-cache.sqlite3", compression_level: int = 6) -> None:
+        """Open (or create) the cache database at `path`; ":memory:" keeps it in RAM."""
+        self.path = path
+        self.compression_level = compression_level
+        self.stats: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self) -> "HTTPCache":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def clear(self) -> None:
+        """Delete every stored response and title list."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM responses")
+            self._db.execute("DELETE FROM titles")
+
+    def count(self, event: str) -> None:
+        """Add one to `stats[event]`."""
+        with self._lock:
+            self.stats[event] += 1
+
+    @staticmethod
+    def key(request: requests.PreparedRequest, identity_headers: Iterable[str] = (), identity: str = "") -> str:
+        """Cache key for a request: its URL plus a hash of `identity` and its identity headers."""
+        digest = hashlib.sha256(f"{identity}\n".encode())
+        for name in (*IDENTITY_HEADERS, *identity_headers):
+            digest.update(f"{name.lower()}:{request.headers.get(name, '')}\n".encode())
+        return f"{request.url} {digest.hexdigest()}"
+
+    def load(self, key: str) -> tuple[int, CaseInsensitiveDict, dict[str, str], bytes, float] | None:
+        """Return `(status, headers, vary, body, stored_at)` for a key, or `None`."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, headers, vary, body, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, headers, vary, body, stored_at = row
+        return status, CaseInsensitiveDict(json.loads(headers)), json.loads(vary), zlib.decompress(body), stored_at
+
+    def store(
+        self,
+        key: str,
+        url: str,
+        status: int,
+        headers: CaseInsensitiveDict,
+        vary: dict[str, str],
+        body: bytes,
+        stored_at: float | None = None,
+    ) -> None:
+        """Store (or replace) the response for a key."""
+        kept = {name: value for name, value in headers.items() if name.lower() not in _TRANSFER_HEADERS}
+        row = (
+            key,
+            url,
+            status,
+            json.dumps(kept),
+            json.dumps(vary),
+            zlib.compress(body, self.compression_level),
+            time.time() if stored_at is None else stored_at,
+        )
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+
+    def titles(self, content: bytes, extractor: str, extract: Callable[[], list[str]]) -> list[str]:
+        """Return cached titles for a page body, calling `extract` on a miss.
+
+        Args:
+            content: Raw page body; its SHA-256 is the cache key.
+            extractor: Identifies how titles are extracted (e.g. parser and
+                selector), so different extractions of one page do not collide.
+            extract: Computes the titles when they are not cached.
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT titles FROM titles WHERE digest = ? AND extractor = ?", (digest, extractor)
+            ).fetchone()
+        if row is not None:
+            self.count("title_hit")
+            return json.loads(row[0])
+        self.count("title_miss")
+        titles = extract()
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO titles VALUES (?, ?, ?)", (digest, extractor, json.dumps(titles)))
+        return titles
+
+
+class CachingAdapter(HTTPAdapter):
+    """Transport adapter that answers GET requests from an `HTTPCache`.
+
+    Accepts the usual `HTTPAdapter` arguments (pool sizes, `max_retries`).
+    Only `200` responses carrying a validator (`ETag`/`Last-Modified`) or a
+    `max-age` are stored, and never those marked `no-store` or `Vary: *`.
+    """
+
+    def __init__(self, cache: HTTPCache, identity_headers: Iterable[str] = (), identity: str = "", **kwargs) -> None:
+        """
+        Args:
+            cache: Store to read and write.
+            identity_headers: Extra request headers (e.g. an API key header)
+                that identify the caller and must be part of the cache key.
+            identity: Stable name of who requests are made for (e.g. a
+                login), part of the cache key; use it when pages depend on
+                a session cookie, which is not.
+        """
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.identity_headers = tuple(identity_headers)
+        self.identity = identity
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+
+        key = self.cache.key(request, self.identity_headers, self.identity)
+        entry = self.cache.load(key)
+        if entry is not None:
+            status, headers, vary, body, stored_at = entry
+            if any(request.headers.get(name) != value for name, value in vary.items()):
+                entry = None
+            elif self._fresh(headers, stored_at):
+                self.cache.count("hit")
+                return self._cached_response(request, status, headers, body)
+            else:
+                if "ETag" in headers:
+                    request.headers["If-None-Match"] = headers["ETag"]
+                if "Last-Modified" in headers:
+                    request.headers["If-Modified-Since"] = headers["Last-Modified"]
+
+        response = super().send(request, **kwargs)
+
+        if entry is not None and response.status_code == 304:
+            for name in _REVALIDATION_HEADERS:
+                if name in response.headers:
+                    headers[name] = response.headers[name]
+            # Reading the (empty) body hands the connection back to the pool;
+            # closing an unread response would drop it.
+            response.content
+            response.close()
+            self.cache.store(key, request.url, status, headers, vary, body)
+            self.cache.count("revalidated")
+            return self._cached_response(request, status, headers, body)
+
+        self.cache.count("miss")
+        if self._storable(response):
+            vary_names = [name.strip() for name in response.headers.get("Vary", "").split(",") if name.strip()]
+            vary = {name: request.headers.get(name) for name in vary_names}
+            status, headers = response.status_code, response.headers
+            # The body is stored as the caller reads it, so `stream=True`
+            # responses still stream; one closed early is not stored.
+            response.raw = _TeeStream(
+                response.raw, lambda body: self.cache.store(key, request.url, status, headers, vary, body)
+            )
+        return response
+
+    @staticmethod
+    def _fresh(headers: CaseInsensitiveDict, stored_at: float) -> bool:
+        directives = _cache_control(headers)
+        if "no-cache" in directives:
+            return False
+        try:
+            max_age = int(directives.get("max-age") or 0)
+        except ValueError:
+            return False
+        return time.time() - stored_at < max_age
+
+    @staticmethod
+    def _storable(response: requests.Response) -> bool:
+        if response.status_code != 200 or response.headers.get("Vary", "").strip() == "*":
+            return False
+        directives = _cache_control(response.headers)
+        if "no-store" in directives:
+            return False
+        return "ETag" in response.headers or "Last-Modified" in response.headers or "max-age" in directives
+
+    def _cached_response(
+        self, request: requests.PreparedRequest, status: int, headers: CaseInsensitiveDict, body: bytes
+    ) -> requests.Response:
+        response = requests.Response()
+        response.status_code = status
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response._content = body
+        response._content_consumed = True
+        response.from_cache = True
+        return response
+
+
+class _TeeStream:
+    """Wraps a urllib3 response, passing the body through to `on_complete` once read to the end.
+
+    `requests` reads bodies (`content` and `iter_content` alike) through
+    `stream`; everything else is delegated to the wrapped response.
+    """
+
+    def __init__(self, raw, on_complete: Callable[[bytes], None]) -> None:
+        self._raw = raw
+        self._on_complete = on_complete
+
+    def __getattr__(self, name: str):
+        return getattr(self._raw, name)
+
+    def stream(self, amt: int = 2**16, decode_content: bool | None = None) -> Iterator[bytes]:
+        chunks = []
+        for chunk in self._raw.stream(amt, decode_content=decode_content):
+            chunks.append(chunk)
+            yield chunk
+        if decode_content:
+            self._on_complete(b"".join(chunks))
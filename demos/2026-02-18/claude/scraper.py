@@ -1,13 +1,76 @@
 """Web scraper for extracting article titles from a given URL."""
 
+import json
+import re
+import sys
+from collections import Counter, deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
 import requests
-from bs4 import BeautifulSoup
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 from requests.exceptions import ConnectionError, HTTPError, Timeout
 
+from httpcache import CachingAdapter, HTTPCache
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+PARSERS = ("html.parser", "lxml", "selectolax")
+FALLBACK_SELECTOR = "span.titleline a"
+
+# A selector made only of tag/class/id compounds joined by descendant or child
+# combinators, e.g. "h2", "span.titleline a", "div#main > .post-title".
+_COMPOUND = re.compile(r"^(?P<tag>[A-Za-z][\w-]*|\*)?(?P<rest>(?:[.#][\w-]+)*)$")
+
+# Marks the end of a batch's input.
+_END = object()
+# URLs a batch reads ahead while their hosts are busy, looking for others.
+_MAX_HELD = 1000
 
-def _build_session(auth_config: dict | None) -> requests.Session:
+# (tag, classes, element_id); `None` or an empty set means "any".
+Compound = tuple[str | None, frozenset[str], str | None]
+
+
+class ScrapeResult(NamedTuple):
+    """Outcome of scraping one URL in a batch: its titles or the error raised."""
+
+    url: str
+    titles: list[str]
+    error: Exception | None = None
+
+
+def _build_session(
+    auth_config: dict | None, pool_size: int | None = None, cache: HTTPCache | None = None
+) -> requests.Session:
     session = requests.Session()
+    pool_kwargs = {"pool_connections": pool_size, "pool_maxsize": pool_size} if pool_size else {}
+    if cache is not None:
+        # The auth configuration names the login, including one carried by a
+        # session cookie, so entries are kept apart per login but survive
+        # cookie rotation.
+        identity = json.dumps(auth_config, sort_keys=True) if auth_config else ""
+        adapter = CachingAdapter(cache, identity=identity, **pool_kwargs)
+    elif pool_size:
+        adapter = HTTPAdapter(**pool_kwargs)
+    else:
+        adapter = None
+    if adapter is not None:
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
     if not auth_config:
         return session
     auth_type = auth_config.get("type")
@@ -22,7 +85,14 @@ def _build_session(auth_config: dict | None) -> requests.Session:
     return session
 
 
-def scrape_titles(url: str, selector: str = "h2", timeout: int = 10, auth_config: dict | None = None) -> list[str]:
+def scrape_titles(
+    url: str,
+    selector: str = "h2",
+    timeout: int = 10,
+    auth_config: dict | None = None,
+    parser: str = "html.parser",
+    cache: HTTPCache | None = None,
+) -> list[str]:
     """Fetch a webpage and extract text from elements matching a CSS selector.
 
     Args:
@@ -35,6 +105,12 @@ def scrape_titles(url: str, selector: str = "h2", timeout: int = 10, auth_config
                      {"type": "bearer", "token": "..."}
                      {"type": "header", "name": "X-API-Key", "value": "..."}
                      {"type": "session", "login_url": "...", "credentials": {...}}
+        parser: Parser backend: "html.parser" (default), "lxml" (BeautifulSoup
+                with the lxml tree builder) or "selectolax" (lexbor). The
+                faster backends need the corresponding package installed.
+        cache: Optional `HTTPCache`. Cached pages are revalidated with
+               ETag/Last-Modified instead of downloaded again, and titles of
+               unchanged pages are returned without parsing.
 
     Returns:
         A list of text content from all matched elements on the page.
@@ -45,40 +121,463 @@ def scrape_titles(url: str, selector: str = "h2", timeout: int = 10, auth_config
         HTTPError: If the server returns an error status code.
         Timeout: If the request exceeds the timeout duration.
     """
+    _validate_url(url)
+    return _fetch_titles(_build_session(auth_config, cache=cache), url, selector, timeout, parser, cache)
+
+
+def scrape_many(
+    urls: Iterable[str],
+    selector: str = "h2",
+    timeout: int = 10,
+    auth_config: dict | None = None,
+    max_workers: int = 16,
+    per_host: int = 4,
+    parser: str = "html.parser",
+    cache: HTTPCache | None = None,
+) -> Iterator[ScrapeResult]:
+    """Scrape many URLs concurrently, yielding results as each page finishes.
+
+    One session is built for the whole batch, so a `session`-type login runs
+    once and its cookies (and pooled connections) are reused for every page.
+    Pages are fetched from a thread pool, with at most `per_host` requests in
+    flight to any one host.
+
+    Args:
+        urls: URLs to scrape.
+        selector: CSS selector for title elements, as for `scrape_titles`.
+        timeout: Request timeout in seconds.
+        auth_config: Optional authentication, as for `scrape_titles`.
+        max_workers: Number of worker threads.
+        per_host: Maximum concurrent requests per host.
+        parser: Parser backend, as for `scrape_titles`.
+        cache: Optional `HTTPCache`, as for `scrape_titles`.
+
+    Yields:
+        A `ScrapeResult` per URL in completion order. Failures (invalid URL,
+        connection, HTTP or timeout errors) are reported in `error` instead of
+        being raised, so one bad page does not stop the batch.
+    """
+    session = _build_session(auth_config, pool_size=max(max_workers, per_host), cache=cache)
+    with session:
+        yield from _run_batch(
+            urls, lambda url: _fetch_titles(session, url, selector, timeout, parser, cache), max_workers, per_host
+        )
+
+
+def _run_batch(
+    urls: Iterable[str], fetch: Callable[[str], list[str]], max_workers: int, per_host: int
+) -> Iterator[ScrapeResult]:
+    """Call `fetch` for each URL from a thread pool, at most `per_host` at a time per host.
+
+    A URL is submitted only when a worker is free and its host has a free
+    slot; URLs for a busy host wait here, not in a worker. `urls` is read
+    only as workers free up, with at most `_MAX_HELD` URLs held back, so
+    long inputs use bounded memory. Closing the iterator cancels the URLs
+    not yet started.
+    """
+    url_iter = iter(urls)
+    waiting: dict[str, deque[str]] = {}
+    held = 0
+    active: Counter[str] = Counter()
+    futures: dict[Future[list[str]], tuple[str, str]] = {}
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit(url: str, host: str) -> None:
+        active[host] += 1
+        futures[pool.submit(fetch, url)] = (url, host)
+
+    try:
+        while True:
+            while len(futures) < max_workers and held < _MAX_HELD:
+                url = next(url_iter, _END)
+                if url is _END:
+                    break
+                try:
+                    _validate_url(url)
+                except ValueError as e:
+                    yield ScrapeResult(url, [], e)
+                    continue
+                host = urlsplit(url).netloc
+                if active[host] < per_host:
+                    submit(url, host)
+                else:
+                    waiting.setdefault(host, deque()).append(url)
+                    held += 1
+            if not futures:
+                # Every held URL's host has a request in flight, so this
+                # means the input is exhausted.
+                return
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                url, host = futures.pop(future)
+                active[host] -= 1
+                queue = waiting.get(host)
+                if queue:
+                    submit(queue.popleft(), host)
+                    held -= 1
+                    if not queue:
+                        del waiting[host]
+                try:
+                    yield ScrapeResult(url, future.result())
+                except (ValueError, requests.RequestException) as e:
+                    yield ScrapeResult(url, [], e)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def stream_titles(
+    url: str,
+    selector: str = "h2",
+    timeout: int = 10,
+    auth_config: dict | None = None,
+    max_titles: int | None = None,
+    chunk_size: int = 16 * 1024,
+    cache: HTTPCache | None = None,
+) -> Iterator[str]:
+    """Fetch a webpage in chunks and yield titles as soon as they are parsed.
+
+    The body is fed to an incremental lxml parser while it downloads, finished
+    elements are discarded as parsing goes, and the download stops once
+    `max_titles` titles have been yielded. Memory stays bounded by the chunk
+    size and the largest matched element rather than the page size.
+
+    Args:
+        url: The URL of the page to scrape.
+        selector: CSS selector for title elements, made only of tag, class
+                  and id compounds joined by descendant or child combinators.
+        timeout: Request timeout in seconds.
+        auth_config: Optional authentication, as for `scrape_titles`.
+        max_titles: Stop after this many titles (default: no limit).
+        chunk_size: Bytes read from the network per parser feed.
+        cache: Optional `HTTPCache`, as for `scrape_titles`; a cached page is
+               replayed from memory.
+
+    Yields:
+        The stripped text of each matched element, as for `extract_titles`.
+
+    Raises:
+        ValueError: If the URL is invalid or the selector is not supported.
+        ConnectionError, HTTPError, Timeout: As for `scrape_titles`.
+    """
+    _validate_url(url)
+    with _build_session(auth_config, cache=cache) as session, session.get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        declared = "charset=" in response.headers.get("Content-Type", "").lower()
+        yield from iter_titles(
+            response.iter_content(chunk_size), selector, max_titles, response.encoding if declared else None
+        )
+
+
+def iter_titles(
+    chunks: Iterable[bytes],
+    selector: str = "h2",
+    max_titles: int | None = None,
+    encoding: str | None = None,
+) -> Iterator[str]:
+    """Incrementally parse an HTML byte stream and yield matching titles.
+
+    Follows `extract_titles`, including the "span.titleline a" fallback for the
+    default "h2" selector. Fallback matches can only be yielded once the whole
+    page is known to have no <h2>, so they arrive at the end of the stream.
+    Nested matches are yielded when they close, innermost first.
+
+    Without lxml, `chunks` is read to the end and parsed with html.parser,
+    so titles arrive together and `max_titles` only truncates them.
+
+    Args:
+        chunks: Page body, in pieces of any size.
+        selector: CSS selector, restricted as for `stream_titles`.
+        max_titles: Stop reading `chunks` after this many titles.
+        encoding: Character encoding of the body; detected from the page
+                  when `None`.
+
+    Raises:
+        ValueError: If the selector is not supported.
+    """
+    groups = _simple_selector(selector)
+    if groups is None:
+        raise ValueError(f"Streaming supports only tag/class/id selectors with ' ' or '>' combinators, got {selector!r}")
+    fallback = _simple_selector(FALLBACK_SELECTOR) if selector == "h2" else ()
+    if max_titles is not None and max_titles <= 0:
+        return
+    if etree is None:
+        # Without lxml, the page is parsed in one go once it has all arrived.
+        body = b"".join(chunks)
+        yield from extract_titles(body.decode(encoding, errors="replace") if encoding else body, selector)[:max_titles]
+        return
+
+    parser = etree.HTMLPullParser(events=("start", "end"), encoding=encoding)
+    # Matched elements that are still open, each with whether it is a fallback match.
+    pending: list[tuple[object, bool]] = []
+    fallback_titles: list[str] = []
+    found = 0
+
+    def handle_events() -> Iterator[str]:
+        nonlocal found
+        for event, element in parser.read_events():
+            if event == "start":
+                if any(_matches(element, steps) for steps in groups):
+                    pending.append((element, False))
+                elif not found and any(_matches(element, steps) for steps in fallback):
+                    pending.append((element, True))
+                continue
+            if pending and pending[-1][0] is element:
+                _, is_fallback = pending.pop()
+                text = "".join(piece.strip() for piece in element.itertext())
+                if not is_fallback:
+                    found += 1
+                    fallback_titles.clear()
+                    yield text
+                elif not found:
+                    fallback_titles.append(text)
+            if not pending:
+                # Nothing still open needs this subtree: drop it and its earlier siblings.
+                element.clear(keep_tail=True)
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        for title in handle_events():
+            yield title
+            if found == max_titles:
+                return
+    try:
+        parser.close()
+    except etree.XMLSyntaxError:
+        pass  # e.g. an empty body
+    for title in handle_events():
+        yield title
+        if found == max_titles:
+            return
+    yield from fallback_titles[:max_titles]
+
+
+def _matches(element, steps: tuple[tuple[str, Compound], ...]) -> bool:
+    """Match an lxml element against one selector group, right to left."""
+    combinator, (tag, classes, element_id) = steps[-1]
+    if not isinstance(element.tag, str) or (tag is not None and element.tag.lower() != tag):
+        return False
+    if classes and not classes <= set((element.get("class") or "").split()):
+        return False
+    if element_id is not None and element.get("id") != element_id:
+        return False
+    if len(steps) == 1:
+        return True
+    ancestor = element.getparent()
+    if combinator == ">":
+        return ancestor is not None and _matches(ancestor, steps[:-1])
+    while ancestor is not None:
+        if _matches(ancestor, steps[:-1]):
+            return True
+        ancestor = ancestor.getparent()
+    return False
+
+
+def _validate_url(url: str) -> None:
     if not url or not url.startswith(("http://", "https://")):
         raise ValueError(f"Invalid URL: {url!r}")
 
-    session = _build_session(auth_config)
+
+def _fetch_titles(
+    session: requests.Session,
+    url: str,
+    selector: str,
+    timeout: int,
+    parser: str = "html.parser",
+    cache: HTTPCache | None = None,
+) -> list[str]:
     response = session.get(url, timeout=timeout)
     response.raise_for_status()
+    if cache is None:
+        return extract_titles(response.text, selector, parser)
+    return cache.titles(response.content, f"{parser} {selector}", lambda: extract_titles(response.text, selector, parser))
+
 
-    soup = BeautifulSoup(response.text, "html.parser")
-    selectors = [selector, "span.titleline a"] if selector == "h2" else [selector]
+def extract_titles(html: str | bytes, selector: str = "h2", parser: str = "html.parser") -> list[str]:
+    """Extract the text of elements matching `selector` from an HTML document.
+
+    With the default "h2" selector, "span.titleline a" is used as a fallback
+    when the page has no <h2> elements. The document is parsed once; for
+    simple selectors only the subtrees that can contain matches are built.
+
+    Args:
+        html: Page markup.
+        selector: CSS selector for title elements.
+        parser: Parser backend, see `scrape_titles`.
+
+    Returns:
+        The stripped text of every matched element, in document order.
+
+    Raises:
+        ValueError: If `parser` is not a known backend.
+        ImportError: If the selected backend is not installed.
+    """
+    if parser not in PARSERS:
+        raise ValueError(f"Unknown parser {parser!r}; expected one of {', '.join(PARSERS)}")
+    selectors = [selector, FALLBACK_SELECTOR] if selector == "h2" else [selector]
+
+    if parser == "selectolax":
+        if LexborHTMLParser is None:
+            raise ImportError("The 'selectolax' parser requires the selectolax package")
+        tree = LexborHTMLParser(html)
+        for sel in selectors:
+            # Lexbor returns a node once per group of a selector list it
+            # matches; keep the first, which leaves them in document order.
+            nodes = {node.mem_id: node for node in tree.css(sel)}
+            titles = [node.text(deep=True, separator="", strip=True) for node in nodes.values()]
+            if titles:
+                return titles
+        return []
+
+    query = ", ".join(selectors)
+    soup = BeautifulSoup(html, parser, parse_only=_strainer(query))
+    matches = _compile(query).select(soup)
+    if len(selectors) == 1:
+        return [tag.get_text(strip=True) for tag in matches]
     for sel in selectors:
-        titles = [tag.get_text(strip=True) for tag in soup.select(sel)]
+        pattern = _compile(sel)
+        titles = [tag.get_text(strip=True) for tag in matches if pattern.match(tag)]
         if titles:
             return titles
     return []
 
 
+@lru_cache(maxsize=128)
+def _compile(selector: str) -> soupsieve.SoupSieve:
+    return soupsieve.compile(selector)
+
+
+class _CompoundStrainer(SoupStrainer):
+    """Keep top-level elements matching any of a set of simple compounds.
+
+    Each compound is a `(tag, classes, element_id)` triple where `None` or an
+    empty set means "any".
+    """
+
+    def __init__(self, compounds: list[Compound]) -> None:
+        names = {tag for tag, _, _ in compounds}
+        super().__init__(name=None if None in names else sorted(names))
+        self.compounds = compounds
+
+    def allow_tag_creation(self, nsprefix: str | None, name: str, attrs: dict | None) -> bool:
+        attrs = attrs or {}
+        value = attrs.get("class") or ""
+        classes = set(value if isinstance(value, list) else value.split())
+        element_id = attrs.get("id")
+        return any(
+            (tag is None or tag == name) and required <= classes and (wanted_id is None or wanted_id == element_id)
+            for tag, required, wanted_id in self.compounds
+        )
+
+
+@lru_cache(maxsize=128)
+def _simple_selector(selector: str) -> tuple[tuple[tuple[str, Compound], ...], ...] | None:
+    """Parse a selector list made only of tag/class/id compounds.
+
+    Returns one tuple per selector group of `(combinator, compound)` steps,
+    where the combinator (" " or ">") joins a compound to the previous one
+    and is "" for the first, or `None` if the selector uses attributes,
+    pseudo-classes or sibling combinators.
+    """
+    groups = []
+    for group in selector.split(","):
+        tokens = group.replace(">", " > ").split()
+        if not tokens or tokens[0] == ">" or tokens[-1] == ">":
+            return None
+        steps = []
+        combinator = ""
+        for token in tokens:
+            if token == ">":
+                if combinator == ">":
+                    return None
+                combinator = ">"
+                continue
+            match = _COMPOUND.match(token)
+            if not match:
+                return None
+            ids = re.findall(r"#([\w-]+)", match["rest"])
+            if len(set(ids)) > 1:
+                return None
+            tag = match["tag"].lower() if match["tag"] and match["tag"] != "*" else None
+            classes = frozenset(re.findall(r"\.([\w-]+)", match["rest"]))
+            steps.append((combinator, (tag, classes, ids[0] if ids else None)))
+            combinator = " "
+        groups.append(tuple(steps))
+    return tuple(groups)
+
+
+@lru_cache(maxsize=128)
+def _strainer(selector: str) -> SoupStrainer | None:
+    """Build a strainer that keeps only subtrees able to contain matches.
+
+    The strainer keeps elements matching the first compound of each selector
+    group (everything a match can be nested in). Selectors using attributes,
+    pseudo-classes or sibling combinators get no strainer and are parsed fully.
+    """
+    groups = _simple_selector(selector)
+    if groups is None:
+        return None
+    compounds = [steps[0][1] for steps in groups]
+    if any(compound == (None, frozenset(), None) for compound in compounds):
+        return None
+    return _CompoundStrainer(compounds)
+
+
+def _read_urls(path: str) -> list[str]:
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.startswith("#")]
+
+
+def _print_batch(urls: list[str], selector: str, auth_config: dict | None, parser: str, cache: HTTPCache | None) -> bool:
+    ok = True
+    for result in scrape_many(urls, selector=selector, auth_config=auth_config, parser=parser, cache=cache):
+        if result.error is not None:
+            ok = False
+            print(f"{result.url}: error: {result.error}")
+            continue
+        print(f"{result.url}: {len(result.titles)} title(s)")
+        for title in result.titles:
+            print(f"  - {title}")
+    return ok
+
+
 if __name__ == "__main__":
     import os
-    import sys
 
-    if len(sys.argv) < 2:
+    if len(sys.argv) < 2 or (sys.argv[1] == "--file" and len(sys.argv) < 3):
         print("Usage: python scraper.py <url> [css-selector]")
+        print("       python scraper.py --file <urls.txt|-> [css-selector]")
         print("  css-selector defaults to 'h2'")
         print("  Example: python scraper.py https://news.ycombinator.com/ 'span.titleline a'")
+        print("  --file reads one URL per line (use '-' for stdin) and scrapes them concurrently")
         print("  Auth env vars: SCRAPER_USERNAME/SCRAPER_PASSWORD, SCRAPER_TOKEN, SCRAPER_LOGIN_URL")
+        print(f"  Parser env var: SCRAPER_PARSER ({', '.join(PARSERS)}; default html.parser)")
+        print("  Cache env var: SCRAPER_CACHE (path of an on-disk HTTP cache; default: no cache)")
+        print("  Streaming env vars: SCRAPER_STREAM=1 prints titles as they are parsed (with lxml),")
+        print("                      SCRAPER_MAX_TITLES=<n> stops after n titles (implies streaming)")
+        print("  Watch env vars: SCRAPER_WATCH=<seconds> re-checks the page(s) forever, printing only new titles;")
+        print("                  SCRAPER_WATCH_STORE=<path> keeps the fingerprints (default watch.sqlite3)")
         sys.exit(1)
 
-    target_url = sys.argv[1]
-    target_selector = sys.argv[2] if len(sys.argv) > 2 else "h2"
+    batch_file = sys.argv[2] if sys.argv[1] == "--file" else None
+    target_url = None if batch_file else sys.argv[1]
+    selector_index = 3 if batch_file else 2
+    target_selector = sys.argv[selector_index] if len(sys.argv) > selector_index else "h2"
 
     username = os.environ.get("SCRAPER_USERNAME")
     password = os.environ.get("SCRAPER_PASSWORD")
     token = os.environ.get("SCRAPER_TOKEN")
     login_url = os.environ.get("SCRAPER_LOGIN_URL")
+    target_parser = os.environ.get("SCRAPER_PARSER", "html.parser")
+    cache_path = os.environ.get("SCRAPER_CACHE")
+    max_titles = int(os.environ["SCRAPER_MAX_TITLES"]) if os.environ.get("SCRAPER_MAX_TITLES") else None
+    stream = bool(os.environ.get("SCRAPER_STREAM")) or max_titles is not None
+    target_cache = HTTPCache(cache_path) if cache_path else None
 
     target_auth = None
     if login_url and username and password:
@@ -88,8 +587,42 @@ if __name__ == "__main__":
     elif username and password:
         target_auth = {"type": "basic", "username": username, "password": password}
 
+    if os.environ.get("SCRAPER_WATCH"):
+        from watch import TitleWatcher
+
+        store_path = os.environ.get("SCRAPER_WATCH_STORE", "watch.sqlite3")
+        with TitleWatcher(
+            store_path, target_selector, auth_config=target_auth, parser=target_parser, cache=target_cache
+        ) as watcher:
+            try:
+                for result in watcher.watch(
+                    _read_urls(batch_file) if batch_file else [target_url], interval=float(os.environ["SCRAPER_WATCH"])
+                ):
+                    if result.error is not None:
+                        print(f"{result.url}: error: {result.error}", flush=True)
+                    for title in result.titles:
+                        print(f"{result.url}: {title}", flush=True)
+            except KeyboardInterrupt:
+                pass
+        sys.exit(0)
+
+    if batch_file:
+        sys.exit(0 if _print_batch(_read_urls(batch_file), target_selector, target_auth, target_parser, target_cache) else 1)
+
     try:
-        titles = scrape_titles(target_url, selector=target_selector, auth_config=target_auth)
+        if stream:
+            count = 0
+            for count, title in enumerate(
+                stream_titles(target_url, target_selector, auth_config=target_auth, max_titles=max_titles, cache=target_cache),
+                start=1,
+            ):
+                print(f"  - {title}", flush=True)
+            if not count:
+                print(f"No elements matching {target_selector!r} found on the page.")
+            sys.exit(0)
+        titles = scrape_titles(
+            target_url, selector=target_selector, auth_config=target_auth, parser=target_parser, cache=target_cache
+        )
         if titles:
             print(f"Found {len(titles)} title(s):")
             for title in titles:
@@ -0,0 +1,73 @@
+"""Tests for `aioscraper` against a local server."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+import aioscraper
+from aioscraper import AsyncScraper
+
+
+async def collect(urls, **kwargs):
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        async with AsyncScraper(executor=pool, **kwargs) as scraper:
+            return [result async for result in scraper.scrape_many(urls, max_in_flight=4)]
+
+
+def test_scrape_many_reports_every_url(server):
+    """Successes, HTTP errors and invalid URLs should each yield one result."""
+    server.pages["/ok"] = (200, {"Content-Type": "text/html"}, b"<h2>One</h2><h2>Two</h2>")
+    urls = [f"{server.url}/ok", f"{server.url}/missing", "not-a-url"]
+
+    results = {result.url: result for result in asyncio.run(collect(urls))}
+
+    assert results[urls[0]].titles == ["One", "Two"]
+    assert results[urls[0]].error is None
+    assert isinstance(results[urls[1]].error, requests.HTTPError)
+    assert isinstance(results[urls[2]].error, ValueError)
+
+
+def test_scrape_many_reports_unexpected_errors(server, monkeypatch):
+    """An exception outside the `requests` family should be reported for its URL, not drop it."""
+    server.pages["/ok"] = (200, {"Content-Type": "text/html"}, b"<h2>Fine</h2>")
+    server.pages["/bad"] = (200, {"Content-Type": "text/html"}, b"<h2>Broken</h2>")
+
+    def extract(html, selector, parser):
+        if "Broken" in html:
+            raise RuntimeError("parser crashed")
+        return ["Fine"]
+
+    monkeypatch.setattr(aioscraper, "extract_titles", extract)
+    urls = [f"{server.url}/bad", f"{server.url}/ok"] * 3
+
+    results = asyncio.run(collect(urls))
+
+    assert len(results) == len(urls)
+    errors = [result.error for result in results if result.url.endswith("/bad")]
+    assert len(errors) == 3
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert all(result.titles == ["Fine"] for result in results if result.url.endswith("/ok"))
+
+
+def test_body_is_decoded_with_declared_charset(server):
+    """A page without a <meta> charset should be decoded with the Content-Type charset."""
+    server.pages["/cyrillic"] = (
+        200,
+        {"Content-Type": "text/html; charset=windows-1251"},
+        "<h2>Привет, мир</h2>".encode("windows-1251"),
+    )
+
+    results = asyncio.run(collect([f"{server.url}/cyrillic"]))
+
+    assert results[0].titles == ["Привет, мир"]
+
+
+def test_blocking_scrape_titles(server):
+    """The blocking wrapper should return titles and raise `requests` errors."""
+    server.pages["/ok"] = (200, {"Content-Type": "text/html; charset=utf-8"}, "<h2>Café</h2>".encode())
+
+    assert aioscraper.scrape_titles(f"{server.url}/ok") == ["Café"]
+    with pytest.raises(requests.HTTPError):
+        aioscraper.scrape_titles(f"{server.url}/missing")
@@ -0,0 +1,156 @@
+"""Tests for `httpcache` against a local server."""
+
+import threading
+
+import pytest
+import requests
+
+from httpcache import CachingAdapter, HTTPCache
+from scraper import _build_session
+
+
+@pytest.fixture
+def cache():
+    with HTTPCache(":memory:") as c:
+        yield c
+
+
+@pytest.fixture
+def session(cache):
+    s = requests.Session()
+    adapter = CachingAdapter(cache)
+    s.mount("http://", adapter)
+    yield s
+    s.close()
+
+
+def paths(server):
+    return [path for path, _ in server.requests]
+
+
+def test_fresh_entry_is_served_without_a_request(server, session, cache):
+    server.pages["/page"] = (200, {"Cache-Control": "max-age=60"}, b"<h2>Cached</h2>")
+
+    first = session.get(f"{server.url}/page")
+    second = session.get(f"{server.url}/page")
+
+    assert first.content == second.content == b"<h2>Cached</h2>"
+    assert second.from_cache
+    assert paths(server) == ["/page"]
+    assert cache.stats == {"miss": 1, "hit": 1}
+
+
+def test_stale_entry_is_revalidated_with_etag(server, session, cache):
+    """A 304 answer should be turned back into the cached 200."""
+
+    def page(handler):
+        if handler.headers.get("If-None-Match") == '"v1"':
+            return 304, {"ETag": '"v1"'}, b""
+        return 200, {"ETag": '"v1"', "Content-Type": "text/html"}, b"<h2>Body</h2>"
+
+    server.pages["/page"] = page
+
+    session.get(f"{server.url}/page")
+    revalidated = session.get(f"{server.url}/page")
+
+    assert revalidated.status_code == 200
+    assert revalidated.content == b"<h2>Body</h2>"
+    assert server.requests[1][1]["If-None-Match"] == '"v1"'
+    assert cache.stats == {"miss": 1, "revalidated": 1}
+
+
+def test_no_store_and_vary_star_are_not_stored(server, session, cache):
+    server.pages["/private"] = (200, {"ETag": '"a"', "Cache-Control": "no-store"}, b"private")
+    server.pages["/vary"] = (200, {"ETag": '"b"', "Vary": "*"}, b"varies")
+
+    for _ in range(2):
+        session.get(f"{server.url}/private")
+        session.get(f"{server.url}/vary")
+
+    assert len(server.requests) == 4
+    assert "If-None-Match" not in server.requests[2][1]
+    assert cache.stats == {"miss": 4}
+
+
+def test_vary_header_mismatch_is_a_miss(server, session):
+    server.pages["/lang"] = (200, {"Cache-Control": "max-age=60", "Vary": "Accept-Language"}, b"hello")
+
+    session.get(f"{server.url}/lang", headers={"Accept-Language": "en"})
+    session.get(f"{server.url}/lang", headers={"Accept-Language": "en"})
+    session.get(f"{server.url}/lang", headers={"Accept-Language": "fr"})
+
+    assert len(server.requests) == 2
+
+
+def test_streamed_response_is_stored_once_fully_read(server, session):
+    body = b"<h2>x</h2>" * 10000
+    server.pages["/big"] = (200, {"Cache-Control": "max-age=60"}, body)
+
+    with session.get(f"{server.url}/big", stream=True) as response:
+        assert not response._content_consumed
+        assert b"".join(response.iter_content(4096)) == body
+
+    cached = session.get(f"{server.url}/big")
+    assert cached.from_cache
+    assert cached.content == body
+
+
+def test_streamed_response_closed_early_is_not_stored(server, session):
+    body = b"<h2>x</h2>" * 10000
+    server.pages["/big"] = (200, {"Cache-Control": "max-age=60"}, body)
+
+    with session.get(f"{server.url}/big", stream=True) as response:
+        next(response.iter_content(4096))
+
+    assert not getattr(session.get(f"{server.url}/big"), "from_cache", False)
+    assert len(server.requests) == 2
+
+
+def test_rotating_cookies_still_hit(server, session, cache):
+    server.pages["/page"] = (200, {"Cache-Control": "max-age=60"}, b"<h2>Cached</h2>")
+
+    session.get(f"{server.url}/page", cookies={"sid": "first"})
+    second = session.get(f"{server.url}/page", cookies={"sid": "second"})
+
+    assert second.from_cache
+    assert paths(server) == ["/page"]
+
+
+def test_entries_are_kept_apart_per_identity(server, cache):
+    server.pages["/page"] = (200, {"Cache-Control": "max-age=60"}, b"<h2>Mine</h2>")
+    login = {"type": "session", "login_url": f"{server.url}/login", "credentials": {"user": "a"}}
+
+    def fetch(auth_config):
+        with _build_session(auth_config, cache=cache) as session:
+            return getattr(session.get(f"{server.url}/page"), "from_cache", False)
+
+    assert not fetch(login)
+    assert fetch(login)  # a new session for the same login
+    assert not fetch({**login, "credentials": {"user": "b"}})
+    assert not fetch(None)
+    assert not fetch({"type": "bearer", "token": "t"})
+    assert paths(server).count("/page") == 4
+
+
+def test_stats_are_counted_under_the_lock(cache):
+    threads = [threading.Thread(target=lambda: [cache.count("hit") for _ in range(10000)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.stats["hit"] == 80000
+
+
+def test_titles_are_cached_by_body(cache):
+    calls = []
+
+    def extract():
+        calls.append(1)
+        return ["A"]
+
+    assert cache.titles(b"<h2>A</h2>", "html.parser h2", extract) == ["A"]
+    assert cache.titles(b"<h2>A</h2>", "html.parser h2", extract) == ["A"]
+    assert cache.titles(b"<h2>A</h2>", "lxml h2", extract) == ["A"]
+    assert len(calls) == 2
+    assert cache.stats == {"title_miss": 2, "title_hit": 1}
@@ -0,0 +1,79 @@
+"""Differential tests: every parser backend agrees with a plain BeautifulSoup parse."""
+
+import pytest
+from bs4 import BeautifulSoup
+
+from scraper import PARSERS, _compile, _strainer, extract_titles
+
+PAGE = """
+<html><body>
+  <h2 class="title x" id="top">  Top
+     story  </h2>
+  <div class="post">
+    <h2 class="title">Nested <b>bold</b> <i>and</i> more</h2>
+    <div class="post inner"><span class="titleline"><a href="/1">  Link one </a></span></div>
+  </div>
+  <span class="titleline"><a href="/2">Link two</a><a href="/3">Link three</a></span>
+  <p class="x">Para</p>
+</body></html>
+"""
+
+SELECTORS = [
+    "h2",
+    "h2.title",
+    "#top",
+    "h2, .x",                # the first <h2> matches both groups
+    ".title, h2, #top",      # ...and all three
+    "div.post",              # nested matches
+    "div.post > h2",
+    "div .titleline > a",
+    "span.titleline a, p",
+    "a[href='/2']",          # not a simple selector: no strainer
+]
+
+
+def baseline(html, selector):
+    soup = BeautifulSoup(html, "html.parser")
+    return [tag.get_text(strip=True) for tag in soup.select(selector)]
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+@pytest.mark.parametrize("selector", SELECTORS)
+def test_backends_match_the_baseline(parser, selector):
+    if parser != "html.parser":
+        pytest.importorskip(parser)
+
+    assert extract_titles(PAGE, selector, parser) == baseline(PAGE, selector)
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_h2_falls_back_to_titleline_links(parser):
+    if parser != "html.parser":
+        pytest.importorskip(parser)
+    page = '<span class="titleline"><a>One</a></span><span class="titleline"><a>Two</a></span>'
+
+    assert extract_titles(page, "h2", parser) == ["One", "Two"]
+    assert extract_titles(PAGE, "h2", parser) == baseline(PAGE, "h2")
+
+
+def test_strainer_only_for_simple_selectors():
+    assert _strainer("div.post > h2, #top") is not None
+    assert _strainer("a[href='/2']") is None
+    assert _strainer("h2 ~ p") is None
+    assert _strainer("* > a") is None  # a universal first compound keeps everything
+
+
+def test_strainer_keeps_only_subtrees_that_can_match():
+    soup = BeautifulSoup(PAGE, "html.parser", parse_only=_strainer("div.post > h2, #top"))
+
+    assert [tag.name for tag in soup.find_all(recursive=False)] == ["h2", "div"]
+    assert soup.find("p") is None
+
+
+def test_compiled_selectors_are_cached():
+    assert _compile("h2, .x") is _compile("h2, .x")
+
+
+def test_unknown_parser_is_rejected():
+    with pytest.raises(ValueError):
+        extract_titles(PAGE, "h2", "html5lib")
@@ -0,0 +1,80 @@
+"""Tests for `scraper`'s batch scraping."""
+
+import threading
+import time
+from collections import Counter
+
+import requests
+
+from scraper import _run_batch, scrape_many
+
+
+class Recorder:
+    """A `fetch` function that records how many calls per host run at once."""
+
+    def __init__(self, seconds=0.02):
+        self.seconds = seconds
+        self.lock = threading.Lock()
+        self.running = Counter()
+        self.peak = Counter()
+        self.calls = []
+
+    def __call__(self, url):
+        host = url.split("/")[2]
+        with self.lock:
+            self.calls.append(url)
+            self.running[host] += 1
+            self.peak[host] = max(self.peak[host], self.running[host])
+        time.sleep(self.seconds)
+        with self.lock:
+            self.running[host] -= 1
+        return [url]
+
+
+def test_per_host_limit_does_not_block_other_hosts():
+    """A flood of URLs for one host should not keep another host's URL waiting behind it."""
+    fetch = Recorder()
+    urls = [f"http://busy/{i}" for i in range(20)] + ["http://quiet/"]
+
+    results = [result.url for result in _run_batch(urls, fetch, max_workers=4, per_host=2)]
+
+    assert sorted(results) == sorted(urls)
+    assert fetch.peak["busy"] == 2
+    assert results.index("http://quiet/") < 4
+
+
+def test_input_is_read_lazily():
+    consumed = []
+
+    def urls():
+        for i in range(1000):
+            consumed.append(i)
+            yield f"http://host{i % 10}/{i}"
+
+    batch = _run_batch(urls(), Recorder(0), max_workers=4, per_host=1)
+    next(batch)
+
+    assert len(consumed) <= 8 + 1
+    batch.close()
+
+
+def test_closing_the_iterator_cancels_pending_urls():
+    fetch = Recorder(0.05)
+    urls = [f"http://host{i}/" for i in range(100)]
+
+    batch = _run_batch(urls, fetch, max_workers=2, per_host=1)
+    next(batch)
+    batch.close()
+
+    assert len(fetch.calls) <= 4
+
+
+def test_invalid_urls_and_errors_are_reported(server):
+    server.pages["/ok"] = (200, {"Content-Type": "text/html"}, b"<h2>Title</h2>")
+    urls = [f"{server.url}/ok", f"{server.url}/missing", "ftp://example.com/"]
+
+    results = {result.url: result for result in scrape_many(urls, max_workers=2, per_host=1)}
+
+    assert results[urls[0]].titles == ["Title"]
+    assert isinstance(results[urls[1]].error, requests.HTTPError)
+    assert isinstance(results[urls[2]].error, ValueError)
@@ -0,0 +1,82 @@
+"""Tests for incremental title parsing: `iter_titles` and `stream_titles`."""
+
+import pytest
+
+import scraper
+from scraper import extract_titles, iter_titles, stream_titles
+
+PAGE = (
+    "<html><head><title>t</title></head><body>"
+    + "".join(f'<div class="post"><h2 class="title">Title {i} <b>bold</b></h2><p>body {i}</p></div>' for i in range(20))
+    + "</body></html>"
+).encode()
+
+
+def pieces(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class Chunks:
+    """An iterable of chunks that counts how many were read."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.read = 0
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+
+@pytest.mark.parametrize("size", [1, 7, 64, len(PAGE)])
+def test_titles_split_across_chunks(size):
+    assert list(iter_titles(pieces(PAGE, size), "h2.title")) == extract_titles(PAGE.decode(), "h2.title")
+
+
+def test_stops_reading_at_max_titles():
+    chunks = Chunks(pieces(PAGE, 64))
+
+    assert list(iter_titles(chunks, "div.post > h2", max_titles=2)) == ["Title 0bold", "Title 1bold"]
+    assert chunks.read < len(chunks.chunks) / 4
+    assert list(iter_titles(pieces(PAGE, 64), "h2", max_titles=0)) == []
+
+
+def test_default_selector_falls_back_to_titleline_links():
+    page = b'<span class="titleline"><a>One</a></span><p>x</p><span class="titleline"><a>Two</a></span>'
+
+    assert list(iter_titles(pieces(page, 5))) == ["One", "Two"]
+    assert list(iter_titles(pieces(page + b"<h2>Real</h2>", 5))) == ["Real"]
+
+
+def test_unsupported_selector_is_rejected():
+    with pytest.raises(ValueError):
+        list(iter_titles([PAGE], "h2 + p"))
+
+
+def test_without_lxml_the_whole_page_is_parsed(monkeypatch):
+    monkeypatch.setattr(scraper, "etree", None)
+    chunks = Chunks(pieces(PAGE, 64))
+
+    assert list(iter_titles(chunks, "h2.title", max_titles=3)) == ["Title 0bold", "Title 1bold", "Title 2bold"]
+    assert chunks.read == len(chunks.chunks)
+    assert list(iter_titles(["<h2>Заголовок</h2>".encode("koi8-r")], encoding="koi8-r")) == ["Заголовок"]
+    with pytest.raises(ValueError):
+        list(iter_titles([PAGE], "h2 + p"))
+
+
+@pytest.mark.parametrize("lxml", [True, False])
+def test_stream_titles_uses_the_header_charset(server, monkeypatch, lxml):
+    if not lxml:
+        monkeypatch.setattr(scraper, "etree", None)
+    body = "<h2>Новости</h2><h2>Спорт</h2>".encode("windows-1251")
+    server.pages["/ru"] = (200, {"Content-Type": "text/html; charset=windows-1251"}, body)
+
+    assert list(stream_titles(f"{server.url}/ru", chunk_size=3)) == ["Новости", "Спорт"]
+
+
+def test_stream_titles_detects_a_meta_charset(server):
+    body = '<meta charset="windows-1251"><h2>Новости</h2>'.encode("windows-1251")
+    server.pages["/ru"] = (200, {"Content-Type": "text/html"}, body)
+
+    assert list(stream_titles(f"{server.url}/ru", chunk_size=4)) == ["Новости"]
@@ -0,0 +1,81 @@
+"""Tests for `watch.TitleWatcher` against a local server."""
+
+import requests
+
+from watch import TitleWatcher
+
+
+def listing(*titles):
+    return 200, {"Content-Type": "text/html; charset=utf-8"}, "".join(f"<h2>{t}</h2>" for t in titles).encode()
+
+
+def test_reports_new_titles_only(server):
+    url = f"{server.url}/news"
+    with TitleWatcher(":memory:") as watcher:
+        server.pages["/news"] = listing("A", "B")
+        assert watcher.check(url) == ["A", "B"]
+
+        assert watcher.check(url) == []
+        assert watcher.stats == {"unchanged": 1, "parsed": 1, "new_titles": 2}
+
+        server.pages["/news"] = listing("C", "A", "B")
+        assert watcher.check(url) == ["C"]
+
+        server.pages["/news"] = listing("B", "C")
+        assert watcher.check(url) == []
+        assert watcher.stats == {"unchanged": 1, "parsed": 3, "new_titles": 3}
+
+
+def test_charset_from_the_content_type_header_is_used(server):
+    url = f"{server.url}/news"
+    body = "<h2>Новости</h2>".encode("windows-1251")
+    server.pages["/news"] = (200, {"Content-Type": "text/html; charset=windows-1251"}, body)
+    with TitleWatcher(":memory:") as watcher:
+        assert watcher.check(url) == ["Новости"]
+
+
+def test_seen_titles_persist_across_watchers(server, tmp_path):
+    url = f"{server.url}/news"
+    store = str(tmp_path / "watch.sqlite3")
+    server.pages["/news"] = listing("A", "B")
+    with TitleWatcher(store) as watcher:
+        watcher.check(url)
+
+    server.pages["/news"] = listing("A", "B", "D")
+    with TitleWatcher(store) as watcher:
+        assert watcher.check(url) == ["D"]
+
+    with TitleWatcher(store, selector="h2, p") as watcher:
+        # Fingerprints are kept per selector.
+        assert watcher.check(url) == ["A", "B", "D"]
+
+
+def test_first_check_can_only_record(server):
+    url = f"{server.url}/news"
+    server.pages["/news"] = listing("A")
+    with TitleWatcher(":memory:", emit_initial=False) as watcher:
+        assert watcher.check(url) == []
+        server.pages["/news"] = listing("A", "B")
+        assert watcher.check(url) == ["B"]
+
+
+def test_least_recently_seen_titles_are_forgotten(server):
+    url = f"{server.url}/news"
+    with TitleWatcher(":memory:", max_titles_per_url=2) as watcher:
+        for titles in (("A",), ("B",), ("C",)):
+            server.pages["/news"] = listing(*titles)
+            watcher.check(url)
+        server.pages["/news"] = listing("A", "C")
+        assert watcher.check(url) == ["A"]
+
+
+def test_watch_yields_new_titles_and_errors(server):
+    server.pages["/news"] = listing("A")
+    urls = [f"{server.url}/news", f"{server.url}/missing"]
+    with TitleWatcher(":memory:") as watcher:
+        results = list(watcher.watch(urls, interval=0, rounds=2, max_workers=2))
+
+    assert [(r.url, r.titles) for r in results if r.error is None] == [(urls[0], ["A"])]
+    errors = [r for r in results if r.error is not None]
+    assert len(errors) == 2
+    assert all(isinstance(r.error, requests.HTTPError) for r in errors)
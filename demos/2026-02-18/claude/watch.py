@@ -0,0 +1,181 @@
+"""Watch listing pages and report only titles that were not seen before.
+
+`TitleWatcher` keeps a per-URL fingerprint in SQLite: the hash of the last
+page body and the hashes of the titles seen on it. A page whose body hash is
+unchanged is not parsed at all, and only titles whose hash is not yet known
+are reported. Title hashes are kept in a bounded LRU per URL (titles still on
+the page are refreshed on every check), so the store does not grow forever.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator
+
+import requests
+
+from httpcache import HTTPCache
+from scraper import ScrapeResult, _build_session, _run_batch, extract_titles
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT NOT NULL,
+    selector TEXT NOT NULL,
+    page_hash TEXT NOT NULL,
+    checked_at REAL NOT NULL,
+    PRIMARY KEY (url, selector)
+);
+CREATE TABLE IF NOT EXISTS seen_titles (
+    url TEXT NOT NULL,
+    selector TEXT NOT NULL,
+    title_hash INTEGER NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (url, selector, title_hash)
+);
+CREATE INDEX IF NOT EXISTS seen_titles_lru ON seen_titles (url, selector, last_seen);
+"""
+
+
+def _title_hash(title: str) -> int:
+    # 64 bits keep the store small; a collision only hides one title.
+    return int.from_bytes(hashlib.blake2b(title.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+class TitleWatcher:
+    """Check pages repeatedly and report only newly seen titles."""
+
+    def __init__(
+        self,
+        store_path: str = "watch.sqlite3",
+        selector: str = "h2",
+        timeout: int = 10,
+        auth_config: dict | None = None,
+        parser: str = "html.parser",
+        max_titles_per_url: int = 5000,
+        emit_initial: bool = True,
+        cache: HTTPCache | None = None,
+    ) -> None:
+        """
+        Args:
+            store_path: SQLite file holding the fingerprints (":memory:" for
+                        a store that lasts only as long as the watcher).
+            selector: CSS selector for title elements, as for `scrape_titles`.
+            timeout: Request timeout in seconds.
+            auth_config: Optional authentication, as for `scrape_titles`.
+            parser: Parser backend, as for `scrape_titles`.
+            max_titles_per_url: Title hashes remembered per URL; the least
+                                recently seen are forgotten first.
+            emit_initial: Whether the first check of a URL reports all of its
+                          titles (otherwise it only records them).
+            cache: Optional `HTTPCache` for revalidating pages.
+        """
+        self.selector = selector
+        self.timeout = timeout
+        self.auth_config = auth_config
+        self.parser = parser
+        self.max_titles_per_url = max_titles_per_url
+        self.emit_initial = emit_initial
+        self.cache = cache
+        self.stats = {"unchanged": 0, "parsed": 0, "new_titles": 0}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(store_path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self) -> "TitleWatcher":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def check(self, url: str) -> list[str]:
+        """Fetch one page and return the titles not seen on it before.
+
+        Raises:
+            ValueError, ConnectionError, HTTPError, Timeout: As for `scrape_titles`.
+        """
+        with _build_session(self.auth_config, cache=self.cache) as session:
+            return self._check(session, url)
+
+    def check_many(self, urls: Iterable[str], max_workers: int = 16, per_host: int = 4) -> Iterator[ScrapeResult]:
+        """Check several pages concurrently, as `scrape_many` does.
+
+        Yields:
+            A `ScrapeResult` per URL whose `titles` are only the new ones
+            (empty for unchanged pages).
+        """
+        with _build_session(self.auth_config, pool_size=max(max_workers, per_host), cache=self.cache) as session:
+            yield from _run_batch(urls, lambda url: self._check(session, url), max_workers, per_host)
+
+    def watch(
+        self, urls: Iterable[str], interval: float = 300, rounds: int | None = None, **batch_options
+    ) -> Iterator[ScrapeResult]:
+        """Check `urls` every `interval` seconds, yielding new titles and errors.
+
+        Results without new titles are not yielded. Runs forever unless
+        `rounds` is given; `batch_options` are passed to `check_many`.
+        """
+        urls = list(urls)
+        done = 0
+        while rounds is None or done < rounds:
+            started = time.monotonic()
+            for result in self.check_many(urls, **batch_options):
+                if result.titles or result.error is not None:
+                    yield result
+            done += 1
+            if rounds is None or done < rounds:
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    def _check(self, session: requests.Session, url: str) -> list[str]:
+        response = session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        body = response.content
+        page_hash = hashlib.sha256(body).hexdigest()
+        now = time.time()
+        key = (url, self.selector)
+
+        with self._lock:
+            row = self._db.execute("SELECT page_hash FROM pages WHERE url = ? AND selector = ?", key).fetchone()
+        if row is not None and row[0] == page_hash:
+            with self._lock, self._db:
+                self._db.execute("UPDATE pages SET checked_at = ? WHERE url = ? AND selector = ?", (now, *key))
+                self.stats["unchanged"] += 1
+            return []
+
+        titles = extract_titles(response.text, self.selector, self.parser)
+        hashes = [_title_hash(title) for title in titles]
+        with self._lock, self._db:
+            self.stats["parsed"] += 1
+            known = set()
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                known.update(
+                    h for (h,) in self._db.execute(
+                        f"SELECT title_hash FROM seen_titles WHERE url = ? AND selector = ? "
+                        f"AND title_hash IN ({', '.join('?' * len(chunk))})",
+                        (*key, *chunk),
+                    )
+                )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO seen_titles VALUES (?, ?, ?, ?)", [(*key, h, now) for h in set(hashes)]
+            )
+            self._db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)", (*key, page_hash, now))
+            self._db.execute(
+                "DELETE FROM seen_titles WHERE rowid IN ("
+                " SELECT rowid FROM seen_titles WHERE url = ? AND selector = ?"
+                " ORDER BY last_seen DESC LIMIT -1 OFFSET ?)",
+                (*key, self.max_titles_per_url),
+            )
+            if row is None and not self.emit_initial:
+                return []
+            new_titles = []
+            for title, h in zip(titles, hashes):
+                if h not in known:
+                    known.add(h)
+                    new_titles.append(title)
+            self.stats["new_titles"] += len(new_titles)
+            return new_titles
@@ -0,0 +1,229 @@
+"""Reproducible local benchmark for scraper2.
+
+Serves synthetic Hacker News-like pages of configurable size and latency from
+a local HTTP server, then crawls them with `scrape_many` under each
+combination of parser backend and worker count (plus warm-cache and streaming
+runs), reporting wall time, pages per second and the median of each crawl
+stage from `CrawlMetrics`.
+
+Usage:
+    python bench.py --pages 200 --titles 30 --page-kb 50 --latency 0.01 --workers 1,8,32
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from httpcache import HTTPCache
+from metrics import STAGES, CrawlMetrics
+from scraper2 import PARSERS, LexborHTMLParser, etree, scrape_many
+
+
+class SyntheticSite:
+    """
+    Local HTTP server serving `/page/<n>` listing pages.
+
+    Every page has `titles` title links and about `page_kb` KiB of markup, is
+    delayed by `latency` seconds and carries an ETag, so conditional requests
+    get a `304 Not Modified`. Use as a context manager.
+    """
+
+    def __init__(self, titles: int = 30, page_kb: int = 50, latency: float = 0.0):
+        self.titles = titles
+        self.page_kb = page_kb
+        self.latency = latency
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "SyntheticSite":
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def page(self, n: int) -> bytes:
+        """Markup of page `n`."""
+        rows = []
+        for i in range(self.titles):
+            rows.append(
+                f'<tr class="athing"><td class="title"><span class="titleline">'
+                f'<a href="https://example.com/{n}/{i}">Synthetic story {n}-{i}</a>'
+                f'<span class="sitebit comhead"> (<a href="from?site=example.com">example.com</a>)</span>'
+                f"</span></td></tr>"
+            )
+        body = "".join(rows)
+        filler_size = max(self.page_kb * 1024 - len(body), 0)
+        spacer = '<tr class="spacer"><td class="subtext">' + "x" * 80 + "</td></tr>"
+        filler = spacer * (filler_size // len(spacer))
+        return f"<html><head><title>page {n}</title></head><body><table>{body}{filler}</table></body></html>".encode()
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                with site._lock:
+                    site.requests_served += 1
+                if site.latency:
+                    time.sleep(site.latency)
+                parts = self.path.strip("/").split("/")
+                if len(parts) != 2 or parts[0] != "page" or not parts[1].isdigit():
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                etag = f'"{parts[1]}-{site.titles}-{site.page_kb}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = site.page(int(parts[1]))
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def available_parsers() -> List[str]:
+    """Parser backends whose packages are installed."""
+    return [
+        parser for parser in PARSERS
+        if not (parser == "selectolax" and LexborHTMLParser is None) and not (parser == "lxml" and etree is None)
+    ]
+
+
+def run_scenario(
+    site: SyntheticSite,
+    pages: int,
+    parser: str,
+    workers: int,
+    cache: Optional[HTTPCache] = None,
+    stream: bool = False,
+) -> Dict[str, Any]:
+    """Crawl `pages` pages once and return timings and counters."""
+    urls = [f"{site.url}/page/{i}" for i in range(pages)]
+    metrics = CrawlMetrics()
+    served_before = site.requests_served
+    started = time.perf_counter()
+    results = list(
+        scrape_many(
+            urls, parser=parser, delay=0, max_workers=workers, respect_robots=False,
+            cache=cache, stream=stream, metrics=metrics,
+        )
+    )
+    wall = time.perf_counter() - started
+    summary = metrics.summary()
+    return {
+        "pages": pages,
+        "errors": sum(isinstance(result, Exception) for _, result in results),
+        "requests": site.requests_served - served_before,
+        "wall_seconds": wall,
+        "pages_per_second": pages / wall if wall else 0.0,
+        "cache_hits": summary["cache_hits"],
+        "connections": summary["connections"],
+        "p50": {stage: summary["stages"][stage]["p50"] for stage in STAGES},
+    }
+
+
+def run_benchmark(
+    site: SyntheticSite,
+    pages: int,
+    parsers: List[str],
+    workers: List[int],
+    with_cache: bool = True,
+    with_stream: bool = True,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Run every scenario against a started site.
+
+    Returns:
+        Results keyed by scenario name, e.g. "lxml w8" or "lxml w8 warm-cache".
+    """
+    results = {}
+    for parser in parsers:
+        for count in workers:
+            results[f"{parser} w{count}"] = run_scenario(site, pages, parser, count)
+        if with_cache:
+            cache = HTTPCache(":memory:")
+            run_scenario(site, pages, parser, max(workers), cache=cache)
+            results[f"{parser} w{max(workers)} warm-cache"] = run_scenario(site, pages, parser, max(workers), cache=cache)
+            cache.close()
+    if with_stream and etree is not None:
+        results[f"stream w{max(workers)}"] = run_scenario(site, pages, "lxml", max(workers), stream=True)
+    return results
+
+
+def format_results(results: Dict[str, Dict[str, Any]]) -> str:
+    """Format benchmark results as a plain-text table (stage medians in ms)."""
+    header = f"{'scenario':<28} {'pages/s':>8} {'wall s':>7} {'reqs':>5} {'conns':>5} {'err':>4}"
+    lines = [header + "".join(f" {stage + ' ms':>11}" for stage in STAGES)]
+    for name, result in results.items():
+        line = (
+            f"{name:<28} {result['pages_per_second']:>8.1f} {result['wall_seconds']:>7.2f} {result['requests']:>5} "
+            f"{result['connections']:>5} {result['errors']:>4}"
+        )
+        lines.append(line + "".join(f" {result['p50'][stage] * 1000:>11.1f}" for stage in STAGES))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scraper2 against a local synthetic site")
+    parser.add_argument("--pages", type=int, default=200, help="Pages crawled per scenario")
+    parser.add_argument("--titles", type=int, default=30, help="Titles per page")
+    parser.add_argument("--page-kb", type=int, default=50, help="Approximate page size in KiB")
+    parser.add_argument("--latency", type=float, default=0.01, help="Server latency per request in seconds")
+    parser.add_argument("--parsers", default=",".join(available_parsers()), help="Comma-separated parser backends")
+    parser.add_argument("--workers", default="1,8,32", help="Comma-separated worker counts")
+    parser.add_argument("--no-cache", action="store_true", help="Skip the warm-cache scenarios")
+    parser.add_argument("--no-stream", action="store_true", help="Skip the streaming scenario")
+    parser.add_argument("--json", dest="json_path", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    # scraper2 logs every page at DEBUG; keep the benchmark output readable.
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with SyntheticSite(args.titles, args.page_kb, args.latency) as site:
+        results = run_benchmark(
+            site,
+            args.pages,
+            args.parsers.split(","),
+            [int(count) for count in args.workers.split(",")],
+            with_cache=not args.no_cache,
+            with_stream=not args.no_stream,
+        )
+
+    print(format_results(results))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""Crawl instrumentation: per-page stage timings, counters and Prometheus export."""
+
+import bisect
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Stages of fetching and parsing one page, in order. "connect" covers DNS
+# resolution and the TCP handshake (urllib3 does both in one call) and is only
+# observed for pages that opened a new connection, as is "tls".
+STAGES = ("connect", "tls", "ttfb", "download", "parse")
+
+# Upper bounds (in seconds) of the default stage histogram buckets.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = threading.local()
+
+
+class PageTiming:
+    """Measurements for one page, filled in while it is fetched and parsed."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.stages: Dict[str, float] = dict.fromkeys(STAGES, 0.0)
+        self.connections = 0
+        self.status: Optional[int] = None
+        self.bytes_received = 0
+        self.retries = 0
+        self.from_cache = False
+        self.titles = 0
+        self.error: Optional[str] = None
+
+    def add(self, stage: str, seconds: float) -> None:
+        """Add time to a stage."""
+        self.stages[stage] += seconds
+
+    def headers_received(self, response: requests.Response, seconds: float) -> None:
+        """
+        Record a response whose headers arrived `seconds` after the request started.
+
+        Time not spent connecting counts as time to first byte (including any
+        retries). The body size is taken from `Content-Length`; call
+        `body_received` for bodies read afterwards.
+        """
+        self.status = response.status_code
+        self.from_cache = bool(getattr(response, "from_cache", False))
+        history = getattr(getattr(response.raw, "retries", None), "history", None) or ()
+        self.retries = len(history)
+        self.add("ttfb", max(seconds - self.stages["connect"] - self.stages["tls"], 0.0))
+
+    def body_received(self, size: int, seconds: float) -> None:
+        """Record reading a body of `size` bytes."""
+        self.bytes_received += size
+        self.add("download", seconds)
+
+
+class _Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of its bucket."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class CrawlMetrics:
+    """
+    Thread-safe aggregate of `PageTiming`s.
+
+    Use `page(url)` around fetching and parsing a page; sessions whose
+    adapters went through `instrument_adapter` then also record connection
+    setup time for it.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything recorded so far."""
+        with self._lock:
+            self._stages = {stage: _Histogram(self.buckets) for stage in STAGES}
+            self._statuses: Counter = Counter()
+            self._counters: Counter = Counter()
+            self._started = time.monotonic()
+
+    @contextmanager
+    def page(self, url: str) -> Iterator[PageTiming]:
+        """Time one page; exceptions are recorded (by class name) and re-raised."""
+        timing = PageTiming(url)
+        previous = getattr(_current, "timing", None)
+        _current.timing = timing
+        try:
+            yield timing
+        except Exception as e:
+            timing.error = type(e).__name__
+            raise
+        finally:
+            _current.timing = previous
+            self.record(timing)
+
+    def record(self, timing: PageTiming) -> None:
+        """Add a finished page."""
+        with self._lock:
+            for stage, seconds in timing.stages.items():
+                if stage in ("connect", "tls") and not seconds:
+                    continue
+                self._stages[stage].observe(seconds)
+            self._statuses[timing.status if timing.status is not None else timing.error] += 1
+            self._counters["pages"] += 1
+            self._counters["errors"] += timing.error is not None or (timing.status or 0) >= 400
+            self._counters["retries"] += timing.retries
+            self._counters["bytes"] += timing.bytes_received
+            self._counters["cache_hits"] += timing.from_cache
+            self._counters["titles"] += timing.titles
+            self._counters["connections"] += timing.connections
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Return aggregated metrics.
+
+        Returns:
+            `{"pages", "errors", "retries", "bytes", "cache_hits", "titles",
+            "connections", "elapsed", "statuses", "stages"}` where `stages`
+            maps each stage to `count`, `total`, `mean`, `p50`, `p90`, `p99`
+            and `max` (seconds).
+        """
+        with self._lock:
+            stages = {}
+            for stage, histogram in self._stages.items():
+                stages[stage] = {
+                    "count": histogram.count,
+                    "total": histogram.total,
+                    "mean": histogram.total / histogram.count if histogram.count else 0.0,
+                    "p50": histogram.quantile(0.5),
+                    "p90": histogram.quantile(0.9),
+                    "p99": histogram.quantile(0.99),
+                    "max": histogram.max,
+                }
+            summary: Dict[str, Any] = {
+                name: self._counters[name]
+                for name in ("pages", "errors", "retries", "bytes", "cache_hits", "titles", "connections")
+            }
+            summary["elapsed"] = time.monotonic() - self._started
+            summary["statuses"] = {str(key): count for key, count in self._statuses.items()}
+            summary["stages"] = stages
+            return summary
+
+    def report(self) -> str:
+        """Format `summary` as a plain-text table."""
+        summary = self.summary()
+        lines = [f"{'stage':<10} {'count':>6} {'mean ms':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+        for stage, stats in summary["stages"].items():
+            lines.append(
+                f"{stage:<10} {stats['count']:>6} {stats['mean'] * 1000:>9.1f} {stats['p50'] * 1000:>9.1f} "
+                f"{stats['p90'] * 1000:>9.1f} {stats['p99'] * 1000:>9.1f} {stats['max'] * 1000:>9.1f}"
+            )
+        lines.append(
+            f"pages: {summary['pages']} ({summary['errors']} errors, {summary['cache_hits']} from cache), "
+            f"titles: {summary['titles']}, retries: {summary['retries']}, "
+            f"new connections: {summary['connections']}, {summary['bytes'] / 1024:.1f} KiB"
+        )
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(summary["statuses"].items()))
+        lines.append(f"statuses: {statuses or '-'}")
+        return "\n".join(lines)
+
+    def prometheus(self, prefix: str = "scraper") -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                f"# HELP {prefix}_stage_seconds Time spent per page in each crawl stage.",
+                f"# TYPE {prefix}_stage_seconds histogram",
+            ]
+            for stage, histogram in self._stages.items():
+                cumulative = 0
+                for bound, count in zip(list(self.buckets) + [float("inf")], histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {histogram.total}')
+                lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+            lines += [f"# HELP {prefix}_pages_total Pages fetched, by HTTP status or error.", f"# TYPE {prefix}_pages_total counter"]
+            for status, count in sorted(self._statuses.items(), key=str):
+                lines.append(f'{prefix}_pages_total{{status="{status}"}} {count}')
+            for name, help_text in (
+                ("retries", "Transport-level retries."),
+                ("bytes", "Response body bytes received."),
+                ("cache_hits", "Pages answered from the HTTP cache."),
+                ("titles", "Titles extracted."),
+                ("connections", "New connections opened."),
+            ):
+                lines += [
+                    f"# HELP {prefix}_{name}_total {help_text}",
+                    f"# TYPE {prefix}_{name}_total counter",
+                    f"{prefix}_{name}_total {self._counters[name]}",
+                ]
+            return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str, prefix: str = "scraper") -> None:
+        """Write `prometheus()` to a file, e.g. for node_exporter's textfile collector."""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus(prefix))
+
+
+class _TimedConnection(HTTPConnection):
+    def _new_conn(self):
+        started = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            self._connect_time = time.perf_counter() - started
+            timing = getattr(_current, "timing", None)
+            if timing is not None:
+                timing.add("connect", self._connect_time)
+                timing.connections += 1
+
+
+class _TimedHTTPSConnection(_TimedConnection, HTTPSConnection):
+    def connect(self) -> None:
+        started = time.perf_counter()
+        self._connect_time = 0.0
+        try:
+            super().connect()
+        finally:
+            timing = getattr(_current, "timing", None)
+            if timing is not None:
+                timing.add("tls", max(time.perf_counter() - started - self._connect_time, 0.0))
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+def instrument_adapter(adapter: HTTPAdapter) -> HTTPAdapter:
+    """Make an adapter's new connections report their setup time to `CrawlMetrics.page`."""
+    adapter.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool}
+    return adapter
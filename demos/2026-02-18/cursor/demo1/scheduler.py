@@ -0,0 +1,352 @@
+"""Polite crawl scheduling: per-host rate limits, robots.txt and interleaving."""
+
+import heapq
+import itertools
+import logging
+import math
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class RobotsDisallowed(Exception):
+    """Raised (as a result) for URLs that robots.txt does not allow us to fetch."""
+
+
+class TokenBucket:
+    """Token bucket allowing `rate` requests per second with bursts of `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self, now: float) -> None:
+        """Take one token; call only when `wait_time` is 0."""
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, seconds: float, now: float) -> None:
+        """Hold back the next token for at least `seconds` (e.g. after a 429)."""
+        self._refill(now)
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+class _RobotsParser(RobotFileParser):
+    """`RobotFileParser` that also accepts fractional Crawl-delay values.
+
+    The standard library ignores any delay that is not a whole number, such
+    as the common `Crawl-delay: 0.5`.
+    """
+
+    def parse(self, lines: Iterable[str]) -> None:
+        # Each delay is swapped for its index in `delays`, which the base
+        # parser accepts, and swapped back on the parsed entries.
+        delays: List[float] = []
+        rewritten = []
+        for line in lines:
+            name, sep, value = line.partition(":")
+            if sep and name.strip().lower() == "crawl-delay":
+                try:
+                    delay = float(value.split("#", 1)[0])
+                except ValueError:
+                    delay = None
+                if delay is not None and math.isfinite(delay) and delay >= 0:
+                    line = f"Crawl-delay: {len(delays)}"
+                    delays.append(delay)
+            rewritten.append(line)
+        super().parse(rewritten)
+        for entry in [*self.entries, self.default_entry]:
+            if entry is not None and entry.delay is not None:
+                entry.delay = delays[entry.delay]
+
+
+class RobotsCache:
+    """Fetch, parse and cache robots.txt once per host."""
+
+    def __init__(self, session: requests.Session, user_agent: str, timeout: float = 10):
+        self.session = session
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self._parsers: Dict[str, RobotFileParser] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def parser_for(self, url: str) -> RobotFileParser:
+        """Return the parsed robots.txt for the URL's host, fetching it on first use.
+
+        Following RFC 9309, a missing robots.txt (4xx) allows everything and
+        an unreachable one (5xx or network error) disallows everything.
+        """
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            if origin in self._parsers:
+                return self._parsers[origin]
+            host_lock = self._locks.setdefault(origin, threading.Lock())
+        with host_lock:
+            if origin not in self._parsers:
+                self._parsers[origin] = self._fetch(origin)
+            return self._parsers[origin]
+
+    def _fetch(self, origin: str) -> RobotFileParser:
+        parser = _RobotsParser(f"{origin}/robots.txt")
+        try:
+            response = self.session.get(parser.url, timeout=self.timeout, headers={"User-Agent": self.user_agent})
+        except requests.RequestException as e:
+            logger.warning("Could not fetch %s (%s); treating host as disallowed", parser.url, e)
+            parser.disallow_all = True
+            return parser
+        if response.status_code >= 500:
+            parser.disallow_all = True
+        elif response.status_code >= 400:
+            parser.allow_all = True
+        else:
+            parser.parse(response.text.splitlines())
+        logger.debug("Loaded %s (status %d)", parser.url, response.status_code)
+        return parser
+
+    def allowed(self, url: str) -> bool:
+        """Whether robots.txt allows our user agent to fetch `url`."""
+        return self.parser_for(url).can_fetch(self.user_agent, url)
+
+    def delay(self, url: str) -> Optional[float]:
+        """Minimum seconds between requests to the URL's host, if robots.txt sets one."""
+        parser = self.parser_for(url)
+        delays = []
+        crawl_delay = parser.crawl_delay(self.user_agent)
+        if crawl_delay is not None:
+            delays.append(float(crawl_delay))
+        rate = parser.request_rate(self.user_agent)
+        if rate is not None and rate.requests:
+            delays.append(rate.seconds / rate.requests)
+        return max(delays) if delays else None
+
+
+class CrawlScheduler:
+    """Hand out URLs so that each host is crawled at a polite rate.
+
+    URLs are queued per host and released through a per-host token bucket
+    (one request every `delay` seconds, or the robots.txt `Crawl-delay` if it
+    is longer). Hosts are served in order of readiness, so URLs from different
+    hosts are interleaved and total throughput grows with the number of hosts
+    while each host sees a steady, polite rate. Responses with status 429 or
+    503 pause the host (honouring `Retry-After`) and requeue the URL.
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        user_agent: str,
+        delay: float = 1.0,
+        burst: float = 1.0,
+        respect_robots: bool = True,
+        max_requeues: int = 2,
+    ):
+        """
+        Args:
+            session: Session (or `scraper2.SessionManager`) used to fetch robots.txt.
+            user_agent: User agent matched against robots.txt rules.
+            delay: Default minimum seconds between requests to one host.
+            burst: Requests a host may receive back to back before the delay applies.
+            respect_robots: Whether to check robots.txt rules and Crawl-delay.
+            max_requeues: How often a URL is retried after a 429/503.
+        """
+        self.delay = delay
+        self.burst = burst
+        self.max_requeues = max_requeues
+        self.robots = RobotsCache(session, user_agent) if respect_robots else None
+        self._queues: Dict[str, Deque[Tuple[str, int]]] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._ready: List[Tuple[float, int, str]] = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._pending = 0
+        self._closed = False
+        # Hosts whose robots.txt has been applied. Until then only one URL of a
+        # host is handed out, so its Crawl-delay governs the second request.
+        self._robots_checked: set = set()
+        self._started: set = set()
+
+    def add(self, url: str, attempt: int = 0) -> None:
+        """Queue a URL."""
+        host = urlsplit(url).netloc
+        with self._condition:
+            host_queue = self._queues.get(host)
+            if host_queue is None:
+                host_queue = self._queues[host] = deque()
+                self._buckets.setdefault(host, TokenBucket(1 / self.delay if self.delay > 0 else 1e9, self.burst))
+            if not host_queue and not self._awaiting_robots(host):
+                heapq.heappush(self._ready, (time.monotonic(), next(self._order), host))
+            host_queue.append((url, attempt))
+            self._pending += 1
+            self._condition.notify()
+
+    def extend(self, urls: Iterable[str]) -> None:
+        """Queue several URLs."""
+        for url in urls:
+            self.add(url)
+
+    def next_url(self) -> Optional[Tuple[str, int]]:
+        """Block until some host may be fetched; return `(url, attempt)` or `None` when done."""
+        with self._condition:
+            while True:
+                if self._closed or (not self._ready and self._pending == 0):
+                    return None
+                if not self._ready:
+                    self._condition.wait()
+                    continue
+                ready_at, _, host = self._ready[0]
+                now = time.monotonic()
+                wait = max(ready_at - now, self._buckets[host].wait_time(now))
+                if wait > 0:
+                    heapq.heapreplace(self._ready, (now + wait, next(self._order), host))
+                    until_next = self._ready[0][0] - now
+                    if until_next > 0:
+                        self._condition.wait(until_next)
+                    continue
+                heapq.heappop(self._ready)
+                self._buckets[host].consume(now)
+                url, attempt = self._queues[host].popleft()
+                self._started.add(host)
+                if self._queues[host] and not self._awaiting_robots(host):
+                    heapq.heappush(self._ready, (now + self._buckets[host].wait_time(now), next(self._order), host))
+                return url, attempt
+
+    def done(self) -> None:
+        """Mark one URL returned by `next_url` as finished."""
+        with self._condition:
+            self._pending -= 1
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        """Stop handing out URLs."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def _awaiting_robots(self, host: str) -> bool:
+        return self.robots is not None and host in self._started and host not in self._robots_checked
+
+    def _release_host(self, url: str) -> None:
+        host = urlsplit(url).netloc
+        with self._condition:
+            if host in self._robots_checked:
+                return
+            self._robots_checked.add(host)
+            if self._queues[host]:
+                now = time.monotonic()
+                heapq.heappush(self._ready, (now + self._buckets[host].wait_time(now), next(self._order), host))
+            self._condition.notify_all()
+
+    def slow_down(self, url: str, seconds: float) -> None:
+        """Pause the URL's host for at least `seconds`."""
+        host = urlsplit(url).netloc
+        with self._condition:
+            self._buckets[host].pause(seconds, time.monotonic())
+
+    def _apply_robots_delay(self, url: str) -> None:
+        robots_delay = self.robots.delay(url)
+        if robots_delay and robots_delay > self.delay:
+            host = urlsplit(url).netloc
+            with self._condition:
+                bucket = self._buckets[host]
+                if bucket.rate > 1 / robots_delay:
+                    # Tokens accrued at the default rate (including the one just spent
+                    # on this URL) must not let the next request through early.
+                    bucket.wait_time(time.monotonic())
+                    bucket.rate = 1 / robots_delay
+                    bucket.capacity = 1.0
+                    bucket.tokens = min(bucket.tokens, 0.0)
+                    logger.debug("Using Crawl-delay %.1fs for %s", robots_delay, host)
+
+    def run(self, fetch: Callable[[str], Any], max_workers: int = 8) -> Iterator[Tuple[str, Any]]:
+        """Fetch every queued URL with `max_workers` threads.
+
+        Args:
+            fetch: Called with each URL; its return value (or the exception it
+                raises) is the URL's result.
+            max_workers: Number of worker threads across all hosts.
+
+        Yields:
+            `(url, result)` pairs as they complete, where `result` is the value
+            returned by `fetch` or an exception (`RobotsDisallowed` for URLs
+            blocked by robots.txt).
+        """
+        results: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+
+        def worker() -> None:
+            while True:
+                item = self.next_url()
+                if item is None:
+                    return
+                url, attempt = item
+                try:
+                    if self.robots is not None:
+                        try:
+                            allowed = self.robots.allowed(url)
+                            self._apply_robots_delay(url)
+                        finally:
+                            self._release_host(url)
+                        if not allowed:
+                            raise RobotsDisallowed(f"Disallowed by robots.txt: {url}")
+                    results.put((url, fetch(url)))
+                except requests.HTTPError as e:
+                    status = e.response.status_code if e.response is not None else None
+                    if status in (429, 503) and attempt < self.max_requeues:
+                        retry_after = _retry_after(e.response) or self.delay * 2 ** (attempt + 1)
+                        logger.info("%s returned %d; pausing host for %.1fs", url, status, retry_after)
+                        self.slow_down(url, retry_after)
+                        self.add(url, attempt + 1)
+                    else:
+                        results.put((url, e))
+                except Exception as e:
+                    results.put((url, e))
+                finally:
+                    self.done()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            workers = [pool.submit(worker) for _ in range(max_workers)]
+            try:
+                while True:
+                    try:
+                        yield results.get(timeout=0.1)
+                    except queue.Empty:
+                        if all(w.done() for w in workers) and results.empty():
+                            break
+            finally:
+                self.close()
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
@@ -1,14 +1,25 @@
 """Web scraper module for extracting article titles from web pages."""
 
 import requests
-from bs4 import BeautifulSoup
-from typing import List
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 from urllib3.util.retry import Retry
 from requests.adapters import HTTPAdapter
 
 import logging
 import argparse
+import atexit
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+from httpcache import CachingAdapter, HTTPCache
+from metrics import CrawlMetrics, PageTiming, instrument_adapter
+from scheduler import CrawlScheduler
+from sinks import open_sink, records_for
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -20,24 +31,317 @@ HEADERS = {
     "User-Agent": "MyScraper/1.0 (Educational; +https://example.com)"
 }
 
-def create_session() -> requests.Session:
-    """Create a session with retry logic and exponential backoff."""
-    session = requests.Session()
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+PARSERS = ("html.parser", "lxml", "selectolax")
+
+# For Hacker News specifically. The selector is compiled once, and the strainer
+# limits parsing to <span class="titleline"> subtrees, the only place a match
+# can occur.
+TITLE_CSS = "span.titleline > a"
+TITLE_SELECTOR = soupsieve.compile(TITLE_CSS)
+TITLE_STRAINER = SoupStrainer(
+    "span", attrs={"class": lambda value: value is not None and "titleline" in value.split()}
+)
+
+def _build_adapters(
+    cache: Optional[HTTPCache] = None,
+    metrics: Optional[CrawlMetrics] = None,
+    pool_connections: int = 10,
+    pool_maxsize: int = 10,
+    pool_block: bool = False,
+) -> List[HTTPAdapter]:
+    """Build the (https, http) adapters with retry logic and exponential backoff."""
+    # 429 and 503 are left to `CrawlScheduler`, which pauses the whole host
+    # (honouring Retry-After) instead of retrying the one URL inline; urllib3
+    # would otherwise retry them whenever they carry a Retry-After header.
     retries = Retry(
         total=3,
         backoff_factor=1,  # 1s, 2s, 4s between retries
-        status_forcelist=[500, 502, 503, 504],
+        status_forcelist=[500, 502, 504],
+        respect_retry_after_header=False,
     )
-    session.mount("https://", HTTPAdapter(max_retries=retries))
-    session.mount("http://", HTTPAdapter(max_retries=retries))
+    pool_options = dict(
+        max_retries=retries, pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block
+    )
+    if cache is not None:
+        adapter = CachingAdapter(cache, **pool_options)
+        adapters = [adapter, adapter]
+    else:
+        adapters = [HTTPAdapter(**pool_options), HTTPAdapter(**pool_options)]
+    if metrics is not None:
+        for adapter in adapters:
+            instrument_adapter(adapter)
+    return adapters
+
+def _mount(session: requests.Session, adapters: List[HTTPAdapter]) -> requests.Session:
+    for prefix, adapter in zip(("https://", "http://"), adapters):
+        session.mount(prefix, adapter)
     return session
 
-def scrape_article_titles(url: str) -> List[str]:
+def create_session(cache: Optional[HTTPCache] = None, metrics: Optional[CrawlMetrics] = None) -> requests.Session:
+    """
+    Create a session with retry logic and exponential backoff.
+
+    Args:
+        cache: Optional on-disk HTTP cache. GET responses are stored in it and
+            revalidated with ETag/Last-Modified instead of downloaded again.
+        metrics: If given, new connections report their setup time to the
+            page being timed with `metrics.page`.
+    """
+    return _mount(requests.Session(), _build_adapters(cache, metrics))
+
+class SessionManager:
+    """
+    Long-lived, thread-safe owner of pooled HTTP connections.
+
+    All sessions handed out share one pair of adapters, so connections to a
+    host are kept alive and reused across calls and threads: after the first
+    request, fetching from the same host costs a single round trip instead of
+    a new TCP (and TLS) handshake. Each thread gets its own `requests.Session`
+    mounting those adapters, since a session's cookies and settings are not
+    safe to mutate concurrently; urllib3's pools are. Use as a context
+    manager, or call `close`.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        cache: Optional[HTTPCache] = None,
+        metrics: Optional[CrawlMetrics] = None,
+    ):
+        """
+        Args:
+            pool_connections: Hosts whose connection pools are kept.
+            pool_maxsize: Idle connections kept per host; set it to at least
+                the number of threads fetching from one host, or surplus
+                connections are discarded after each request.
+            pool_block: Wait for a free connection instead of opening one
+                beyond `pool_maxsize`.
+            cache: Optional on-disk HTTP cache, as for `create_session`.
+            metrics: Optional collector timing new connections, as for
+                `create_session`.
+        """
+        self.cache = cache
+        self.metrics = metrics
+        self._adapters = _build_adapters(cache, metrics, pool_connections, pool_maxsize, pool_block)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self) -> "SessionManager":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def session(self) -> requests.Session:
+        """Return the calling thread's session, creating it on first use."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("SessionManager is closed")
+            session = self._local.session = _mount(requests.Session(), self._adapters)
+        return session
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """`requests.Session.get` on the calling thread's session."""
+        return self.session().get(url, **kwargs)
+
+    def close(self) -> None:
+        """Close every pooled connection; the manager cannot be used afterwards."""
+        with self._lock:
+            self._closed = True
+            for adapter in {id(adapter): adapter for adapter in self._adapters}.values():
+                adapter.close()
+
+_default_managers: Dict[Optional[HTTPCache], SessionManager] = {}
+_default_managers_lock = threading.Lock()
+
+def default_session_manager(cache: Optional[HTTPCache] = None) -> SessionManager:
+    """
+    Return the process-wide `SessionManager` for `cache`, creating it on first use.
+
+    Used by `scrape_article_titles`, so repeated calls reuse connections.
+    The managers are closed when the interpreter exits.
+    """
+    with _default_managers_lock:
+        manager = _default_managers.get(cache)
+        if manager is None:
+            manager = _default_managers[cache] = SessionManager(cache=cache)
+        return manager
+
+@atexit.register
+def _close_default_managers() -> None:
+    with _default_managers_lock:
+        for manager in _default_managers.values():
+            manager.close()
+        _default_managers.clear()
+
+def extract_titles(html: str, parser: str = "html.parser") -> List[str]:
+    """
+    Extract article titles from an HTML document.
+
+    Args:
+        html: Page markup.
+        parser: "html.parser", "lxml" or "selectolax".
+
+    Returns:
+        The stripped text of every title link, in document order.
+
+    Raises:
+        ValueError: If the parser is unknown.
+        ImportError: If the parser's package is not installed.
+    """
+    if parser not in PARSERS:
+        raise ValueError(f"Unknown parser {parser!r}; expected one of {', '.join(PARSERS)}")
+    if parser == "selectolax":
+        if LexborHTMLParser is None:
+            raise ImportError("The 'selectolax' parser requires the selectolax package")
+        return [node.text(deep=True, separator="", strip=True) for node in LexborHTMLParser(html).css(TITLE_CSS)]
+
+    soup = BeautifulSoup(html, parser, parse_only=TITLE_STRAINER)
+    # h2_elements = soup.find_all("h2")
+    # titles = [h2.get_text(strip=True) for h2 in h2_elements]
+    return [a.get_text(strip=True) for a in TITLE_SELECTOR.select(soup)]
+
+def iter_article_titles(
+    chunks: Iterable[bytes], max_titles: Optional[int] = None, encoding: Optional[str] = None
+) -> Iterator[str]:
+    """
+    Incrementally parse an HTML byte stream and yield titles as they close.
+
+    Elements are discarded as soon as they are finished, so memory is bounded
+    by the chunk size rather than the page size, and `chunks` is no longer
+    read once `max_titles` titles have been yielded.
+
+    Without lxml, `chunks` is read to the end and parsed with html.parser,
+    so titles arrive together and `max_titles` only truncates them.
+
+    Args:
+        chunks: Page body, in pieces of any size.
+        max_titles: Stop after this many titles (default: no limit).
+        encoding: Character encoding of the body; detected from the page
+            when None.
+    """
+    if max_titles is not None and max_titles <= 0:
+        return
+    if etree is None:
+        body = b"".join(chunks)
+        yield from extract_titles(body.decode(encoding, errors="replace") if encoding else body)[:max_titles]
+        return
+    parser = etree.HTMLPullParser(events=("start", "end"), encoding=encoding)
+    current = None  # the open title link, if any
+    found = 0
+
+    def handle_events() -> Iterator[str]:
+        nonlocal current
+        for event, element in parser.read_events():
+            if event == "start":
+                if current is None and _is_title_link(element):
+                    current = element
+                continue
+            if element is current:
+                current = None
+                yield "".join(text.strip() for text in element.itertext())
+            if current is None:
+                element.clear(keep_tail=True)
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+
+    def feed(chunk: Optional[bytes]) -> Iterator[str]:
+        nonlocal found
+        try:
+            if chunk is None:
+                parser.close()
+            else:
+                parser.feed(chunk)
+        except etree.XMLSyntaxError:
+            pass  # e.g. an empty body
+        for title in handle_events():
+            found += 1
+            yield title
+
+    for chunk in chunks:
+        for title in feed(chunk):
+            yield title
+            if found == max_titles:
+                return
+    for title in feed(None):
+        yield title
+        if found == max_titles:
+            return
+
+def _is_title_link(element) -> bool:
+    """Whether an lxml element matches TITLE_CSS ("span.titleline > a")."""
+    parent = element.getparent()
+    return (
+        element.tag == "a"
+        and parent is not None
+        and parent.tag == "span"
+        and "titleline" in (parent.get("class") or "").split()
+    )
+
+def stream_titles(
+    session: requests.Session,
+    url: str,
+    max_titles: Optional[int] = None,
+    chunk_size: int = 16 * 1024,
+    timing: Optional[PageTiming] = None,
+) -> Iterator[str]:
+    """
+    Download a page in chunks and yield its titles as soon as they are parsed.
+
+    The download stops once `max_titles` titles have been yielded. Request
+    errors are raised unchanged, as in `fetch_titles`. If `timing` is given,
+    the interleaved reading and parsing is recorded as its "download" stage.
+    """
+    timing = timing or PageTiming(url)
+    started = time.perf_counter()
+    with session.get(url, timeout=5, headers=HEADERS, stream=True) as response:
+        timing.headers_received(response, time.perf_counter() - started)
+        response.raise_for_status()
+        declared = "charset=" in response.headers.get("Content-Type", "").lower()
+
+        def chunks() -> Iterator[bytes]:
+            for chunk in response.iter_content(chunk_size):
+                timing.bytes_received += len(chunk)
+                yield chunk
+
+        started = time.perf_counter()
+        try:
+            yield from iter_article_titles(chunks(), max_titles, response.encoding if declared else None)
+        finally:
+            timing.add("download", time.perf_counter() - started)
+
+def scrape_article_titles(
+    url: str,
+    parser: str = "html.parser",
+    cache: Optional[HTTPCache] = None,
+    manager: Optional[SessionManager] = None,
+) -> List[str]:
     """
     Extract all <h2> article titles from a given URL.
     
     Args:
         url: The URL of the web page to scrape.
+        parser: HTML parser backend ("html.parser", "lxml" or "selectolax").
+        cache: Optional HTTP cache; unchanged pages are revalidated rather
+            than downloaded, and their titles are not parsed again.
+        manager: Session manager to fetch with (default: the shared
+            `default_session_manager(cache)`, so connections are reused
+            between calls).
         
     Returns:
         A list of strings containing the text of all <h2> elements found.
@@ -45,9 +349,10 @@ def scrape_article_titles(url: str) -> List[str]:
     Raises:
         requests.RequestException: When network or HTTP errors occur.
     """
+    logger.info("Fetching URL: %s", url)
     try:
-        session = create_session()
-        response = session.get(url, timeout=5, headers=HEADERS)
+        manager = manager or default_session_manager(cache)
+        response = manager.get(url, timeout=5, headers=HEADERS)
         response.raise_for_status()
     except requests.exceptions.Timeout:
         raise requests.RequestException("Request timed out. The server took too long to respond.")
@@ -58,32 +363,206 @@ def scrape_article_titles(url: str) -> List[str]:
     except requests.exceptions.RequestException as e:
         raise requests.RequestException(f"Network error: {e}")
     
-    soup = BeautifulSoup(response.text, "html.parser")
-    # h2_elements = soup.find_all("h2")
-    # titles = [h2.get_text(strip=True) for h2 in h2_elements]
+    titles = _extract_response_titles(response, parser, cache)
+    logger.debug("Found %d titles", len(titles))
 
-    # For Hacker News specifically
-    title_links = soup.select("span.titleline > a")
-    titles = [a.get_text(strip=True) for a in title_links]
+    return titles
 
-    logger.info("Fetching URL: %s", url)
-    logger.debug("Found %d titles", len(titles))
+def _extract_response_titles(response: requests.Response, parser: str, cache: Optional[HTTPCache]) -> List[str]:
+    if cache is None:
+        return extract_titles(response.text, parser)
+    return cache.titles(response.content, f"{parser} {TITLE_CSS}", lambda: extract_titles(response.text, parser))
+
+def fetch_titles(
+    session: requests.Session,
+    url: str,
+    parser: str = "html.parser",
+    cache: Optional[HTTPCache] = None,
+    stream: bool = False,
+    max_titles: Optional[int] = None,
+    metrics: Optional[CrawlMetrics] = None,
+) -> List[str]:
+    """
+    Fetch a page with an existing session and extract its titles.
 
+    Unlike `scrape_article_titles`, request errors are raised unchanged, so
+    callers can inspect the response (e.g. the status of an `HTTPError`).
+    Titles are looked up in `cache` by the page's content hash, if given.
+    With `stream` (or `max_titles`) the page is parsed incrementally by
+    `stream_titles` instead, without the title cache. Stage timings and
+    counters go to `metrics`, if given.
+    """
+    with metrics.page(url) if metrics is not None else nullcontext(PageTiming(url)) as timing:
+        if stream or max_titles is not None:
+            titles = list(stream_titles(session, url, max_titles, timing=timing))
+        else:
+            started = time.perf_counter()
+            response = session.get(url, timeout=5, headers=HEADERS, stream=True)
+            timing.headers_received(response, time.perf_counter() - started)
+            started = time.perf_counter()
+            content = response.content
+            timing.body_received(len(content), time.perf_counter() - started)
+            response.raise_for_status()
+            started = time.perf_counter()
+            titles = _extract_response_titles(response, parser, cache)
+            timing.add("parse", time.perf_counter() - started)
+        timing.titles = len(titles)
+    logger.debug("Found %d titles at %s", len(titles), url)
     return titles
 
+def scrape_many(
+    urls: Iterable[str],
+    parser: str = "html.parser",
+    delay: float = 1.0,
+    max_workers: int = 8,
+    respect_robots: bool = True,
+    cache: Optional[HTTPCache] = None,
+    stream: bool = False,
+    max_titles: Optional[int] = None,
+    metrics: Optional[CrawlMetrics] = None,
+    manager: Optional[SessionManager] = None,
+) -> Iterator[Tuple[str, Union[List[str], Exception]]]:
+    """
+    Scrape many URLs concurrently while staying polite to each host.
+
+    URLs are handed out by a `CrawlScheduler`: each host gets at most one
+    request every `delay` seconds (or its robots.txt Crawl-delay), robots.txt
+    rules are honoured, 429/503 responses back off the host, and URLs from
+    different hosts are interleaved.
+
+    Args:
+        urls: URLs to scrape.
+        parser: HTML parser backend.
+        delay: Minimum seconds between requests to the same host.
+        max_workers: Concurrent requests across all hosts.
+        respect_robots: Whether to check robots.txt.
+        cache: Optional HTTP and title cache shared by all requests
+            (robots.txt included).
+        stream: Parse pages incrementally while they download.
+        max_titles: Stop reading each page after this many titles
+            (implies `stream`).
+        metrics: Optional collector for per-page stage timings and counters.
+        manager: Session manager to fetch with, left open afterwards. By
+            default one is created for this call, with a connection pool of
+            `max_workers` per host, and closed when the iterator finishes.
+            A given manager's own `cache` and `metrics` decide HTTP caching
+            and connection timing; the arguments above still apply to the
+            title cache and page timings.
+
+    Yields:
+        `(url, titles)` pairs as pages complete, or `(url, exception)` for
+        pages that failed or were disallowed.
+    """
+    owned = manager is None
+    if owned:
+        manager = SessionManager(pool_maxsize=max_workers, cache=cache, metrics=metrics)
+    scheduler = CrawlScheduler(manager, HEADERS["User-Agent"], delay=delay, respect_robots=respect_robots)
+    scheduler.extend(urls)
+
+    def fetch(url: str) -> List[str]:
+        return fetch_titles(manager.session(), url, parser, cache, stream, max_titles, metrics)
+
+    try:
+        yield from scheduler.run(fetch, max_workers=max_workers)
+    finally:
+        if owned:
+            manager.close()
+
 def main():
     parser = argparse.ArgumentParser(description="Extract article titles from a URL")
-    parser.add_argument("url", help="URL to scrape")
+    parser.add_argument("urls", nargs="+", metavar="url", help="URL(s) to scrape")
     parser.add_argument("-v", "--verbose", action="store_true", help="Enable debug logging")
-    parser.add_argument("-o", "--output", help="Output file path (optional)")
+    parser.add_argument(
+        "-o", "--output",
+        help="Write records to this .jsonl, .csv, .sqlite3 or .parquet (directory) path instead of stdout",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000, help="Records buffered before an output write")
+    parser.add_argument("--flush-interval", type=float, default=5.0, help="Maximum seconds records wait before a write")
+    parser.add_argument("--no-dedupe", action="store_true", help="Keep titles already present in the output")
+    parser.add_argument("--parser", choices=PARSERS, default="html.parser", help="HTML parser backend")
+    parser.add_argument("--delay", type=float, default=1.0, help="Seconds between requests to the same host")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent requests across all hosts")
+    robots = parser.add_mutually_exclusive_group()
+    robots.add_argument(
+        "--respect-robots", dest="robots", action="store_true", default=None,
+        help="Check robots.txt (the default when scraping more than one URL)",
+    )
+    robots.add_argument("--ignore-robots", dest="robots", action="store_false", help="Do not check robots.txt")
+    parser.add_argument("--cache", metavar="PATH", help="On-disk HTTP cache (SQLite file) to reuse across runs")
+    parser.add_argument("--stream", action="store_true", help="Parse pages while they download (with lxml)")
+    parser.add_argument("--max-titles", type=int, help="Stop reading a page after this many titles (implies --stream)")
+    parser.add_argument("--metrics", action="store_true", help="Print per-stage timings and counters to stderr")
+    parser.add_argument("--prometheus", metavar="PATH", help="Write metrics in Prometheus text format to PATH")
     args = parser.parse_args()
 
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
 
-    titles = scrape_article_titles(args.url)
-    for title in titles:
-        print(title)
+    cache = HTTPCache(args.cache) if args.cache else None
+
+    stream = args.stream or args.max_titles is not None
+    metrics = CrawlMetrics() if args.metrics or args.prometheus else None
+
+    # A single URL is fetched directly, without robots.txt or the scheduler,
+    # unless asked for.
+    respect_robots = args.robots if args.robots is not None else len(args.urls) > 1
+
+    if len(args.urls) == 1 and not respect_robots and not args.output and metrics is None:
+        try:
+            if stream:
+                with SessionManager(cache=cache) as manager:
+                    for title in stream_titles(manager.session(), args.urls[0], args.max_titles):
+                        print(title, flush=True)
+                return
+            titles = scrape_article_titles(args.urls[0], parser=args.parser, cache=cache)
+        except (ValueError, requests.RequestException) as e:
+            logger.error("Failed to scrape %s: %s", args.urls[0], e)
+            sys.exit(1)
+        for title in titles:
+            print(title)
+        return
+
+    results = scrape_many(
+        args.urls,
+        parser=args.parser,
+        delay=args.delay,
+        max_workers=args.workers,
+        respect_robots=respect_robots,
+        cache=cache,
+        stream=stream,
+        max_titles=args.max_titles,
+        metrics=metrics,
+    )
+    failed = False
+    if args.output:
+        with open_sink(
+            args.output,
+            batch_size=args.batch_size,
+            flush_interval=args.flush_interval,
+            dedupe=not args.no_dedupe,
+        ) as sink:
+            for url, titles in results:
+                if isinstance(titles, Exception):
+                    logger.error("Failed to scrape %s: %s", url, titles)
+                    failed = True
+                sink.write_many(records_for(url, TITLE_CSS, titles))
+        logger.info("Wrote %d records to %s (%d duplicates skipped)", sink.written, args.output, sink.skipped)
+    else:
+        for url, titles in results:
+            if isinstance(titles, Exception):
+                logger.error("Failed to scrape %s: %s", url, titles)
+                failed = True
+                continue
+            for title in titles:
+                print(title)
+
+    if metrics is not None:
+        if args.metrics:
+            print(metrics.report(), file=sys.stderr)
+        if args.prometheus:
+            metrics.write_prometheus(args.prometheus)
+    if failed:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,363 @@
+"""Buffered output sinks for scraper results: JSONL, CSV, Parquet and SQLite."""
+
+import abc
+import csv
+import glob
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+import requests
+
+from scheduler import RobotsDisallowed
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("url", "selector", "title", "position", "fetched_at", "status")
+
+
+class TitleRecord(NamedTuple):
+    """One scraped title, or one failed page (with `title` and `position` set to None)."""
+
+    url: str
+    selector: str
+    title: Optional[str]
+    position: Optional[int]
+    fetched_at: str
+    status: str
+
+
+def result_status(result: Union[List[str], Exception]) -> str:
+    """Status of a scrape result: "ok", "robots_disallowed", "http_<code>" or "error"."""
+    if not isinstance(result, Exception):
+        return "ok"
+    if isinstance(result, RobotsDisallowed):
+        return "robots_disallowed"
+    if isinstance(result, requests.HTTPError) and result.response is not None:
+        return f"http_{result.response.status_code}"
+    return "error"
+
+
+def records_for(
+    url: str, selector: str, result: Union[List[str], Exception], fetched_at: Optional[str] = None
+) -> List[TitleRecord]:
+    """
+    Turn a `(url, titles | exception)` scrape result into records.
+
+    A page with titles gives one record per title (positions start at 1); a
+    failed page gives a single record carrying its status.
+    """
+    fetched_at = fetched_at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+    status = result_status(result)
+    if status != "ok":
+        return [TitleRecord(url, selector, None, None, fetched_at, status)]
+    return [TitleRecord(url, selector, title, i, fetched_at, status) for i, title in enumerate(result, start=1)]
+
+
+class Sink(abc.ABC):
+    """
+    Base class for buffered, append-only record sinks.
+
+    Records are buffered and written in batches once `batch_size` records are
+    waiting or `flush_interval` seconds have passed since the last write, and
+    on `flush`/`close`. A background thread writes records that have waited
+    `flush_interval`, so a slow crawl does not hold them back until its next
+    result. With `dedupe`, a title already present for the same URL and
+    selector, in this run or a previous one, is skipped; failure records are
+    always written. Sinks are thread-safe and context managers.
+    """
+
+    # Whether deduplication uses an in-memory set of keys; sinks that can
+    # enforce it in storage set this to False.
+    tracks_keys = True
+
+    def __init__(self, path: str, batch_size: int = 1000, flush_interval: float = 5.0, dedupe: bool = True):
+        """
+        Args:
+            path: Output file (or directory, for Parquet).
+            batch_size: Records buffered before a write.
+            flush_interval: Maximum seconds records wait in the buffer.
+            dedupe: Skip titles already written for the same URL and selector.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dedupe = dedupe
+        self.written = 0
+        self.skipped = 0
+        self._buffer: List[TitleRecord] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._seen: Set[Tuple[str, str, str]] = set()
+        self._open()
+        if dedupe and self.tracks_keys:
+            self._seen.update(self._existing_keys())
+        self._closed = threading.Event()
+        self._flusher = None
+        if flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_periodically, name=f"flush {path}", daemon=True)
+            self._flusher.start()
+
+    def __enter__(self) -> "Sink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(self, record: TitleRecord) -> None:
+        """Buffer one record."""
+        self.write_many([record])
+
+    def write_many(self, records: Iterable[TitleRecord]) -> None:
+        """Buffer several records, writing a batch if one is due."""
+        with self._lock:
+            for record in records:
+                if self.dedupe and self.tracks_keys and record.status == "ok":
+                    key = (record.url, record.selector, record.title)
+                    if key in self._seen:
+                        self.skipped += 1
+                        continue
+                    self._seen.add(key)
+                self._buffer.append(record)
+            if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """Write all buffered records."""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        """Flush and release the underlying file or database."""
+        with self._lock:
+            if self._closed.is_set():
+                return
+            self._closed.set()
+            self._flush_locked()
+            self._close()
+        if self._flusher is not None:
+            self._flusher.join()
+
+    def _flush_periodically(self) -> None:
+        timeout = self.flush_interval
+        while not self._closed.wait(timeout):
+            with self._lock:
+                if self._closed.is_set():
+                    return
+                due = self._last_flush + self.flush_interval - time.monotonic()
+                if due <= 0:
+                    try:
+                        self._flush_locked()
+                    except Exception:
+                        # The records stay buffered for the next attempt.
+                        logger.exception("Periodic flush to %s failed", self.path)
+                        self._last_flush = time.monotonic()
+                    due = self.flush_interval
+            timeout = due
+
+    def _flush_locked(self) -> None:
+        if self._buffer:
+            written = self._write_batch(self._buffer)
+            self.written += written
+            logger.debug("Wrote %d records to %s", written, self.path)
+            self._buffer = []
+        self._last_flush = time.monotonic()
+
+    @abc.abstractmethod
+    def _open(self) -> None:
+        """Open (or create) the output."""
+
+    @abc.abstractmethod
+    def _existing_keys(self) -> Iterable[Tuple[str, str, str]]:
+        """Yield `(url, selector, title)` of the "ok" records already stored."""
+
+    @abc.abstractmethod
+    def _write_batch(self, records: List[TitleRecord]) -> int:
+        """Write records and return how many were stored."""
+
+    @abc.abstractmethod
+    def _close(self) -> None:
+        """Release the output."""
+
+
+class JSONLSink(Sink):
+    """One JSON object per line, appended to `path`."""
+
+    def _open(self) -> None:
+        self._file = open(self.path, "a+", encoding="utf-8")
+
+    def _existing_keys(self) -> Iterable[Tuple[str, str, str]]:
+        self._file.seek(0)
+        for line in self._file:
+            if line.strip():
+                row = json.loads(line)
+                if row.get("status") == "ok":
+                    yield row["url"], row["selector"], row["title"]
+
+    def _write_batch(self, records: List[TitleRecord]) -> int:
+        self._file.write("".join(json.dumps(record._asdict(), ensure_ascii=False) + "\n" for record in records))
+        self._file.flush()
+        return len(records)
+
+    def _close(self) -> None:
+        self._file.close()
+
+
+class CSVSink(Sink):
+    """CSV with a header row, appended to `path`."""
+
+    def _open(self) -> None:
+        self._file = open(self.path, "a+", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        if self._file.tell() == 0:
+            self._writer.writerow(FIELDS)
+            self._file.flush()
+
+    def _existing_keys(self) -> Iterable[Tuple[str, str, str]]:
+        self._file.seek(0)
+        for row in csv.DictReader(self._file):
+            if row.get("status") == "ok":
+                yield row["url"], row["selector"], row["title"]
+
+    def _write_batch(self, records: List[TitleRecord]) -> int:
+        self._writer.writerows(records)
+        self._file.flush()
+        return len(records)
+
+    def _close(self) -> None:
+        self._file.close()
+
+
+class SQLiteSink(Sink):
+    """
+    Rows in the `titles` table of an SQLite database.
+
+    Duplicates are detected with an indexed lookup on `(url, selector, title)`
+    at insert time, so the database never has to be read back into memory.
+    """
+
+    tracks_keys = False
+
+    def _open(self) -> None:
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS titles (
+                url TEXT NOT NULL,
+                selector TEXT NOT NULL,
+                title TEXT,
+                position INTEGER,
+                fetched_at TEXT NOT NULL,
+                status TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS titles_key ON titles (url, selector, title);
+            """
+        )
+
+    def _existing_keys(self) -> Iterable[Tuple[str, str, str]]:
+        return ()  # not used: duplicates are skipped at insert time
+
+    def _write_batch(self, records: List[TitleRecord]) -> int:
+        columns = ", ".join(FIELDS)
+        placeholders = ", ".join("?" * len(FIELDS))
+        with self._db:
+            if not self.dedupe:
+                self._db.executemany(f"INSERT INTO titles ({columns}) VALUES ({placeholders})", records)
+                return len(records)
+            before = self._db.total_changes
+            self._db.executemany(
+                f"INSERT INTO titles ({columns}) SELECT {placeholders} WHERE ? != 'ok' OR NOT EXISTS "
+                "(SELECT 1 FROM titles WHERE url = ? AND selector = ? AND title = ? AND status = 'ok')",
+                [(*record, record.status, record.url, record.selector, record.title) for record in records],
+            )
+            written = self._db.total_changes - before
+        self.skipped += len(records) - written
+        return written
+
+    def _close(self) -> None:
+        self._db.close()
+
+
+class ParquetSink(Sink):
+    """
+    Parquet files in the directory `path`, one file per run.
+
+    Each flush appends a row group to this run's file, so earlier runs' files
+    are never rewritten. Requires the optional pyarrow package.
+    """
+
+    def _open(self) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output requires the pyarrow package") from None
+        self._pa = pa
+        self._pq = pq
+        self._schema = pa.schema(
+            [
+                ("url", pa.string()),
+                ("selector", pa.string()),
+                ("title", pa.string()),
+                ("position", pa.int32()),
+                ("fetched_at", pa.string()),
+                ("status", pa.string()),
+            ]
+        )
+        os.makedirs(self.path, exist_ok=True)
+        self._existing = sorted(glob.glob(os.path.join(self.path, "*.parquet")))
+        name = datetime.now(timezone.utc).strftime("run-%Y%m%dT%H%M%S%fZ.parquet")
+        self._file_path = os.path.join(self.path, name)
+        self._writer = None
+
+    def _existing_keys(self) -> Iterable[Tuple[str, str, str]]:
+        for file_path in self._existing:
+            table = self._pq.read_table(file_path, columns=["url", "selector", "title", "status"])
+            for url, selector, title, status in zip(*(table.column(name).to_pylist() for name in table.column_names)):
+                if status == "ok":
+                    yield url, selector, title
+
+    def _write_batch(self, records: List[TitleRecord]) -> int:
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self._file_path, self._schema)
+        arrays = [self._pa.array(values, type=field.type) for values, field in zip(zip(*records), self._schema)]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+        return len(records)
+
+    def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+SINKS = {
+    ".jsonl": JSONLSink,
+    ".ndjson": JSONLSink,
+    ".csv": CSVSink,
+    ".parquet": ParquetSink,
+    ".db": SQLiteSink,
+    ".sqlite": SQLiteSink,
+    ".sqlite3": SQLiteSink,
+}
+
+
+def open_sink(path: str, **kwargs) -> Sink:
+    """
+    Open the sink matching the extension of `path`.
+
+    Args:
+        path: Output path ending in .jsonl/.ndjson, .csv, .parquet (a
+            directory of per-run files) or .db/.sqlite/.sqlite3.
+        **kwargs: Passed to the sink (`batch_size`, `flush_interval`, `dedupe`).
+
+    Raises:
+        ValueError: If the extension is not recognised.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SINKS:
+        raise ValueError(f"Unknown output format {extension!r}; expected one of {', '.join(SINKS)}")
+    return SINKS[extension](path, **kwargs)
@@ -0,0 +1,56 @@
+"""Shared fixtures: a local HTTP server with canned pages."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class PageServer:
+    """Serve canned responses on localhost and record the requests made.
+
+    `pages` maps a path to `(status, headers, body)`, or to a callable taking
+    the request handler and returning one. Connections are kept alive;
+    `connections` holds the client address of each one opened.
+    """
+
+    def __init__(self):
+        self.pages = {}
+        self.requests = []
+        self.connections = set()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server.connections.add(self.client_address)
+                server.requests.append((self.path, dict(self.headers)))
+                page = server.pages.get(self.path, (404, {}, b"not found"))
+                status, headers, body = page(self) if callable(page) else page
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, args=(0.01,), daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    """Start a `PageServer` for one test."""
+    s = PageServer()
+    yield s
+    s.close()
@@ -0,0 +1,63 @@
+"""Tests for the synthetic site and scenario runner of `bench`."""
+
+import requests
+
+from bench import SyntheticSite, available_parsers, format_results, run_benchmark, run_scenario
+from metrics import STAGES
+from scraper2 import extract_titles
+
+
+def test_site_serves_pages_of_the_requested_size():
+    with SyntheticSite(titles=5, page_kb=20) as site:
+        response = requests.get(f"{site.url}/page/3")
+
+    assert response.status_code == 200
+    assert abs(len(response.content) - 20 * 1024) < 1024
+    assert extract_titles(response.content) == [f"Synthetic story 3-{i}" for i in range(5)]
+
+
+def test_site_answers_conditional_requests_and_unknown_paths():
+    with SyntheticSite(titles=1, page_kb=1) as site:
+        etag = requests.get(f"{site.url}/page/0").headers["ETag"]
+        revalidated = requests.get(f"{site.url}/page/0", headers={"If-None-Match": etag})
+        missing = requests.get(f"{site.url}/nope")
+        served = site.requests_served
+
+    assert (revalidated.status_code, revalidated.content) == (304, b"")
+    assert missing.status_code == 404
+    assert served == 3
+
+
+def test_run_scenario_reports_counts_and_stage_medians():
+    with SyntheticSite(titles=3, page_kb=2) as site:
+        result = run_scenario(site, pages=4, parser=available_parsers()[0], workers=2)
+
+    assert (result["pages"], result["errors"], result["requests"], result["cache_hits"]) == (4, 0, 4, 0)
+    assert 1 <= result["connections"] <= 2
+    assert set(result["p50"]) == set(STAGES)
+    assert result["pages_per_second"] > 0
+
+
+def test_warm_cache_scenario_revalidates_every_page():
+    with SyntheticSite(titles=3, page_kb=2) as site:
+        results = run_benchmark(site, pages=3, parsers=["html.parser"], workers=[1], with_stream=False)
+
+    assert list(results) == ["html.parser w1", "html.parser w1 warm-cache"]
+    warm = results["html.parser w1 warm-cache"]
+    assert (warm["requests"], warm["cache_hits"], warm["errors"]) == (3, 3, 0)
+
+
+def test_format_results_has_a_row_per_scenario():
+    result = {
+        "pages": 10, "errors": 0, "requests": 10, "wall_seconds": 2.0, "pages_per_second": 5.0,
+        "cache_hits": 0, "connections": 1, "p50": dict.fromkeys(STAGES, 0.0125),
+    }
+
+    lines = format_results({"lxml w1": result}).splitlines()
+
+    assert lines[0].split()[:2] == ["scenario", "pages/s"]
+    assert lines[1].split() == ["lxml", "w1", "5.0", "2.00", "10", "1", "0"] + ["12.5"] * len(STAGES)
+
+
+def test_available_parsers_always_includes_html_parser():
+    assert "html.parser" in available_parsers()
@@ -0,0 +1,179 @@
+"""Tests for `CrawlMetrics`, timed connection pools and the Prometheus export."""
+
+import re
+from types import SimpleNamespace
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import STAGES, CrawlMetrics, PageTiming, instrument_adapter
+
+BUCKETS = (0.1, 0.5, 1.0)
+
+
+def timing(status=200, **stages):
+    page = PageTiming("http://example.com/")
+    page.status = status
+    for stage, seconds in stages.items():
+        page.add(stage, seconds)
+    return page
+
+
+def test_record_counts_pages_statuses_and_errors():
+    metrics = CrawlMetrics(BUCKETS)
+    ok = timing(200)
+    ok.bytes_received, ok.retries, ok.titles, ok.connections, ok.from_cache = 100, 2, 30, 1, True
+    metrics.record(ok)
+    metrics.record(timing(404))
+    failed = timing(None)
+    failed.error = "ConnectionError"
+    metrics.record(failed)
+
+    summary = metrics.summary()
+
+    assert {name: summary[name] for name in ("pages", "errors", "retries", "bytes", "cache_hits", "titles", "connections")} == {
+        "pages": 3, "errors": 2, "retries": 2, "bytes": 100, "cache_hits": 1, "titles": 30, "connections": 1,
+    }
+    assert summary["statuses"] == {"200": 1, "404": 1, "ConnectionError": 1}
+
+
+def test_connection_stages_are_only_observed_for_new_connections():
+    metrics = CrawlMetrics(BUCKETS)
+    metrics.record(timing(connect=0.2, tls=0.3, ttfb=0.05))
+    metrics.record(timing(ttfb=0.05))
+
+    stages = metrics.summary()["stages"]
+
+    assert (stages["connect"]["count"], stages["tls"]["count"], stages["ttfb"]["count"]) == (1, 1, 2)
+    assert stages["connect"]["mean"] == pytest.approx(0.2)
+    assert stages["ttfb"]["total"] == pytest.approx(0.1)
+
+
+def test_quantiles_are_bucket_upper_bounds_capped_at_the_max():
+    metrics = CrawlMetrics(BUCKETS)
+    for seconds in (0.05, 0.05, 0.05, 0.05, 0.1, 0.3, 0.3, 0.3, 0.7, 3.0):
+        metrics.record(timing(parse=seconds))
+
+    parse = metrics.summary()["stages"]["parse"]
+
+    # A value equal to a bound falls in that bucket, as with Prometheus' `le`.
+    assert (parse["p50"], parse["p90"], parse["p99"], parse["max"]) == (0.1, 1.0, 3.0, 3.0)
+    assert parse["mean"] == pytest.approx(0.49)
+
+
+def test_empty_summary_has_zeroed_stages():
+    stages = CrawlMetrics(BUCKETS).summary()["stages"]
+
+    assert list(stages) == list(STAGES)
+    assert stages["ttfb"] == {"count": 0, "total": 0.0, "mean": 0.0, "p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+
+
+def test_page_records_exceptions_and_reraises():
+    metrics = CrawlMetrics(BUCKETS)
+
+    with pytest.raises(ValueError):
+        with metrics.page("http://example.com/") as page:
+            page.add("parse", 0.01)
+            raise ValueError("bad markup")
+
+    summary = metrics.summary()
+    assert (summary["pages"], summary["errors"], summary["statuses"]) == (1, 1, {"ValueError": 1})
+    assert summary["stages"]["parse"]["count"] == 1
+
+
+def test_reset_forgets_everything():
+    metrics = CrawlMetrics(BUCKETS)
+    metrics.record(timing(parse=0.2))
+
+    metrics.reset()
+
+    summary = metrics.summary()
+    assert (summary["pages"], summary["statuses"], summary["stages"]["parse"]["count"]) == (0, {}, 0)
+
+
+def test_headers_received_splits_off_connection_time():
+    page = timing(connect=0.1, tls=0.2)
+    response = SimpleNamespace(status_code=200, from_cache=True, raw=SimpleNamespace(retries=SimpleNamespace(history=(1, 2))))
+
+    page.headers_received(response, 0.5)
+    page.body_received(1024, 0.25)
+
+    assert (page.status, page.from_cache, page.retries, page.bytes_received) == (200, True, 2, 1024)
+    assert page.stages["ttfb"] == pytest.approx(0.2)
+    assert page.stages["download"] == 0.25
+
+
+def test_prometheus_exposition():
+    metrics = CrawlMetrics(BUCKETS)
+    for seconds in (0.05, 0.5, 2.0):
+        metrics.record(timing(parse=seconds))
+    metrics.record(timing(503))
+
+    text = metrics.prometheus(prefix="crawl")
+
+    assert text.endswith("\n")
+    lines = text.splitlines()
+    assert lines[:2] == [
+        "# HELP crawl_stage_seconds Time spent per page in each crawl stage.",
+        "# TYPE crawl_stage_seconds histogram",
+    ]
+    # Buckets are cumulative and end with +Inf, which equals the count.
+    assert [line for line in lines if 'stage="parse"' in line] == [
+        'crawl_stage_seconds_bucket{stage="parse",le="0.1"} 2',
+        'crawl_stage_seconds_bucket{stage="parse",le="0.5"} 3',
+        'crawl_stage_seconds_bucket{stage="parse",le="1.0"} 3',
+        'crawl_stage_seconds_bucket{stage="parse",le="+Inf"} 4',
+        'crawl_stage_seconds_sum{stage="parse"} 2.55',
+        'crawl_stage_seconds_count{stage="parse"} 4',
+    ]
+    assert 'crawl_pages_total{status="200"} 3' in lines
+    assert 'crawl_pages_total{status="503"} 1' in lines
+    assert lines[lines.index("# TYPE crawl_retries_total counter") + 1] == "crawl_retries_total 0"
+    # Every sample line is `name{labels} value`, and every metric has HELP and TYPE.
+    sample = re.compile(r'^[a-z_]+(\{[a-z]+="[^"]*"(,[a-z]+="[^"]*")*\})? \S+$')
+    assert all(sample.match(line) for line in lines if not line.startswith("#"))
+    names = {line.split()[2] for line in lines if line.startswith("# TYPE")}
+    assert names == {line.split()[2] for line in lines if line.startswith("# HELP")}
+    assert {re.split(r"[{ ]", line)[0] for line in lines if not line.startswith("#")} <= {
+        f"{name}{suffix}" for name in names for suffix in ("", "_bucket", "_sum", "_count")
+    }
+
+
+def test_write_prometheus(tmp_path):
+    metrics = CrawlMetrics(BUCKETS)
+    path = tmp_path / "scraper.prom"
+
+    metrics.write_prometheus(str(path))
+
+    assert path.read_text(encoding="utf-8") == metrics.prometheus()
+
+
+def test_instrumented_adapter_times_new_connections_only(server):
+    server.pages["/"] = (200, {}, b"ok")
+    metrics = CrawlMetrics(BUCKETS)
+    session = requests.Session()
+    session.mount("http://", instrument_adapter(HTTPAdapter()))
+
+    for _ in range(2):
+        with metrics.page(server.url) as page:
+            page.headers_received(session.get(f"{server.url}/"), 0.0)
+    session.close()
+
+    summary = metrics.summary()
+    assert summary["connections"] == 1
+    assert summary["stages"]["connect"]["count"] == 1
+    assert summary["stages"]["tls"]["count"] == 0
+    assert summary["statuses"] == {"200": 2}
+
+
+def test_connections_outside_a_page_are_not_recorded(server):
+    server.pages["/"] = (200, {}, b"ok")
+    metrics = CrawlMetrics(BUCKETS)
+    session = requests.Session()
+    session.mount("http://", instrument_adapter(HTTPAdapter()))
+
+    assert session.get(f"{server.url}/").status_code == 200
+    session.close()
+
+    assert metrics.summary()["pages"] == 0
@@ -0,0 +1,156 @@
+"""Tests for `scheduler`: token buckets, robots.txt and 429/503 handling."""
+
+import time
+from email.utils import formatdate
+
+import pytest
+import requests
+
+from scheduler import CrawlScheduler, RobotsDisallowed, TokenBucket, _retry_after, _RobotsParser
+
+AGENT = "TestBot/1.0"
+
+
+def http_error(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+class Fetcher:
+    """`fetch` function recording call times and raising queued errors first."""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.calls = []
+
+    def __call__(self, url):
+        self.calls.append((url, time.monotonic()))
+        if self.errors:
+            raise self.errors.pop(0)
+        return url
+
+
+def gaps(calls):
+    return [later - earlier for (_, earlier), (_, later) in zip(calls, calls[1:])]
+
+
+def test_token_bucket_rate_burst_and_pause():
+    bucket = TokenBucket(rate=2.0, capacity=2.0)
+    start = bucket.updated
+
+    assert bucket.wait_time(start) == 0
+    bucket.consume(start)
+    bucket.consume(start)
+    assert bucket.wait_time(start) == pytest.approx(0.5)
+    assert bucket.wait_time(start + 0.5) == 0
+    assert bucket.wait_time(start + 10) == 0
+    assert bucket.tokens == 2.0  # refills never exceed the burst capacity
+
+    bucket.pause(3.0, start + 10)
+    assert bucket.wait_time(start + 10) == pytest.approx(3.0)
+
+
+def test_same_host_is_rate_limited_and_hosts_interleave():
+    fetch = Fetcher()
+    scheduler = CrawlScheduler(requests.Session(), AGENT, delay=0.1, respect_robots=False)
+    scheduler.extend(["http://a/1", "http://a/2", "http://a/3", "http://b/1"])
+
+    results = dict(scheduler.run(fetch, max_workers=1))
+
+    assert set(results) == {"http://a/1", "http://a/2", "http://a/3", "http://b/1"}
+    assert [url for url, _ in fetch.calls][:2] == ["http://a/1", "http://b/1"]
+    host_a = [call for call in fetch.calls if call[0].startswith("http://a/")]
+    assert all(gap >= 0.09 for gap in gaps(host_a))
+
+
+def test_crawl_delay_and_disallow_from_robots(server):
+    server.pages["/robots.txt"] = (
+        200, {"Content-Type": "text/plain"}, b"User-agent: *\nCrawl-delay: 0.3\nDisallow: /private\n"
+    )
+    fetch = Fetcher()
+    scheduler = CrawlScheduler(requests.Session(), AGENT, delay=0.01)
+    scheduler.extend([f"{server.url}/1", f"{server.url}/2", f"{server.url}/private", f"{server.url}/3"])
+
+    results = dict(scheduler.run(fetch, max_workers=4))
+
+    assert isinstance(results[f"{server.url}/private"], RobotsDisallowed)
+    assert len(fetch.calls) == 3
+    assert all(gap >= 0.29 for gap in gaps(fetch.calls))
+    assert [path for path, _ in server.requests].count("/robots.txt") == 1
+
+
+def test_missing_robots_allows_and_unreachable_robots_disallows(server):
+    server.pages["/robots.txt"] = (503, {}, b"")
+    fetch = Fetcher()
+    scheduler = CrawlScheduler(requests.Session(), AGENT, delay=0)
+    scheduler.add(f"{server.url}/page")
+
+    assert isinstance(dict(scheduler.run(fetch))[f"{server.url}/page"], RobotsDisallowed)
+
+    server.pages["/robots.txt"] = (404, {}, b"")
+    scheduler = CrawlScheduler(requests.Session(), AGENT, delay=0)
+    scheduler.add(f"{server.url}/page")
+
+    assert dict(scheduler.run(fetch)) == {f"{server.url}/page": f"{server.url}/page"}
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_throttled_url_is_requeued_after_retry_after(status):
+    fetch = Fetcher([http_error(status, {"Retry-After": "0.3"})])
+    scheduler = CrawlScheduler(requests.Session(), AGENT, delay=0.01, respect_robots=False)
+    scheduler.add("http://a/1")
+
+    results = list(scheduler.run(fetch))
+
+    assert results == [("http://a/1", "http://a/1")]
+    assert len(fetch.calls) == 2
+    assert gaps(fetch.calls)[0] >= 0.29
+
+
+def test_throttled_url_fails_after_max_requeues():
+    errors = [http_error(429, {"Retry-After": "0"}) for _ in range(3)]
+    fetch = Fetcher(errors)
+    scheduler = CrawlScheduler(requests.Session(), AGENT, delay=0.01, respect_robots=False, max_requeues=2)
+    scheduler.add("http://a/1")
+
+    [(url, result)] = list(scheduler.run(fetch))
+
+    assert result is errors[2]
+    assert len(fetch.calls) == 3
+
+
+def test_other_http_errors_are_not_requeued():
+    error = http_error(404)
+    fetch = Fetcher([error])
+    scheduler = CrawlScheduler(requests.Session(), AGENT, delay=0.01, respect_robots=False)
+    scheduler.add("http://a/1")
+
+    assert list(scheduler.run(fetch)) == [("http://a/1", error)]
+
+
+def test_retry_after_parsing():
+    def response(value):
+        return http_error(429, {"Retry-After": value} if value is not None else {}).response
+
+    assert _retry_after(response("12")) == 12.0
+    assert _retry_after(response("-5")) == 0.0
+    assert _retry_after(response(None)) is None
+    assert _retry_after(response("soon")) is None
+    assert 50 < _retry_after(response(formatdate(time.time() + 60, usegmt=True))) <= 60
+
+
+def test_fractional_and_per_agent_crawl_delays():
+    parser = _RobotsParser("http://a/robots.txt")
+    parser.parse([
+        "User-agent: TestBot",
+        "Crawl-delay: 2.5  # seconds",
+        "",
+        "User-agent: *",
+        "Crawl-delay: 7",
+        "Disallow: /x",
+    ])
+
+    assert parser.crawl_delay(AGENT) == 2.5
+    assert parser.crawl_delay("OtherBot") == 7
@@ -0,0 +1,134 @@
+"""Tests for the `scraper2` command line and session handling."""
+
+import sys
+import threading
+
+import pytest
+
+import scraper2
+
+PAGE = b'<span class="titleline"><a href="/1">First</a></span><span class="titleline"><a href="/2">Second</a></span>'
+
+
+def run_main(monkeypatch, *args):
+    """Run `scraper2.main` with `args`; return its exit status."""
+    monkeypatch.setattr(sys, "argv", ["scraper2.py", *args])
+    try:
+        scraper2.main()
+    except SystemExit as e:
+        return e.code
+    return 0
+
+
+def test_single_url_skips_robots_and_scheduler(server, monkeypatch, capsys):
+    """One URL should be fetched directly, without a robots.txt request."""
+    server.pages["/"] = (200, {"Content-Type": "text/html"}, PAGE)
+
+    assert run_main(monkeypatch, f"{server.url}/") == 0
+
+    assert capsys.readouterr().out.splitlines() == ["First", "Second"]
+    assert [path for path, _ in server.requests] == ["/"]
+
+
+def test_single_url_respects_robots_when_asked(server, monkeypatch):
+    """--respect-robots should check robots.txt for a single URL too."""
+    server.pages["/robots.txt"] = (200, {"Content-Type": "text/plain"}, b"User-agent: *\nDisallow: /\n")
+    server.pages["/"] = (200, {"Content-Type": "text/html"}, PAGE)
+
+    assert run_main(monkeypatch, "--respect-robots", f"{server.url}/") == 1
+
+    assert [path for path, _ in server.requests] == ["/robots.txt"]
+
+
+def test_single_url_failure_exits_non_zero(server, monkeypatch):
+    server.pages["/missing"] = (404, {}, b"")
+
+    assert run_main(monkeypatch, f"{server.url}/missing") == 1
+
+
+def test_batch_exits_non_zero_when_any_url_fails(server, monkeypatch, capsys):
+    """A batch should print what it could fetch and still report the failure."""
+    server.pages["/"] = (200, {"Content-Type": "text/html"}, PAGE)
+    server.pages["/missing"] = (404, {}, b"")
+
+    assert run_main(monkeypatch, "--delay", "0", f"{server.url}/", f"{server.url}/missing") == 1
+
+    assert capsys.readouterr().out.splitlines() == ["First", "Second"]
+    assert "/robots.txt" in [path for path, _ in server.requests]
+
+
+def test_session_manager_gives_each_thread_its_own_session():
+    with scraper2.SessionManager() as manager:
+        sessions = {}
+
+        def grab(name):
+            sessions[name] = (manager.session(), manager.session())
+
+        threads = [threading.Thread(target=grab, args=(i,)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert all(first is second for first, second in sessions.values())
+        assert len({id(first) for first, _ in sessions.values()}) == 3
+        adapters = {id(session.get_adapter("http://x/")) for session, _ in sessions.values()}
+        assert len(adapters) == 1
+
+
+def test_session_manager_reuses_connections(server):
+    server.pages["/"] = (200, {"Content-Type": "text/html"}, PAGE)
+    with scraper2.SessionManager() as manager:
+        for _ in range(3):
+            assert scraper2.scrape_article_titles(f"{server.url}/", manager=manager) == ["First", "Second"]
+
+    assert len(server.requests) == 3
+    assert len(server.connections) == 1
+
+
+def test_closed_session_manager_refuses_new_sessions():
+    manager = scraper2.SessionManager()
+    manager.session()
+    manager.close()
+
+    errors = []
+
+    def new_session():
+        try:
+            manager.session()
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=new_session)
+    thread.start()
+    thread.join()
+
+    assert len(errors) == 1
+    assert all(not adapter.poolmanager.pools for adapter in manager._adapters)
+
+
+def test_scrape_many_with_a_shared_manager_leaves_it_open(server):
+    server.pages["/"] = (200, {"Content-Type": "text/html"}, PAGE)
+    with scraper2.SessionManager() as manager:
+        results = dict(scraper2.scrape_many([f"{server.url}/"], delay=0, respect_robots=False, manager=manager))
+        assert results == {f"{server.url}/": ["First", "Second"]}
+
+        assert scraper2.scrape_article_titles(f"{server.url}/", manager=manager) == ["First", "Second"]
+
+
+def test_scrape_many_requeues_a_503_through_the_scheduler(server, monkeypatch):
+    """A 503 should reach the scheduler, which pauses the host and requeues the URL."""
+    responses = [(503, {"Retry-After": "0"}, b""), (200, {"Content-Type": "text/html"}, PAGE)]
+    server.pages["/"] = lambda handler: responses.pop(0)
+    pauses = []
+    slow_down = scraper2.CrawlScheduler.slow_down
+    monkeypatch.setattr(
+        scraper2.CrawlScheduler, "slow_down", lambda self, url, seconds: (pauses.append(url), slow_down(self, url, seconds))
+    )
+
+    with scraper2.SessionManager() as manager:
+        results = dict(scraper2.scrape_many([f"{server.url}/"], delay=0, respect_robots=False, manager=manager))
+
+    assert results == {f"{server.url}/": ["First", "Second"]}
+    assert len(server.requests) == 2
+    assert pauses == [f"{server.url}/"]
@@ -0,0 +1,127 @@
+"""Tests for `sinks`: batching, periodic flushes and dedupe across runs."""
+
+import csv
+import json
+import sqlite3
+import time
+
+import pytest
+import requests
+
+from scheduler import RobotsDisallowed
+from sinks import Sink, SQLiteSink, open_sink, records_for
+
+FETCHED_AT = "2026-01-01T00:00:00+00:00"
+
+
+def first_run(sink):
+    sink.write_many(records_for("http://a/", "h2", ["One", "Two"], FETCHED_AT))
+    sink.write_many(records_for("http://b/", "h2", RobotsDisallowed("no"), FETCHED_AT))
+
+
+def second_run(sink):
+    sink.write_many(records_for("http://a/", "h2", ["Two", "Three"], FETCHED_AT))
+    sink.write_many(records_for("http://a/", "h1", ["One"], FETCHED_AT))
+    sink.write_many(records_for("http://b/", "h2", RobotsDisallowed("no"), FETCHED_AT))
+
+
+def read_titles(path):
+    """`(url, selector, title, status)` of every stored record."""
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+    elif path.endswith(".csv"):
+        with open(path, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        for row in rows:
+            row["title"] = row["title"] or None
+    elif path.endswith(".sqlite3"):
+        with sqlite3.connect(path) as db:
+            db.row_factory = sqlite3.Row
+            rows = [dict(row) for row in db.execute("SELECT * FROM titles ORDER BY rowid")]
+    else:
+        pq = pytest.importorskip("pyarrow.parquet")
+        rows = pq.read_table(path).to_pylist()
+    return sorted((row["url"], row["selector"], row["title"] or "", row["status"]) for row in rows)
+
+
+@pytest.mark.parametrize("name", ["out.jsonl", "out.csv", "out.sqlite3", "out.parquet"])
+def test_dedupe_across_runs(tmp_path, name):
+    """A title written by an earlier run is skipped; failures are always recorded."""
+    if name.endswith(".parquet"):
+        pytest.importorskip("pyarrow")
+    path = str(tmp_path / name)
+
+    with open_sink(path) as sink:
+        first_run(sink)
+    assert (sink.written, sink.skipped) == (3, 0)
+
+    with open_sink(path) as sink:
+        second_run(sink)
+    assert (sink.written, sink.skipped) == (3, 1)
+
+    assert read_titles(path) == [
+        ("http://a/", "h1", "One", "ok"),
+        ("http://a/", "h2", "One", "ok"),
+        ("http://a/", "h2", "Three", "ok"),
+        ("http://a/", "h2", "Two", "ok"),
+        ("http://b/", "h2", "", "robots_disallowed"),
+        ("http://b/", "h2", "", "robots_disallowed"),
+    ]
+
+
+def test_no_dedupe_keeps_repeats(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    for _ in range(2):
+        with open_sink(path, dedupe=False) as sink:
+            first_run(sink)
+
+    assert len(read_titles(path)) == 6
+
+
+def test_records_are_buffered_until_a_batch_is_full(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    with open_sink(path, batch_size=3, flush_interval=60) as sink:
+        sink.write_many(records_for("http://a/", "h2", ["1", "2"], FETCHED_AT))
+        assert read_titles(path) == []
+        sink.write_many(records_for("http://a/", "h2", ["3"], FETCHED_AT))
+        assert len(read_titles(path)) == 3
+
+
+def test_buffered_records_are_flushed_on_a_timer(tmp_path):
+    """Records should not wait for the next write once `flush_interval` has passed."""
+    path = str(tmp_path / "out.jsonl")
+    with open_sink(path, batch_size=1000, flush_interval=0.1) as sink:
+        sink.write_many(records_for("http://a/", "h2", ["Lonely"], FETCHED_AT))
+        deadline = time.monotonic() + 2
+        while not read_titles(path) and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+        assert read_titles(path) == [("http://a/", "h2", "Lonely", "ok")]
+    assert not sink._flusher.is_alive()
+
+
+def test_failure_status_names():
+    response = requests.Response()
+    response.status_code = 503
+
+    assert records_for("http://a/", "h2", requests.HTTPError(response=response), FETCHED_AT)[0].status == "http_503"
+    assert records_for("http://a/", "h2", ValueError("bad"), FETCHED_AT)[0].status == "error"
+    assert records_for("http://a/", "h2", [], FETCHED_AT) == []
+
+
+def test_sink_subclasses_must_implement_the_storage_methods(tmp_path):
+    class Incomplete(Sink):
+        def _open(self):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete(str(tmp_path / "x"))
+    with pytest.raises(TypeError):
+        Sink(str(tmp_path / "x"))
+    SQLiteSink(str(tmp_path / "x.sqlite3")).close()
+
+
+def test_unknown_extension():
+    with pytest.raises(ValueError):
+        open_sink("out.txt")
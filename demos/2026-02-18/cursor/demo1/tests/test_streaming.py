@@ -0,0 +1,70 @@
+"""Tests for incremental title parsing: `iter_article_titles` and `stream_titles`."""
+
+import pytest
+import requests
+
+import scraper2
+from scraper2 import extract_titles, iter_article_titles, stream_titles
+
+PAGE = (
+    "<html><body><table>"
+    + "".join(f'<tr><td><span class="titleline"><a href="/{i}">Story <i>{i}</i></a></span></td></tr>' for i in range(20))
+    + "</table></body></html>"
+).encode()
+
+
+def pieces(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class Chunks:
+    """An iterable of chunks that counts how many were read."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.read = 0
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+
+@pytest.mark.parametrize("size", [1, 7, 64, len(PAGE)])
+def test_titles_split_across_chunks(size):
+    assert list(iter_article_titles(pieces(PAGE, size))) == extract_titles(PAGE.decode())
+
+
+def test_stops_reading_at_max_titles():
+    chunks = Chunks(pieces(PAGE, 64))
+
+    assert list(iter_article_titles(chunks, max_titles=2)) == ["Story0", "Story1"]
+    assert chunks.read < len(chunks.chunks) / 4
+    assert list(iter_article_titles(pieces(PAGE, 64), max_titles=0)) == []
+
+
+def test_only_links_directly_in_a_titleline_match():
+    page = b'<span class="titleline"><b><a>Nested</a></b></span><span class="other"><a>Other</a></span>'
+
+    assert list(iter_article_titles(pieces(page, 3))) == []
+
+
+def test_without_lxml_the_whole_page_is_parsed(monkeypatch):
+    monkeypatch.setattr(scraper2, "etree", None)
+    chunks = Chunks(pieces(PAGE, 64))
+
+    assert list(iter_article_titles(chunks, max_titles=3)) == ["Story0", "Story1", "Story2"]
+    assert chunks.read == len(chunks.chunks)
+    page = '<span class="titleline"><a>Заголовок</a></span>'.encode("koi8-r")
+    assert list(iter_article_titles([page], encoding="koi8-r")) == ["Заголовок"]
+
+
+@pytest.mark.parametrize("lxml", [True, False])
+def test_stream_titles_uses_the_header_charset(server, monkeypatch, lxml):
+    if not lxml:
+        monkeypatch.setattr(scraper2, "etree", None)
+    body = '<span class="titleline"><a>Новости</a></span>'.encode("windows-1251")
+    server.pages["/ru"] = (200, {"Content-Type": "text/html; charset=windows-1251"}, body)
+
+    with requests.Session() as session:
+        assert list(stream_titles(session, f"{server.url}/ru", chunk_size=3)) == ["Новости"]
@@ -1,63 +1,231 @@
 """Flask REST API for User management."""
 
-from flask import Flask, request, render_template, redirect
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import orjson
+from flask import Flask, Response, request, render_template, redirect, make_response, stream_with_context
 from flask_restful import Api, Resource
 from flask_cors import CORS
+from sqlalchemy import event, inspect, select, text
+from werkzeug.http import quote_etag
 
 from config import Config
+from database import RoutingSession, configure_engines
+from bulk import create_users, delete_users, iter_ndjson, update_users
+from cache import create_cache, make_entry, user_version_key
+from changes import (
+    ChangeNotifier,
+    change_feed_supported,
+    changes_head,
+    decode_change_token,
+    encode_change_token,
+    install_change_log,
+    read_changes,
+)
+from export import FORMATS, gzip_chunks, iter_export
 from models import db, User
+from pagination import InvalidCursor, estimate_count, install_timestamp_normalization, keyset_paginate
+from profiling import create_profiler, init_profiling
 from schemas import UserSchema, UserCreateSchema, UserUpdateSchema
+from search import ORDERS, install_search, search_supported, search_user_ids
+from serializers import USER_COLUMNS, dump_user, dump_users
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
 # Initialize extensions
 db.init_app(app)
+configure_engines(app, db)
 CORS(app)
 api = Api(app)
+profiler = create_profiler(Config)
+if profiler is not None:
+    init_profiling(app, db, profiler)
+
+
+@api.representation("application/json")
+def output_json(data, code, headers=None):
+    """Encode API responses with orjson (UTF-8, like ensure_ascii=False)."""
+    response = make_response(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS), code)
+    response.headers.extend(headers or {})
+    response.mimetype = "application/json"
+    return response
+
 
 # Schemas
 user_schema = UserSchema()
 user_create_schema = UserCreateSchema()
 user_update_schema = UserUpdateSchema()
 
+# Cache of serialized user payloads and list pages
+cache = create_cache(Config.CACHE_URL, Config.CACHE_MAX_ENTRIES, Config.CACHE_TTL)
+# Bumped on every write; list page keys include it, so one increment
+# invalidates every cached page.
+LIST_VERSION_KEY = "users:list:version"
+
+# Wakes long-polling change feed requests on every commit in this process
+change_notifier = ChangeNotifier()
+event.listen(RoutingSession, "after_commit", change_notifier.notify)
+
 
 def make_error_response(message, status_code):
     """Return a JSON error response."""
     return {"error": message}, status_code
 
 
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/jsonl")
+
+
+def read_bulk_items():
+    """Return the items of a JSON array body, or a lazy iterator over an NDJSON body.
+
+    Returns None if the body is neither.
+    """
+    if request.mimetype in NDJSON_MIMETYPES:
+        return iter_ndjson(request.stream)
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        return None
+    return data
+
+
+def invalidate_users(*user_ids):
+    """Retire the cached payloads of the given users and every cached list page."""
+    cache.incr_many([*(user_version_key(user_id) for user_id in user_ids), LIST_VERSION_KEY])
+
+
+def load_user_entry(user_id):
+    """Return the cache entry for a user's payload, or None if there is no such user."""
+    version = cache.counter(user_version_key(user_id))
+    key = f"user:{user_id}:{version}"
+    entry = cache.get(key)
+    if entry is None:
+        user = db.session.execute(select(*USER_COLUMNS).where(User.id == user_id)).first()
+        if not user:
+            return None
+        entry = make_entry(dump_user(user))
+        cache.set(key, entry)
+    return entry
+
+
+def load_users_page_entry(cursor, per_page, count=None):
+    """Return the cache entry for a list page.
+
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded.
+    """
+    version = cache.counter(LIST_VERSION_KEY)
+    key = f"users:list:{version}:{per_page}:{count or ''}:{cursor or ''}"
+    entry = cache.get(key)
+    if entry is not None:
+        return entry
+
+    # Plain row tuples of the serialized columns; no ORM objects are built.
+    page = keyset_paginate(db.session.query(*USER_COLUMNS), User.created_at, User.id, per_page, cursor)
+    pagination = {
+        "per_page": per_page,
+        "next": page.next_cursor,
+        "prev": page.prev_cursor,
+    }
+    if count == "exact":
+        pagination["total"] = User.query.count()
+    elif count == "estimate":
+        pagination["total"] = estimate_count(db.session, User)
+        pagination["total_is_estimate"] = True
+
+    entry = make_entry({
+        "users": dump_users(page.items),
+        "pagination": pagination,
+    })
+    cache.set(key, entry)
+    return entry
+
+
+def load_search_entry(query, per_page, order, cursor):
+    """Return the cache entry for a page of search results.
+
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded.
+    """
+    version = cache.counter(LIST_VERSION_KEY)
+    key = f"users:search:{version}:{per_page}:{order}:{cursor or ''}:{query}"
+    entry = cache.get(key)
+    if entry is not None:
+        return entry
+
+    ids, next_cursor = search_user_ids(db.session, query, per_page, order, cursor)
+    rows = {}
+    if ids:
+        rows = {row.id: row for row in db.session.execute(select(*USER_COLUMNS).where(User.id.in_(ids)))}
+    entry = make_entry({
+        # A user deleted since the search index was read is simply skipped.
+        "users": [dump_user(rows[user_id]) for user_id in ids if user_id in rows],
+        "pagination": {"per_page": per_page, "next": next_cursor},
+    })
+    cache.set(key, entry)
+    return entry
+
+
+def cached_response(entry):
+    """Return a cache entry's body with its ETag, or 304 if the client's copy is current."""
+    headers = {"ETag": quote_etag(entry["etag"]), "Cache-Control": "no-cache"}
+    if request.if_none_match.contains_weak(entry["etag"]):
+        return "", 304, headers
+    return entry["body"], 200, headers
+
+
+def parse_timestamp(value):
+    """Parse an ISO 8601 timestamp into naive UTC, as timestamps are stored.
+
+    Raises:
+        ValueError: If the value is not an ISO 8601 timestamp.
+    """
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def user_view(payload):
+    """Template-friendly object for a cached user payload."""
+    return SimpleNamespace(**{**payload, "created_at": datetime.fromisoformat(payload["created_at"])})
+
+
+def bulk_response(result, success_status=200):
+    """Per-item results; 207 Multi-Status if any item failed."""
+    return result.to_dict(), success_status if not result.failed else 207
+
+
 class UserListResource(Resource):
     """GET /api/users - list all users with pagination. POST - create user."""
 
     def get(self):
-        page = request.args.get("page", 1, type=int)
+        cursor = request.args.get("cursor")
         per_page = request.args.get("per_page", Config.DEFAULT_PAGE_SIZE, type=int)
         per_page = min(per_page, Config.MAX_PAGE_SIZE)
+        count = request.args.get("count")
 
-        if page < 1:
-            return make_error_response("Page must be >= 1", 400)
+        if "page" in request.args:
+            return make_error_response("page is not supported; pass pagination.next as the cursor parameter", 400)
         if per_page < 1:
             return make_error_response("per_page must be >= 1", 400)
-
-        pagination = User.query.order_by(User.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        users = pagination.items
+        if count not in (None, "exact", "estimate"):
+            return make_error_response("count must be 'exact' or 'estimate'", 400)
 
         # Redirect browser requests to HTML view
         if request.accept_mimetypes.accept_html:
-            return redirect(f"/users?page={page}&per_page={per_page}", code=302)
+            location = f"/users?per_page={per_page}"
+            if cursor:
+                location += f"&cursor={cursor}"
+            return redirect(location, code=302)
 
-        return {
-            "users": user_schema.dump(users, many=True),
-            "pagination": {
-                "page": page,
-                "per_page": per_page,
-                "total": pagination.total,
-                "pages": pagination.pages,
-            },
-        }
+        try:
+            entry = load_users_page_entry(cursor, per_page, count)
+        except InvalidCursor as e:
+            return make_error_response(str(e), 400)
+        return cached_response(entry)
 
     def post(self):
         data = request.get_json()
@@ -68,29 +236,162 @@ class UserListResource(Resource):
         if errors:
             return {"errors": errors}, 400
 
-        if User.query.filter_by(email=data["email"]).first():
+        email = data["email"].strip().lower()
+        if User.query.filter_by(email=email).first():
             return make_error_response("Email already in use", 400)
 
         user = User(
-            email=data["email"].strip().lower(),
+            email=email,
             name=data["name"].strip(),
         )
         db.session.add(user)
         db.session.commit()
+        invalidate_users()
         return user_schema.dump(user), 201
 
 
+class UserSearchResource(Resource):
+    """GET /api/users/search?q=... - prefix search over names and emails."""
+
+    def get(self):
+        query = request.args.get("q", "").strip()
+        cursor = request.args.get("cursor")
+        order = request.args.get("order", "rank")
+        per_page = request.args.get("per_page", Config.DEFAULT_PAGE_SIZE, type=int)
+        per_page = min(per_page, Config.MAX_PAGE_SIZE)
+
+        if not query:
+            return make_error_response("q is required", 400)
+        if per_page < 1:
+            return make_error_response("per_page must be >= 1", 400)
+        if order not in ORDERS:
+            return make_error_response(f"order must be one of {', '.join(ORDERS)}", 400)
+        if not search_supported(db.session):
+            return make_error_response("Search requires SQLite FTS5", 501)
+
+        try:
+            entry = load_search_entry(query, per_page, order, cursor)
+        except InvalidCursor as e:
+            return make_error_response(str(e), 400)
+        return cached_response(entry)
+
+
+class UserBulkResource(Resource):
+    """POST, PUT, DELETE /api/users/bulk - many users per request.
+
+    Bodies are a JSON array or an NDJSON stream (one item per line).
+    """
+
+    def post(self):
+        items = read_bulk_items()
+        if items is None:
+            return make_error_response("Request body must be a JSON array or NDJSON", 400)
+        result = create_users(items, Config.BULK_CHUNK_SIZE)
+        if result.succeeded:
+            invalidate_users()
+        return bulk_response(result, 201)
+
+    def put(self):
+        items = read_bulk_items()
+        if items is None:
+            return make_error_response("Request body must be a JSON array or NDJSON", 400)
+        result = update_users(items, Config.BULK_CHUNK_SIZE)
+        if result.succeeded:
+            invalidate_users(*result.ids())
+        return bulk_response(result)
+
+    def delete(self):
+        items = read_bulk_items()
+        if items is None:
+            return make_error_response("Request body must be a JSON array or NDJSON", 400)
+        result = delete_users(items, Config.BULK_CHUNK_SIZE)
+        if result.succeeded:
+            invalidate_users(*result.ids())
+        return bulk_response(result)
+
+
+class UserExportResource(Resource):
+    """GET /api/users/export - stream every user (or those updated since a time) as NDJSON or CSV.
+
+    Gzipped when the client sends Accept-Encoding: gzip.
+    """
+
+    def get(self):
+        fmt = request.args.get("format", "ndjson")
+        if fmt not in FORMATS:
+            return make_error_response(f"format must be one of {', '.join(FORMATS)}", 400)
+        updated_since = request.args.get("updated_since")
+        if updated_since:
+            try:
+                updated_since = parse_timestamp(updated_since)
+            except ValueError:
+                return make_error_response("updated_since must be an ISO 8601 timestamp", 400)
+
+        headers = {
+            "Content-Disposition": f'attachment; filename="users.{fmt}"',
+            "Cache-Control": "no-store",
+            "Vary": "Accept-Encoding",
+        }
+        if change_feed_supported(db.session):
+            # Read before the export, so every change up to the token is in
+            # it; later ones may be too, and are harmless to apply again.
+            headers["X-Changes-Token"] = encode_change_token(changes_head(db.session))
+        chunks = iter_export(db.session, fmt, updated_since or None, Config.EXPORT_BATCH_SIZE)
+        if request.accept_encodings["gzip"]:
+            chunks = gzip_chunks(chunks)
+            headers["Content-Encoding"] = "gzip"
+        # stream_with_context keeps the session open until the last chunk.
+        return Response(stream_with_context(chunks), mimetype=FORMATS[fmt], headers=headers)
+
+
+class UserChangesResource(Resource):
+    """GET /api/users/changes?since=<token> - changes after a token, waiting up to `wait` seconds for one."""
+
+    def get(self):
+        per_page = request.args.get("per_page", Config.CHANGES_PAGE_SIZE, type=int)
+        per_page = min(per_page, Config.CHANGES_MAX_PAGE_SIZE)
+        wait = request.args.get("wait", 0, type=float)
+        wait = min(max(wait, 0), Config.CHANGES_MAX_WAIT)
+
+        if per_page < 1:
+            return make_error_response("per_page must be >= 1", 400)
+        if not change_feed_supported(db.session):
+            return make_error_response("The change feed requires SQLite", 501)
+        since = request.args.get("since")
+        try:
+            after = decode_change_token(since) if since else 0
+        except InvalidCursor as e:
+            return make_error_response(str(e), 400)
+
+        deadline = time.monotonic() + wait
+        while True:
+            version = change_notifier.version
+            changes, last, has_more = read_changes(db.session, after, per_page)
+            remaining = deadline - time.monotonic()
+            if changes or remaining <= 0:
+                break
+            # Hand the connection back while waiting.
+            db.session.close()
+            change_notifier.wait(version, min(remaining, Config.CHANGES_POLL_INTERVAL))
+
+        return {
+            "changes": changes,
+            "next": encode_change_token(last),
+            "has_more": has_more,
+        }, 200, {"Cache-Control": "no-store"}
+
+
 class UserResource(Resource):
     """GET, PUT, DELETE /api/users/:id - single user operations."""
 
     def get(self, user_id):
-        user = User.query.get(user_id)
-        if not user:
+        entry = load_user_entry(user_id)
+        if entry is None:
             return make_error_response("User not found", 404)
         # Redirect browser requests to HTML view
         if request.accept_mimetypes.accept_html:
             return redirect(f"/users/{user_id}", code=302)
-        return user_schema.dump(user)
+        return cached_response(entry)
 
     def put(self, user_id):
         user = User.query.get(user_id)
@@ -117,6 +418,7 @@ class UserResource(Resource):
             user.name = data["name"].strip()
 
         db.session.commit()
+        invalidate_users(user_id)
         return user_schema.dump(user)
 
     def delete(self, user_id):
@@ -125,11 +427,16 @@ class UserResource(Resource):
             return make_error_response("User not found", 404)
         db.session.delete(user)
         db.session.commit()
+        invalidate_users(user_id)
         return "", 204
 
 
 # Register routes
 api.add_resource(UserListResource, "/api/users")
+api.add_resource(UserSearchResource, "/api/users/search")
+api.add_resource(UserBulkResource, "/api/users/bulk")
+api.add_resource(UserExportResource, "/api/users/export")
+api.add_resource(UserChangesResource, "/api/users/changes")
 api.add_resource(UserResource, "/api/users/<int:user_id>")
 
 
@@ -141,25 +448,26 @@ def index():
 
 @app.route("/users")
 def users_list():
-    page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", Config.DEFAULT_PAGE_SIZE, type=int)
-    per_page = min(per_page, Config.MAX_PAGE_SIZE)
-    pagination = User.query.order_by(User.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    per_page = max(min(per_page, Config.MAX_PAGE_SIZE), 1)
+    try:
+        entry = load_users_page_entry(request.args.get("cursor"), per_page)
+    except InvalidCursor:
+        return redirect(f"/users?per_page={per_page}", code=302)
+    page = entry["body"]
     return render_template(
         "users.html",
-        users=pagination.items,
-        pagination={"page": pagination.page, "pages": pagination.pages},
+        users=[user_view(payload) for payload in page["users"]],
+        pagination=page["pagination"],
     )
 
 
 @app.route("/users/<int:user_id>")
 def user_detail(user_id):
-    user = User.query.get(user_id)
-    if not user:
+    entry = load_user_entry(user_id)
+    if entry is None:
         return render_template("404.html"), 404
-    return render_template("user.html", user=user)
+    return render_template("user.html", user=user_view(entry["body"]))
 
 
 @app.errorhandler(404)
@@ -185,6 +493,21 @@ def init_db():
     os.makedirs(instance_path, exist_ok=True)
     with app.app_context():
         db.create_all()
+        # create_all() skips tables that already exist, so add columns and
+        # indexes introduced after the table was first created.
+        columns = {column["name"] for column in inspect(db.engine).get_columns(User.__tablename__)}
+        if "updated_at" not in columns:
+            column_type = User.updated_at.type.compile(dialect=db.engine.dialect)
+            with db.engine.begin() as connection:
+                connection.execute(text(f"ALTER TABLE users ADD COLUMN updated_at {column_type}"))
+                connection.execute(text("UPDATE users SET updated_at = created_at"))
+        for index in User.__table__.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+        if db.engine.dialect.name == "sqlite":
+            with db.engine.begin() as connection:
+                install_timestamp_normalization(connection, User.__tablename__, ("created_at", "updated_at"))
+                install_search(connection)
+                install_change_log(connection)
 
 
 if __name__ == "__main__":
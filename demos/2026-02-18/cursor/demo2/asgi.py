@@ -0,0 +1,303 @@
+"""ASGI deployment of the users API: Starlette + async SQLAlchemy.
+
+Serves `/api/users` and `/api/users/<id>` with the same request parameters,
+payloads, status codes, error bodies, cursors and ETags as app.py, but every
+database call awaits an async driver (aiosqlite, or asyncpg for PostgreSQL)
+instead of holding a server thread. Run it with:
+
+    uvicorn asgi:app --workers 1
+
+The tables must exist already (`python app.py` or `flask ... init_db`).
+Search, export, the change feed, the bulk endpoints, the HTML views and the
+read replica are served by the Flask app only; writes made here still reach
+the change feed, which is filled by triggers. Each process has its own
+in-process cache, as with the Flask app; use CACHE_URL=redis://... when both
+run side by side, so writes on one invalidate the other's entries (Redis
+calls are short and made inline).
+"""
+
+import contextlib
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.endpoints import HTTPEndpoint
+from starlette.exceptions import HTTPException
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from werkzeug.exceptions import BadRequest, MethodNotAllowed
+from werkzeug.http import parse_etags, quote_etag
+
+from cache import create_cache, make_entry, user_version_key
+from config import Config, engine_options
+from database import install_pragmas
+from models import User
+from pagination import InvalidCursor, estimate_count, keyset_page, keyset_query
+from profiling import PROFILE_PATH, ProfilingMiddleware, create_profiler
+from schemas import UserCreateSchema, UserUpdateSchema
+from serializers import USER_COLUMNS, dump_user, dump_users
+
+engine = create_async_engine(Config.ASYNC_DATABASE_URI, **engine_options(Config.ASYNC_DATABASE_URI))
+install_pragmas(engine.sync_engine, Config.SQLITE_PRAGMAS)
+# Objects stay loaded after commit so they can be serialized without
+# another round trip.
+Session = async_sessionmaker(engine, expire_on_commit=False)
+profiler = create_profiler(Config)
+if profiler is not None:
+    profiler.instrument(engine.sync_engine)
+
+# Schemas
+user_create_schema = UserCreateSchema()
+user_update_schema = UserUpdateSchema()
+
+cache = create_cache(Config.CACHE_URL, Config.CACHE_MAX_ENTRIES, Config.CACHE_TTL)
+# Same key as app.py, so a shared cache is invalidated by writes to either.
+LIST_VERSION_KEY = "users:list:version"
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response encoded with orjson, like the Flask app's output_json."""
+
+    def render(self, content):
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def make_error_response(message, status_code):
+    """Return a JSON error response."""
+    return ORJSONResponse({"error": message}, status_code)
+
+
+def int_arg(request, name, default):
+    """Query parameter as an int; `default` if missing or malformed (like Flask's `type=int`)."""
+    try:
+        return int(request.query_params[name])
+    except (KeyError, ValueError):
+        return default
+
+
+# Flask's message when get_json() is called on a non-JSON body
+NOT_JSON = "Did not attempt to load JSON data because the request Content-Type was not 'application/json'."
+
+
+async def read_json(request):
+    """Return the decoded JSON body.
+
+    Raises:
+        HTTPException: 415 if the body is not declared as JSON, 400 if it does
+            not parse; the same cases Flask's `request.get_json()` rejects.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type != "application/json" and not content_type.endswith("+json"):
+        raise HTTPException(415, NOT_JSON)
+    try:
+        return orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        raise HTTPException(400, BadRequest.description) from None
+
+
+def invalidate_users(*user_ids):
+    """Retire the cached payloads of the given users and every cached list page."""
+    cache.incr_many([*(user_version_key(user_id) for user_id in user_ids), LIST_VERSION_KEY])
+
+
+async def load_user_entry(session, user_id):
+    """Return the cache entry for a user's payload, or None if there is no such user."""
+    version = cache.counter(user_version_key(user_id))
+    key = f"user:{user_id}:{version}"
+    entry = cache.get(key)
+    if entry is None:
+        user = (await session.execute(select(*USER_COLUMNS).where(User.id == user_id))).first()
+        if not user:
+            return None
+        entry = make_entry(dump_user(user))
+        cache.set(key, entry)
+    return entry
+
+
+async def load_users_page_entry(session, cursor, per_page, count=None):
+    """Return the cache entry for a list page.
+
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded.
+    """
+    version = cache.counter(LIST_VERSION_KEY)
+    key = f"users:list:{version}:{per_page}:{count or ''}:{cursor or ''}"
+    entry = cache.get(key)
+    if entry is not None:
+        return entry
+
+    query, direction = keyset_query(select(*USER_COLUMNS), User.created_at, User.id, per_page, cursor)
+    page = keyset_page((await session.execute(query)).all(), per_page, cursor, direction)
+    pagination = {
+        "per_page": per_page,
+        "next": page.next_cursor,
+        "prev": page.prev_cursor,
+    }
+    if count == "exact":
+        pagination["total"] = await session.run_sync(lambda s: s.query(User).count())
+    elif count == "estimate":
+        pagination["total"] = await session.run_sync(estimate_count, User)
+        pagination["total_is_estimate"] = True
+
+    entry = make_entry({
+        "users": dump_users(page.items),
+        "pagination": pagination,
+    })
+    cache.set(key, entry)
+    return entry
+
+
+def cached_response(request, entry):
+    """Return a cache entry's body with its ETag, or 304 if the client's copy is current."""
+    headers = {"ETag": quote_etag(entry["etag"]), "Cache-Control": "no-cache"}
+    if parse_etags(request.headers.get("if-none-match")).contains_weak(entry["etag"]):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(entry["body"], headers=headers)
+
+
+async def email_taken(session, email, exclude_id=None):
+    query = select(User.id).where(User.email == email)
+    if exclude_id is not None:
+        query = query.where(User.id != exclude_id)
+    return (await session.execute(query.limit(1))).first() is not None
+
+
+class UserListResource(HTTPEndpoint):
+    """GET /api/users - list all users with pagination. POST - create user."""
+
+    async def get(self, request):
+        cursor = request.query_params.get("cursor")
+        per_page = min(int_arg(request, "per_page", Config.DEFAULT_PAGE_SIZE), Config.MAX_PAGE_SIZE)
+        count = request.query_params.get("count")
+
+        if "page" in request.query_params:
+            return make_error_response("page is not supported; pass pagination.next as the cursor parameter", 400)
+        if per_page < 1:
+            return make_error_response("per_page must be >= 1", 400)
+        if count not in (None, "exact", "estimate"):
+            return make_error_response("count must be 'exact' or 'estimate'", 400)
+
+        async with Session() as session:
+            try:
+                entry = await load_users_page_entry(session, cursor, per_page, count)
+            except InvalidCursor as e:
+                return make_error_response(str(e), 400)
+        return cached_response(request, entry)
+
+    async def post(self, request):
+        data = await read_json(request)
+        if not data:
+            return make_error_response("Request body must be JSON", 400)
+
+        errors = user_create_schema.validate(data)
+        if errors:
+            return ORJSONResponse({"errors": errors}, 400)
+
+        email = data["email"].strip().lower()
+        async with Session() as session:
+            if await email_taken(session, email):
+                return make_error_response("Email already in use", 400)
+            user = User(
+                email=email,
+                name=data["name"].strip(),
+            )
+            session.add(user)
+            await session.commit()
+        invalidate_users()
+        return ORJSONResponse(dump_user(user), 201)
+
+
+class UserResource(HTTPEndpoint):
+    """GET, PUT, DELETE /api/users/:id - single user operations."""
+
+    async def get(self, request):
+        async with Session() as session:
+            entry = await load_user_entry(session, request.path_params["user_id"])
+        if entry is None:
+            return make_error_response("User not found", 404)
+        return cached_response(request, entry)
+
+    async def put(self, request):
+        user_id = request.path_params["user_id"]
+        async with Session() as session:
+            user = await session.get(User, user_id)
+            if not user:
+                return make_error_response("User not found", 404)
+
+            data = await read_json(request)
+            if not data:
+                return make_error_response("Request body must be JSON", 400)
+
+            errors = user_update_schema.validate(data, partial=True)
+            if errors:
+                return ORJSONResponse({"errors": errors}, 400)
+
+            if "email" in data:
+                email = data["email"].strip().lower()
+                if await email_taken(session, email, exclude_id=user_id):
+                    return make_error_response("Email already in use", 400)
+                user.email = email
+            if "name" in data:
+                user.name = data["name"].strip()
+
+            await session.commit()
+        invalidate_users(user_id)
+        return ORJSONResponse(dump_user(user))
+
+    async def delete(self, request):
+        user_id = request.path_params["user_id"]
+        async with Session() as session:
+            user = await session.get(User, user_id)
+            if not user:
+                return make_error_response("User not found", 404)
+            await session.delete(user)
+            await session.commit()
+        invalidate_users(user_id)
+        return Response(status_code=204)
+
+
+async def http_error(request, exc):
+    # Unknown URLs get the app-level 404 body; the other errors the body
+    # Flask-RESTful builds from werkzeug's description.
+    if exc.status_code == 404:
+        return make_error_response("Not found", 404)
+    if exc.status_code == 405:
+        return ORJSONResponse({"message": MethodNotAllowed.description}, 405, headers=exc.headers)
+    return ORJSONResponse({"message": exc.detail}, exc.status_code, headers=exc.headers)
+
+
+async def internal_error(request, exc):
+    return make_error_response("Internal server error", 500)
+
+
+async def profile(request):
+    if request.method == "DELETE":
+        profiler.reset()
+        return Response(status_code=204)
+    return ORJSONResponse(profiler.snapshot())
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    await engine.dispose()
+
+
+routes = [
+    Route("/api/users", UserListResource),
+    Route("/api/users/{user_id:int}", UserResource),
+]
+middleware = [Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])]
+if profiler is not None:
+    routes.append(Route(PROFILE_PATH, profile, methods=["GET", "DELETE"]))
+    middleware.insert(0, Middleware(ProfilingMiddleware, profiler=profiler))
+
+app = Starlette(
+    routes=routes,
+    middleware=middleware,
+    exception_handlers={HTTPException: http_error, 500: internal_error},
+    lifespan=lifespan,
+)
@@ -0,0 +1,254 @@
+"""Bulk create, update and delete of users.
+
+Items are processed in chunks of `Config.BULK_CHUNK_SIZE`. Each chunk is
+validated with one `many=True` schema call, checked against the database with
+one `IN` query, written with a single executemany statement and committed as
+its own transaction, so a large import never holds one huge transaction and a
+bad item only fails itself.
+"""
+
+import json
+from itertools import islice
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from models import db, User
+from schemas import UserCreateSchema, UserUpdateSchema
+
+user_create_many_schema = UserCreateSchema(many=True)
+user_update_many_schema = UserUpdateSchema(many=True)
+
+
+class MalformedItem:
+    """Placeholder for an NDJSON line that is not valid JSON."""
+
+    def __init__(self, message):
+        self.message = message
+
+
+class BulkResult:
+    """Per-item outcomes of a bulk operation, in input order."""
+
+    def __init__(self):
+        self.results = []
+        self.succeeded = 0
+        self.failed = 0
+
+    def ok(self, index, **fields):
+        self.results.append({"index": index, **fields})
+        self.succeeded += 1
+
+    def error(self, index, errors):
+        self.results.append({"index": index, "errors": errors})
+        self.failed += 1
+
+    def ids(self):
+        """Ids of the items that succeeded."""
+        return [result["id"] for result in self.results if "errors" not in result]
+
+    def to_dict(self):
+        self.results.sort(key=lambda result: result["index"])
+        return {
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "results": self.results,
+        }
+
+
+def iter_ndjson(lines):
+    """Yield one item per non-blank line; lines that are not JSON become `MalformedItem`s."""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield MalformedItem("Invalid JSON")
+
+
+def iter_chunks(items, size):
+    """Yield lists of `(index, item)` pairs of at most `size` items."""
+    numbered = enumerate(items)
+    while True:
+        chunk = list(islice(numbered, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _split_malformed(chunk, result, allow=(dict,)):
+    """Report malformed or wrongly typed items and return the rest."""
+    valid = []
+    for index, item in chunk:
+        if isinstance(item, MalformedItem):
+            result.error(index, {"_schema": [item.message]})
+        elif not isinstance(item, allow):
+            result.error(index, {"_schema": ["Invalid input type."]})
+        else:
+            valid.append((index, item))
+    return valid
+
+
+def _insert_ignoring_conflicts():
+    """INSERT that skips rows whose email already exists, where the database supports it."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(User).on_conflict_do_nothing(index_elements=["email"])
+    if dialect == "postgresql":
+        return postgresql.insert(User).on_conflict_do_nothing(index_elements=["email"])
+    return insert(User)
+
+
+def create_users(items, chunk_size):
+    """Create users from an iterable of dicts; returns a `BulkResult`."""
+    result = BulkResult()
+    seen_emails = set()
+    for chunk in iter_chunks(items, chunk_size):
+        chunk = _split_malformed(chunk, result)
+        errors = user_create_many_schema.validate([item for _, item in chunk])
+
+        candidates = []
+        for position, (index, item) in enumerate(chunk):
+            if position in errors:
+                result.error(index, errors[position])
+                continue
+            email = item["email"].strip().lower()
+            if email in seen_emails:
+                result.error(index, {"email": ["Duplicate email in request"]})
+                continue
+            seen_emails.add(email)
+            candidates.append((index, {"email": email, "name": item["name"].strip()}))
+        if not candidates:
+            continue
+
+        taken = set(
+            db.session.scalars(
+                select(User.email).where(User.email.in_([row["email"] for _, row in candidates]))
+            )
+        )
+        rows = []
+        for index, row in candidates:
+            if row["email"] in taken:
+                result.error(index, {"email": ["Email already in use"]})
+            else:
+                rows.append((index, row))
+        if not rows:
+            continue
+
+        try:
+            created = db.session.execute(
+                _insert_ignoring_conflicts().returning(User.id, User.email),
+                [row for _, row in rows],
+            )
+            ids = {email: user_id for user_id, email in created}
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            ids = {}
+        # Rows missing from RETURNING lost a race with a concurrent insert.
+        for index, row in rows:
+            if row["email"] in ids:
+                result.ok(index, id=ids[row["email"]])
+            else:
+                result.error(index, {"email": ["Email already in use"]})
+    return result
+
+
+def update_users(items, chunk_size):
+    """Update users from an iterable of dicts with an `id`; returns a `BulkResult`."""
+    result = BulkResult()
+    seen_ids = set()
+    seen_emails = set()
+    for chunk in iter_chunks(items, chunk_size):
+        chunk = _split_malformed(chunk, result)
+        errors = user_update_many_schema.validate(
+            [{key: value for key, value in item.items() if key != "id"} for _, item in chunk],
+            partial=True,
+        )
+
+        candidates = []
+        for position, (index, item) in enumerate(chunk):
+            user_id = item.get("id")
+            if not isinstance(user_id, int) or isinstance(user_id, bool):
+                result.error(index, {"id": ["Missing or invalid id."]})
+                continue
+            if position in errors:
+                result.error(index, errors[position])
+                continue
+            if user_id in seen_ids:
+                result.error(index, {"id": ["Duplicate id in request"]})
+                continue
+            seen_ids.add(user_id)
+            row = {"id": user_id}
+            if "email" in item:
+                row["email"] = item["email"].strip().lower()
+                if row["email"] in seen_emails:
+                    result.error(index, {"email": ["Duplicate email in request"]})
+                    continue
+                seen_emails.add(row["email"])
+            if "name" in item:
+                row["name"] = item["name"].strip()
+            candidates.append((index, row))
+        if not candidates:
+            continue
+
+        existing = set(
+            db.session.scalars(select(User.id).where(User.id.in_([row["id"] for _, row in candidates])))
+        )
+        emails = [row["email"] for _, row in candidates if "email" in row]
+        owners = {}
+        if emails:
+            owners = dict(db.session.execute(select(User.email, User.id).where(User.email.in_(emails))).all())
+
+        rows = []
+        for index, row in candidates:
+            if row["id"] not in existing:
+                result.error(index, {"id": ["User not found"]})
+            elif owners.get(row.get("email"), row["id"]) != row["id"]:
+                result.error(index, {"email": ["Email already in use"]})
+            else:
+                rows.append((index, row))
+
+        updates = [row for _, row in rows if len(row) > 1]
+        try:
+            if updates:
+                db.session.execute(update(User), updates)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            for index, _ in rows:
+                result.error(index, {"_schema": ["Conflicting concurrent update; retry"]})
+            continue
+        for index, row in rows:
+            result.ok(index, id=row["id"])
+    return result
+
+
+def delete_users(items, chunk_size):
+    """Delete users given ids (or `{"id": ...}` objects); returns a `BulkResult`."""
+    result = BulkResult()
+    for chunk in iter_chunks(items, chunk_size):
+        ids = []
+        for index, item in _split_malformed(chunk, result, allow=(int, dict)):
+            user_id = item.get("id") if isinstance(item, dict) else item
+            if not isinstance(user_id, int) or isinstance(user_id, bool):
+                result.error(index, {"id": ["Missing or invalid id."]})
+            else:
+                ids.append((index, user_id))
+        if not ids:
+            continue
+
+        existing = set(db.session.scalars(select(User.id).where(User.id.in_([user_id for _, user_id in ids]))))
+        if existing:
+            db.session.execute(delete(User).where(User.id.in_(existing)))
+            db.session.commit()
+        deleted = set()
+        for index, user_id in ids:
+            if user_id in existing and user_id not in deleted:
+                deleted.add(user_id)
+                result.ok(index, id=user_id)
+            else:
+                result.error(index, {"id": ["User not found"]})
+    return result
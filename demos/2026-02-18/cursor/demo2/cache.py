@@ -0,0 +1,143 @@
+"""Read-through cache for serialized API payloads.
+
+Two interchangeable backends:
+
+- `LRUCache`: in-process, the default. Every worker process has its own
+  copy, so writes handled by one process reach the others only when their
+  entries expire; run a single process or use Redis when that matters.
+- `RedisCache`: any Redis-compatible server (Redis, Valkey, a local
+  stand-in), shared by all processes. Requires the optional redis package.
+
+Entries are `{"etag": ..., "body": ...}` dicts built by `make_entry`, so
+ETags are computed once per cached payload rather than once per request.
+
+Writes invalidate by bumping counters rather than deleting entries: payload
+keys include the counter (`user_version_key` for a user, a list version for
+list pages), read before the database. A reader that raced a write stores
+its stale payload under the retired version, where no one looks it up.
+Counters are never evicted, so they cost one small value per user written.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import orjson
+
+
+def make_entry(body):
+    """Wrap a JSON-serializable payload with a strong ETag derived from its content."""
+    encoded = orjson.dumps(body, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return {"etag": hashlib.sha1(encoded).hexdigest(), "body": body}
+
+
+def user_version_key(user_id):
+    """Key of the counter bumped on every write to a user."""
+    return f"user:{user_id}:version"
+
+
+class LRUCache:
+    """Thread-safe in-process cache with LRU eviction and a per-entry TTL."""
+
+    def __init__(self, max_entries=10000, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        # Counters are kept apart so eviction can never reset them.
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def incr_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._counters[key] = self._counters.get(key, 0) + 1
+
+    def counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+
+class RedisCache:
+    """Cache in a Redis-compatible server; values are stored as JSON."""
+
+    def __init__(self, url, ttl=300, prefix="users-api:"):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("A redis:// CACHE_URL requires the redis package") from None
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        value = self._client.get(self.prefix + key)
+        return None if value is None else json.loads(value)
+
+    def set(self, key, value):
+        self._client.set(self.prefix + key, json.dumps(value, ensure_ascii=False), ex=self.ttl)
+
+    def delete(self, *keys):
+        if keys:
+            self._client.delete(*(self.prefix + key for key in keys))
+
+    def incr(self, key):
+        return self._client.incr(self.prefix + key)
+
+    def incr_many(self, keys):
+        pipeline = self._client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.incr(self.prefix + key)
+        pipeline.execute()
+
+    def counter(self, key):
+        return int(self._client.get(self.prefix + key) or 0)
+
+    def clear(self):
+        keys = list(self._client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+
+def create_cache(url, max_entries=10000, ttl=300):
+    """Return the cache backend for `url`: "memory://" (LRU) or "redis://..." / "rediss://..."."""
+    if not url or url.startswith("memory://"):
+        return LRUCache(max_entries=max_entries, ttl=ttl)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCache(url, ttl=ttl)
+    raise ValueError(f"Unsupported CACHE_URL {url!r}; expected memory:// or redis://")
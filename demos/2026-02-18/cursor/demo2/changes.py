@@ -0,0 +1,135 @@
+"""Change feed of the users table (SQLite).
+
+Triggers append a row to `user_changes` for every insert, update and delete
+of a user, in the same transaction as the write, whichever path made it:
+the API, the bulk endpoints, the ASGI app or raw SQL. Sequence numbers come
+from an AUTOINCREMENT key and SQLite has a single writer, so they increase
+in commit order: a reader that has seen sequence N has seen every change up
+to N.
+
+Consumers hold an opaque token for the last sequence they applied. A page
+of changes keeps only the latest change of each user it contains, and
+carries the user's current payload, or null if the user is gone. Applying a
+page is therefore an upsert or a delete per entry, and applying one twice is
+harmless. To bootstrap, take the X-Changes-Token of a full export and
+follow the feed from there.
+"""
+
+import threading
+
+from sqlalchemy import func, select, text
+
+from models import User, UserChange
+from pagination import InvalidCursor, decode_token, encode_token
+from serializers import USER_COLUMNS, dump_user
+
+CHANGES_TABLE = UserChange.__tablename__
+
+_NOW = "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS {CHANGES_TABLE}_ai AFTER INSERT ON users BEGIN
+        INSERT INTO {CHANGES_TABLE}(user_id, op, changed_at) VALUES (new.id, 'create', {_NOW});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {CHANGES_TABLE}_au AFTER UPDATE ON users BEGIN
+        INSERT INTO {CHANGES_TABLE}(user_id, op, changed_at) VALUES (new.id, 'update', {_NOW});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {CHANGES_TABLE}_ad AFTER DELETE ON users BEGIN
+        INSERT INTO {CHANGES_TABLE}(user_id, op, changed_at) VALUES (old.id, 'delete', {_NOW});
+    END""",
+]
+
+
+def change_feed_supported(session):
+    """Whether the session's database records changes (SQLite only)."""
+    return session.get_bind().dialect.name == "sqlite"
+
+
+def install_change_log(connection):
+    """Create the triggers that fill the change log; the table itself comes from create_all()."""
+    for statement in _TRIGGERS:
+        connection.execute(text(statement))
+
+
+def encode_change_token(seq):
+    return encode_token({"q": seq})
+
+
+def decode_change_token(token):
+    """Return the sequence number of a token made by `encode_change_token`.
+
+    Raises:
+        InvalidCursor: If the token cannot be decoded.
+    """
+    try:
+        return int(decode_token(token)["q"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise InvalidCursor("Invalid token") from e
+
+
+def changes_head(session):
+    """The sequence number of the latest change (0 if none)."""
+    return session.execute(select(func.max(UserChange.seq))).scalar() or 0
+
+
+def read_changes(session, after, limit):
+    """
+    Return `(changes, last_seq, has_more)` for up to `limit` changes after
+    sequence `after`, one entry per user (its latest change in the page).
+    """
+    rows = session.execute(
+        select(UserChange.seq, UserChange.user_id, UserChange.op, UserChange.changed_at)
+        .where(UserChange.seq > after)
+        .order_by(UserChange.seq)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not rows:
+        return [], after, False
+
+    latest = {}
+    for row in rows:
+        # Each user ends up at the position of its latest change.
+        latest.pop(row.user_id, None)
+        latest[row.user_id] = row
+    users = {
+        user.id: user
+        for user in session.execute(select(*USER_COLUMNS).where(User.id.in_(list(latest))))
+    }
+    changes = [
+        {
+            "op": row.op,
+            "id": user_id,
+            "changed_at": row.changed_at.isoformat(),
+            "user": dump_user(users[user_id]) if user_id in users else None,
+        }
+        for user_id, row in latest.items()
+    ]
+    return changes, rows[-1].seq, has_more
+
+
+class ChangeNotifier:
+    """Wakes long-polling readers when this process commits.
+
+    Commits made by other processes are picked up by the readers' periodic
+    re-checks instead.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._version = 0
+
+    @property
+    def version(self):
+        with self._condition:
+            return self._version
+
+    def notify(self, *args):
+        with self._condition:
+            self._version += 1
+            self._condition.notify_all()
+
+    def wait(self, version, timeout):
+        """Wait up to `timeout` seconds for a commit after `version` was read."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._version != version, timeout)
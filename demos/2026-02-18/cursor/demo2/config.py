@@ -6,17 +6,77 @@ import os
 # regardless of which directory you run the app from
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 DEFAULT_DB_PATH = os.path.join(BASE_DIR, "instance", "users.db")
+DATABASE_URL = os.environ.get("DATABASE_URL", f"sqlite:///{DEFAULT_DB_PATH}")
+DATABASE_REPLICA_URL = os.environ.get("DATABASE_REPLICA_URL")
+# Async drivers for the ASGI app (asgi.py)
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def async_url(url):
+    """The same database URL with the dialect's async driver, e.g. sqlite+aiosqlite://."""
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme.split("+")[0], scheme) + sep + rest
+
+
+def _is_memory_sqlite(url):
+    return url.startswith("sqlite") and (url.rstrip("/").endswith(":") or ":memory:" in url)
+
+
+def engine_options(url):
+    """Pool sizing for threaded servers; in-memory SQLite uses a single static connection."""
+    if _is_memory_sqlite(url):
+        return {}
+    return {
+        # Roughly one connection per server thread
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", 16)),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 16)),
+        "pool_timeout": 10,
+    }
 
 
 class Config:
     """Base configuration."""
 
     SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret-key-change-in-production")
-    SQLALCHEMY_DATABASE_URI = os.environ.get(
-        "DATABASE_URL", f"sqlite:///{DEFAULT_DB_PATH}"
-    )
+    SQLALCHEMY_DATABASE_URI = DATABASE_URL
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    RESTFUL_JSON = {"ensure_ascii": False}
+    ASYNC_DATABASE_URI = os.environ.get("ASYNC_DATABASE_URL") or async_url(DATABASE_URL)
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(DATABASE_URL)
+    # Optional replica that GET requests read from, e.g. a streamed copy, or
+    # the same file opened read-only in its own pool:
+    # sqlite:///file:/path/users.db?mode=ro&uri=true
+    # It must not lag behind the primary by more than the cache can tolerate:
+    # a stale read right after a write is cached until the next write.
+    SQLALCHEMY_BINDS = {"replica": DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    # Applied to every new SQLite connection (see database.py)
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",  # readers no longer block on the writer
+        "synchronous": "NORMAL",  # no corruption in WAL mode; a power loss may drop the last commits
+        "cache_size": -65536,  # 64 MiB page cache per connection
+        "mmap_size": 268435456,  # 256 MiB of memory-mapped reads
+        "busy_timeout": 5000,  # wait up to 5s for a lock instead of failing
+        "temp_store": "MEMORY",
+    }
     # Pagination defaults
     DEFAULT_PAGE_SIZE = 20
     MAX_PAGE_SIZE = 100
+    # Items written per transaction by the bulk endpoints
+    BULK_CHUNK_SIZE = 1000
+    # Rows fetched and encoded per chunk by the streaming export
+    EXPORT_BATCH_SIZE = 1000
+    # Change feed: changes per page, and how long a request may wait for one
+    CHANGES_PAGE_SIZE = 500
+    CHANGES_MAX_PAGE_SIZE = 5000
+    CHANGES_MAX_WAIT = 30
+    # How often waiting requests look for commits made by other processes
+    CHANGES_POLL_INTERVAL = 0.5
+    # Payload cache: "memory://" (per-process LRU) or a redis:// URL shared
+    # by all processes
+    CACHE_URL = os.environ.get("CACHE_URL", "memory://")
+    CACHE_MAX_ENTRIES = 10000
+    CACHE_TTL = 300
+    # Per-request SQL profiling, served at /api/_profile (see profiling.py)
+    PROFILE_QUERIES = os.environ.get("PROFILE_QUERIES", "").lower() in ("1", "true", "yes")
+    PROFILE_SLOW_QUERY_MS = float(os.environ.get("PROFILE_SLOW_QUERY_MS", 100))
+    # Flag statements run this many times in one request
+    PROFILE_REPEAT_THRESHOLD = 2
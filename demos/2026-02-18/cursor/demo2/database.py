@@ -0,0 +1,65 @@
+"""Engine tuning and read-replica routing.
+
+`configure_engines` applies `SQLITE_PRAGMAS` to every new SQLite connection
+through a connect hook, so pooled connections all get WAL mode and a busy
+timeout (concurrent writers wait for the lock instead of failing with
+"database is locked", and readers never wait for writers).
+
+`RoutingSession` sends the queries of GET/HEAD/OPTIONS requests to the
+"replica" bind, when `SQLALCHEMY_BINDS` has one.
+"""
+
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA_BIND = "replica"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _safe_request():
+    return has_request_context() and request.method in SAFE_METHODS
+
+
+class RoutingSession(Session):
+    """Session that reads from the replica bind during safe requests."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _safe_request():
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _is_memory(engine):
+    return engine.url.database in (None, "", ":memory:")
+
+
+def configure_engines(app, db):
+    """Install the SQLite connection hooks on the app's engines."""
+    pragmas = app.config.get("SQLITE_PRAGMAS", {})
+    with app.app_context():
+        for key, engine in db.engines.items():
+            install_pragmas(engine, pragmas, read_only=key == REPLICA_BIND)
+
+
+def install_pragmas(engine, pragmas, read_only=False):
+    """Apply `pragmas` to every new connection of `engine`, if it is SQLite."""
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = dict(pragmas)
+    if read_only or _is_memory(engine):
+        # Read-only and in-memory databases cannot switch to WAL.
+        pragmas.pop("journal_mode", None)
+    event.listen(engine, "connect", _pragma_hook(pragmas))
+
+
+def _pragma_hook(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+    return set_pragmas
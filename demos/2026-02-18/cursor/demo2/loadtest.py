@@ -0,0 +1,377 @@
+"""Load tests for the users API, to compare deployments and builds.
+
+`seed` fills the configured database with synthetic users, `run` replays a
+weighted mix of reads and writes against a running server, and `compare`
+diffs two saved runs.
+
+`run` drives `--concurrency` keep-alive connections and reports requests per
+second and p50/p99 latency per operation. With `--server-pid` it also reads
+the server's CPU time from /proc (Linux) and reports requests per CPU-second,
+the fair comparison when the client and the server share cores. With
+`--profile` (server started with PROFILE_QUERIES=1) it resets the server's
+query profile first and saves it with the results: queries per request,
+statements per endpoint, slow and repeated statements (see profiling.py).
+
+Each worker's traffic is reproducible from `--seed`. Writes change the
+database, so repeating a run on the same database is not a replay of it
+(renames to the current name issue no UPDATE, for one): copy the seeded
+database aside and restore it before each run being compared.
+
+Usage:
+    python loadtest.py seed --users 2000000
+
+    PROFILE_QUERIES=1 uvicorn asgi:app --port 8000 &             # async Starlette (ASGI)
+    python loadtest.py run http://127.0.0.1:8000 --server-pid $! --profile --output results/asgi.json
+
+    PROFILE_QUERIES=1 gunicorn -w 1 --threads 16 -b 127.0.0.1:8000 app:app &   # threaded Flask (WSGI)
+    python loadtest.py run http://127.0.0.1:8000 --server-pid $(pgrep -P $!) --profile --output results/wsgi.json
+
+    python loadtest.py compare results/wsgi.json results/asgi.json
+
+Gunicorn serves from worker processes, so pass their pids, not the master's.
+An operation the server answered only with 404s (a route it does not serve)
+is listed under "unserved" and left out of the request totals and rates.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import quote, urlsplit
+
+HEADERS = {"Accept": "application/json", "Content-Type": "application/json"}
+# Only routes both apps serve: asgi.py has no search, so add search_users
+# with --mix when comparing Flask builds.
+DEFAULT_MIX = "get_user=65,list_users=15,count_users=2,create_user=8,update_user=8,delete_user=2"
+
+FIRST_NAMES = ["Ada", "Alan", "Barbara", "Claude", "Dennis", "Edsger", "Frances", "Grace", "Guido", "Hedy",
+               "Ivan", "Joan", "Ken", "Linus", "Margaret", "Niklaus", "Radia", "Shafi", "Tim", "Yukihiro"]
+LAST_NAMES = ["Allen", "Backus", "Cerf", "Dijkstra", "Hamilton", "Hopper", "Kay", "Knuth", "Lamport", "Liskov",
+              "Lovelace", "McCarthy", "Perlman", "Ritchie", "Stroustrup", "Thompson", "Torvalds", "Turing",
+              "Wirth", "Wozniak"]
+
+
+def synthetic_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def seed(users, chunk_size=10000):
+    """Insert `users` synthetic users into the configured database, oldest first."""
+    from sqlalchemy import insert
+
+    from app import app, db, init_db
+    from models import User
+
+    init_db()
+    rng = random.Random(users)
+    # Unique per run, so seeding twice adds users rather than conflicting.
+    prefix = f"load{int(time.time())}"
+    start = datetime.utcnow() - timedelta(seconds=users)
+    began = time.perf_counter()
+    with app.app_context():
+        for offset in range(0, users, chunk_size):
+            rows = [
+                {
+                    "email": f"{prefix}-{i}@example.com",
+                    "name": synthetic_name(rng),
+                    "created_at": start + timedelta(seconds=i),
+                    "updated_at": start + timedelta(seconds=i),
+                }
+                for i in range(offset, min(offset + chunk_size, users))
+            ]
+            db.session.execute(insert(User), rows)
+            db.session.commit()
+            print(f"{offset + len(rows)} users", file=sys.stderr, end="\r")
+    print(f"Seeded {users} users in {time.perf_counter() - began:.1f}s", file=sys.stderr)
+
+
+def cpu_seconds(pids):
+    """User plus system CPU time of the given processes and their threads."""
+    ticks = os.sysconf("SC_CLK_TCK")
+    total = 0
+    for pid in pids:
+        with open(f"/proc/{pid}/stat") as f:
+            # The command name may contain spaces; fields resume after ")".
+            fields = f.read().rsplit(")", 1)[1].split()
+        total += int(fields[11]) + int(fields[12])
+    return total / ticks
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def connect(url):
+    parts = urlsplit(url)
+    return http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+
+
+def call(url, method, path, body=None):
+    """Make one request on a new connection; returns `(status, body)`."""
+    conn = connect(url)
+    try:
+        conn.request(method, path, body=body, headers=HEADERS)
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+class Worker(threading.Thread):
+    """One keep-alive connection replaying the request mix until `deadline`."""
+
+    def __init__(self, url, max_id, mix, deadline, seed):
+        super().__init__(daemon=True)
+        self.url = url
+        self.max_id = max_id
+        self.mix = mix
+        self.deadline = deadline
+        self.random = random.Random(seed)
+        self.prefix = f"lt{seed}-{int(time.time() * 1000)}"
+        self.latencies = {}
+        self.statuses = {}
+        self.errors = 0
+        self.cursor = None
+        self.created = []
+        self.creates = 0
+
+    def request(self, conn, name, method, path, body=None):
+        start = time.perf_counter()
+        conn.request(method, path, body=body, headers=HEADERS)
+        response = conn.getresponse()
+        data = response.read()
+        self.latencies.setdefault(name, []).append(time.perf_counter() - start)
+        statuses = self.statuses.setdefault(name, {})
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+        if response.status >= 500:
+            self.errors += 1
+        return response.status, data
+
+    def step(self, conn, name):
+        user_id = self.random.randint(1, self.max_id)
+        if name == "get_user":
+            self.request(conn, name, "GET", f"/api/users/{user_id}")
+        elif name == "list_users":
+            path = "/api/users?per_page=20"
+            if self.cursor:
+                path += f"&cursor={self.cursor}"
+            status, data = self.request(conn, name, "GET", path)
+            self.cursor = json.loads(data)["pagination"]["next"] if status == 200 else None
+        elif name == "count_users":
+            self.request(conn, name, "GET", "/api/users?per_page=20&count=exact")
+        elif name == "search_users":
+            query = quote(self.random.choice(FIRST_NAMES)[:3])
+            self.request(conn, name, "GET", f"/api/users/search?q={query}&order=id")
+        elif name == "create_user":
+            self.creates += 1
+            body = {"email": f"{self.prefix}-{self.creates}@example.com", "name": synthetic_name(self.random)}
+            status, data = self.request(conn, name, "POST", "/api/users", json.dumps(body))
+            if status == 201:
+                self.created.append(json.loads(data)["id"])
+        elif name == "update_user":
+            body = {"name": synthetic_name(self.random)}
+            if self.random.random() < 0.25:
+                # Sometimes an email change, to exercise the uniqueness check.
+                body["email"] = f"{self.prefix}-u{self.random.randrange(10**9)}@example.com"
+            self.request(conn, name, "PUT", f"/api/users/{user_id}", json.dumps(body))
+        elif name == "delete_user":
+            # Only users this worker created, so reads keep finding the seed.
+            if self.created:
+                self.request(conn, name, "DELETE", f"/api/users/{self.created.pop()}")
+
+    def run(self):
+        conn = connect(self.url)
+        names, weights = zip(*self.mix.items())
+        while time.monotonic() < self.deadline:
+            try:
+                self.step(conn, self.random.choices(names, weights)[0])
+            except (OSError, http.client.HTTPException, ValueError):
+                self.errors += 1
+                conn.close()
+                conn = connect(self.url)
+        conn.close()
+
+
+def newest_user_id(url):
+    status, data = call(url, "GET", "/api/users?per_page=1")
+    users = json.loads(data)["users"] if status == 200 else []
+    if not users:
+        raise SystemExit("The database has no users; run `loadtest.py seed` first")
+    return users[0]["id"]
+
+
+def build_label():
+    """The current git commit, to tell saved runs apart."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(url, concurrency, duration, mix, server_pids=(), profile=False, seed=0):
+    """Run the load test and return its results as a dict."""
+    max_id = newest_user_id(url)
+    if profile and call(url, "DELETE", "/api/_profile")[0] != 204:
+        raise SystemExit("The server is not profiling; start it with PROFILE_QUERIES=1")
+    deadline = time.monotonic() + duration
+    workers = [Worker(url, max_id, mix, deadline, seed + index) for index in range(concurrency)]
+    cpu_before = cpu_seconds(server_pids) if server_pids else None
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = {}
+    statuses = {}
+    for worker in workers:
+        for name, values in worker.latencies.items():
+            latencies.setdefault(name, []).extend(values)
+        for name, counts in worker.statuses.items():
+            merged = statuses.setdefault(name, {})
+            for status, count in counts.items():
+                merged[str(status)] = merged.get(str(status), 0) + count
+    unserved = sorted(name for name, counts in statuses.items() if set(counts) == {"404"})
+    total = sum(len(values) for name, values in latencies.items() if name not in unserved)
+    results = {
+        "label": build_label(),
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "url": url,
+        "concurrency": concurrency,
+        "mix": mix,
+        "seed": seed,
+        "duration": round(elapsed, 2),
+        "requests": total,
+        "errors": sum(worker.errors for worker in workers),
+        "rps": round(total / elapsed, 1),
+        "unserved": unserved,
+        "operations": {
+            name: {
+                "requests": len(values),
+                "rps": round(len(values) / elapsed, 1),
+                "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+                "mean_ms": round(statistics.fmean(values) * 1000, 2),
+                "statuses": statuses.get(name, {}),
+            }
+            for name, values in sorted(latencies.items())
+        },
+    }
+    if server_pids:
+        cpu = cpu_seconds(server_pids) - cpu_before
+        results["server_cpu_seconds"] = round(cpu, 2)
+        results["requests_per_cpu_second"] = round(total / cpu, 1) if cpu else None
+    if profile:
+        results["profile"] = json.loads(call(url, "GET", "/api/_profile")[1])
+    return results
+
+
+def _change(before, after):
+    if before is None or after is None:
+        return f"{'-':>9}"
+    if not before:
+        return f"{'':>9}"
+    return f"{(after - before) / before * 100:+8.1f}%"
+
+
+def compare(base, current):
+    """Return a text table of the differences between two saved runs."""
+    lines = [f"{base.get('label')} -> {current.get('label')}"]
+    for key in ("rps", "requests_per_cpu_second", "errors"):
+        before, after = base.get(key), current.get(key)
+        lines.append(f"{key:<28}{before!s:>12}{after!s:>12}{_change(before, after)}")
+
+    lines.append("")
+    lines.append(f"{'operation':<28}{'p50 ms':>22}{'':>9}{'p99 ms':>22}")
+    for name in sorted(set(base["operations"]) | set(current["operations"])):
+        before = base["operations"].get(name, {})
+        after = current["operations"].get(name, {})
+        cells = []
+        for key in ("p50_ms", "p99_ms"):
+            cells.append(f"{before.get(key)!s:>11}{after.get(key)!s:>11}{_change(before.get(key), after.get(key))}")
+        lines.append(f"{name:<28}{''.join(cells)}")
+
+    base_profile = base.get("profile", {}).get("endpoints", {})
+    current_profile = current.get("profile", {}).get("endpoints", {})
+    if base_profile or current_profile:
+        lines.append("")
+        lines.append(f"{'endpoint (server)':<40}{'queries/request':>24}{'p99 ms':>22}")
+        for name in sorted(set(base_profile) | set(current_profile)):
+            before = base_profile.get(name, {})
+            after = current_profile.get(name, {})
+            lines.append(
+                f"{name:<40}"
+                f"{before.get('queries_per_request')!s:>12}{after.get('queries_per_request')!s:>12}"
+                f"{before.get('p99_ms')!s:>11}{after.get('p99_ms')!s:>11}"
+            )
+    return "\n".join(lines)
+
+
+def parse_mix(value):
+    """Parse "get_user=80,list_users=15,update_user=5" into a weights dict."""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="Insert synthetic users into DATABASE_URL")
+    seed_parser.add_argument("--users", type=int, default=1000000)
+    seed_parser.add_argument("--chunk-size", type=int, default=10000)
+
+    run_parser = commands.add_parser("run", help="Replay mixed traffic against a running server")
+    run_parser.add_argument("url", help="Base URL of the server, e.g. http://127.0.0.1:8000")
+    run_parser.add_argument("--concurrency", type=int, default=32)
+    run_parser.add_argument("--duration", type=float, default=20.0)
+    run_parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                            help=f"Operation weights (default {DEFAULT_MIX})")
+    run_parser.add_argument("--server-pid", type=int, action="append", default=[],
+                            help="Server process to measure CPU time of (repeat for each worker)")
+    run_parser.add_argument("--seed", type=int, default=0, help="Seed of the first worker's traffic")
+    run_parser.add_argument("--profile", action="store_true", help="Save the server's query profile")
+    run_parser.add_argument("--output", help="Save the results to this JSON file")
+
+    compare_parser = commands.add_parser("compare", help="Compare two saved runs")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("current")
+
+    args = parser.parse_args()
+    if args.command == "seed":
+        seed(args.users, args.chunk_size)
+    elif args.command == "run":
+        results = run(args.url, args.concurrency, args.duration, args.mix, args.server_pid, args.profile, args.seed)
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+        print(json.dumps({key: value for key, value in results.items() if key != "profile"}, indent=2))
+        if results["unserved"]:
+            print(f"warning: the server does not serve {', '.join(results['unserved'])}", file=sys.stderr)
+    else:
+        with open(args.base) as f:
+            base = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        print(compare(base, current))
+
+
+if __name__ == "__main__":
+    main()
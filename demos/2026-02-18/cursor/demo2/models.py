@@ -4,18 +4,43 @@ from datetime import datetime
 
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+from database import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 
 class User(db.Model):
     """User model."""
 
     __tablename__ = "users"
+    # Keyset pagination orders by (created_at, id); see pagination.py.
+    # Incremental exports filter and order by (updated_at, id); see export.py.
+    __table_args__ = (
+        db.Index("ix_users_created_at_id", "created_at", "id"),
+        db.Index("ix_users_updated_at_id", "updated_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(255), unique=True, nullable=False, index=True)
     name = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __repr__(self):
         return f"<User {self.email}>"
+
+
+class UserChange(db.Model):
+    """One create, update or delete of a user, written by triggers (see changes.py)."""
+
+    __tablename__ = "user_changes"
+    # AUTOINCREMENT: sequence numbers are never reused, even after pruning.
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(6), nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<UserChange {self.seq} {self.op} {self.user_id}>"
@@ -0,0 +1,198 @@
+"""Keyset (cursor) pagination, newest first.
+
+Pages are selected with `WHERE (created_at, id) < (:created_at, :id)` on a
+composite index instead of `OFFSET`, so every page costs the same index seek
+however deep it is, and no `COUNT(*)` runs unless a total is asked for.
+
+SQLite stores timestamps as text and compares them as text, so a cursor
+bound (always `YYYY-MM-DD HH:MM:SS.ffffff`) only orders correctly against
+rows stored in that same form. `install_timestamp_normalization` adds
+triggers that rewrite any other form (no fraction, a "T" separator, an
+offset, e.g. from raw SQL or `CURRENT_TIMESTAMP`) on insert and update.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, func, or_, text
+
+NEXT = "next"
+PREV = "prev"
+
+# SQLAlchemy's storage format for DateTime on SQLite, as a GLOB pattern.
+# Other forms are rewritten to it at millisecond precision, in UTC.
+_STORED_TIMESTAMP = "-".join(["[0-9]" * 4, "[0-9]" * 2, "[0-9]" * 2]) + " " + ":".join(["[0-9]" * 2] * 3) + "." + "[0-9]" * 6
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded."""
+
+
+def encode_token(payload):
+    """Encode a JSON-serializable payload as an opaque, URL-safe token."""
+    encoded = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(encoded.encode()).rstrip(b"=").decode()
+
+
+def decode_token(token):
+    """Return the payload of a token made by `encode_token`.
+
+    Raises:
+        InvalidCursor: If the token cannot be decoded.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def encode_cursor(created_at, item_id, direction):
+    """Encode a position and direction as an opaque, URL-safe cursor."""
+    return encode_token({"c": created_at.isoformat(), "i": item_id, "d": direction})
+
+
+def decode_cursor(cursor):
+    """Return `(created_at, id, direction)` from a cursor made by `encode_cursor`."""
+    data = decode_token(cursor)
+    try:
+        created_at = datetime.fromisoformat(data["c"])
+        item_id = int(data["i"])
+        direction = data["d"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+    if direction not in (NEXT, PREV):
+        raise InvalidCursor("Invalid cursor")
+    return created_at, item_id, direction
+
+
+def install_timestamp_normalization(connection, table, columns):
+    """
+    Create SQLite triggers that store `table`'s timestamp `columns` in the
+    form cursors compare against, and normalize the rows already stored.
+
+    Values SQLite cannot read as a timestamp are left alone.
+    """
+    for column in columns:
+        new_value = f"new.{column}"
+        fix = f"UPDATE {table} SET {column} = {_normalized(new_value)} WHERE rowid = new.rowid;"
+        for suffix, event in (("ai", "INSERT"), ("au", f"UPDATE OF {column}")):
+            connection.execute(text(
+                f"""CREATE TRIGGER IF NOT EXISTS {table}_{column}_{suffix} AFTER {event} ON {table}
+                WHEN {_needs_normalizing(new_value)} BEGIN
+                    {fix}
+                END"""
+            ))
+        connection.execute(text(
+            f"UPDATE {table} SET {column} = {_normalized(column)} WHERE {_needs_normalizing(column)}"
+        ))
+
+
+def _normalized(value):
+    return f"strftime('%Y-%m-%d %H:%M:%f000', {value})"
+
+
+def _needs_normalizing(value):
+    return f"{value} NOT GLOB '{_STORED_TIMESTAMP}' AND {_normalized(value)} IS NOT NULL"
+
+
+class KeysetPage:
+    """One page of items plus the cursors of its neighbours (None at either end)."""
+
+    def __init__(self, items, next_cursor, prev_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+
+def keyset_paginate(query, created_column, id_column, per_page, cursor=None):
+    """
+    Return the page of `query` after (or before) `cursor`, newest first.
+
+    Items are ordered by `created_column` then `id_column`, both descending;
+    there should be a composite index on the two columns.
+
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded.
+    """
+    query, direction = keyset_query(query, created_column, id_column, per_page, cursor)
+    return keyset_page(query.all(), per_page, cursor, direction)
+
+
+def keyset_query(query, created_column, id_column, per_page, cursor=None):
+    """
+    Return `(query, direction)`: `query` (a Query or a select) narrowed to one
+    page after (or before) `cursor`, for callers that execute it themselves.
+
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded.
+    """
+    direction = NEXT
+    if cursor:
+        created_at, item_id, direction = decode_cursor(cursor)
+        if direction == NEXT:
+            query = query.filter(
+                or_(
+                    created_column < created_at,
+                    and_(created_column == created_at, id_column < item_id),
+                )
+            )
+        else:
+            query = query.filter(
+                or_(
+                    created_column > created_at,
+                    and_(created_column == created_at, id_column > item_id),
+                )
+            )
+
+    if direction == NEXT:
+        query = query.order_by(created_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(created_column.asc(), id_column.asc())
+
+    # One extra row tells whether there is another page in this direction.
+    return query.limit(per_page + 1), direction
+
+
+def keyset_page(rows, per_page, cursor, direction):
+    """Build the KeysetPage for the rows of a query made by `keyset_query`."""
+    has_more = len(rows) > per_page
+    items = list(rows[:per_page])
+    if direction == PREV:
+        items.reverse()
+        has_next, has_prev = bool(cursor), has_more
+    else:
+        has_next, has_prev = has_more, bool(cursor)
+
+    next_cursor = prev_cursor = None
+    if items and has_next:
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id, NEXT)
+    if items and has_prev:
+        first = items[0]
+        prev_cursor = encode_cursor(first.created_at, first.id, PREV)
+    return KeysetPage(items, next_cursor, prev_cursor)
+
+
+def estimate_count(session, model):
+    """
+    Cheaply estimate the number of rows in `model`'s table.
+
+    Uses the planner statistics on PostgreSQL and the largest primary key on
+    SQLite (an overestimate after deletions); other databases get an exact
+    count.
+    """
+    table = model.__table__.name
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        estimate = session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+            {"table": table},
+        ).scalar()
+        if estimate is not None and estimate >= 0:
+            return estimate
+    elif dialect == "sqlite":
+        return session.query(func.max(model.id)).scalar() or 0
+    return session.query(func.count(model.id)).scalar()
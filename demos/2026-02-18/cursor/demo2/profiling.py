@@ -0,0 +1,261 @@
+"""Per-request SQL profiling and latency statistics.
+
+`QueryProfiler` listens to SQLAlchemy's cursor events and attributes every
+statement to the request it ran in. The request is tracked in a context
+variable, so this works on threaded WSGI servers and under asyncio alike.
+For each endpoint (method plus route) it keeps p50/p99 latency, queries per
+request and the statements each request issues, and it flags:
+
+- slow queries, slower than `slow_query_ms`: logged and kept, slowest first;
+- repeated statements, the same SQL run `repeat_threshold` times or more in
+  one request: N+1 loads, re-reads after commit, redundant checks.
+
+Statements are normalized (whitespace collapsed, IN lists folded) so
+differently-sized lists count as one statement. Enable with
+PROFILE_QUERIES=1; `init_profiling` wires it into the Flask app and
+`ProfilingMiddleware` into the ASGI app, and both serve the snapshot at
+GET /api/_profile (DELETE resets it).
+"""
+
+import contextvars
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+
+from flask import g, jsonify, request
+from sqlalchemy import event
+
+PROFILE_PATH = "/api/_profile"
+# Latency samples kept per endpoint; beyond that a uniform sample is kept.
+MAX_SAMPLES = 100000
+MAX_SLOW_QUERIES = 50
+TOP_STATEMENTS = 50
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar("profiled_request", default=None)
+
+_WHITESPACE = re.compile(r"\s+")
+_PARAMETER_LIST = re.compile(r"\(\s*(\?|%\(\w+\)s|:\w+)(\s*,\s*(\?|%\(\w+\)s|:\w+))+\s*\)")
+
+
+def normalize_sql(statement):
+    """Collapse whitespace and fold parameter lists into `(?, ...)`."""
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    return _PARAMETER_LIST.sub("(?, ...)", statement)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class _Samples:
+    """Reservoir of at most MAX_SAMPLES values, uniform over everything added."""
+
+    def __init__(self):
+        self.values = []
+        self.seen = 0
+
+    def add(self, value):
+        self.seen += 1
+        if len(self.values) < MAX_SAMPLES:
+            self.values.append(value)
+        else:
+            index = random.randrange(self.seen)
+            if index < MAX_SAMPLES:
+                self.values[index] = value
+
+
+class _EndpointStats:
+    def __init__(self):
+        self.latency = _Samples()
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.max_queries = 0
+        self.statements = Counter()
+
+
+class _StatementStats:
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.endpoints = Counter()
+
+
+class QueryProfiler:
+    """Collects per-request SQL and latency statistics; thread- and task-safe."""
+
+    def __init__(self, slow_query_ms=100, repeat_threshold=2):
+        self.slow_query_ms = slow_query_ms
+        self.repeat_threshold = repeat_threshold
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._started = time.time()
+            self._endpoints = {}
+            self._statements = {}
+            self._slow = []
+            self._repeated = {}
+
+    def instrument(self, engine):
+        """Time every statement run on `engine` (a sync Engine or an AsyncEngine's sync_engine)."""
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profile_start", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["profile_start"].pop()
+        statements = _current.get()
+        if statements is not None:
+            statements.append((statement, seconds))
+
+    def start_request(self):
+        """Start attributing statements to a new request; returns a token for `finish_request`."""
+        return _current.set([])
+
+    def finish_request(self, token, endpoint, seconds):
+        """Record the request started with `token` under `endpoint`, which took `seconds`."""
+        statements = _current.get()
+        _current.reset(token)
+        if statements is None:
+            return
+        normalized = [(normalize_sql(statement), took) for statement, took in statements]
+        per_request = Counter(sql for sql, _ in normalized)
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = _EndpointStats()
+            stats.latency.add(seconds)
+            stats.queries += len(normalized)
+            stats.max_queries = max(stats.max_queries, len(normalized))
+            stats.statements.update(per_request)
+            for sql, took in normalized:
+                stats.query_seconds += took
+                statement = self._statements.get(sql)
+                if statement is None:
+                    statement = self._statements[sql] = _StatementStats()
+                statement.calls += 1
+                statement.seconds += took
+                statement.max_seconds = max(statement.max_seconds, took)
+                statement.endpoints[endpoint] += 1
+                if took * 1000 >= self.slow_query_ms:
+                    self._record_slow(sql, took, endpoint)
+            for sql, calls in per_request.items():
+                if calls >= self.repeat_threshold:
+                    repeated = self._repeated.setdefault((endpoint, sql), {"requests": 0, "max_per_request": 0})
+                    repeated["requests"] += 1
+                    repeated["max_per_request"] = max(repeated["max_per_request"], calls)
+
+    def _record_slow(self, sql, seconds, endpoint):
+        logger.warning("Slow query (%.1f ms) in %s: %s", seconds * 1000, endpoint, sql)
+        self._slow.append({"endpoint": endpoint, "ms": round(seconds * 1000, 2), "sql": sql})
+        if len(self._slow) > MAX_SLOW_QUERIES * 2:
+            self._slow.sort(key=lambda item: -item["ms"])
+            del self._slow[MAX_SLOW_QUERIES:]
+
+    def snapshot(self):
+        """Return the statistics collected since the last reset as a JSON-serializable dict."""
+        with self._lock:
+            endpoints = {}
+            for name, stats in sorted(self._endpoints.items()):
+                latencies = stats.latency.values
+                requests = stats.latency.seen
+                endpoints[name] = {
+                    "requests": requests,
+                    "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+                    "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+                    "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+                    "queries_per_request": round(stats.queries / requests, 2),
+                    "max_queries": stats.max_queries,
+                    "query_ms_per_request": round(stats.query_seconds / requests * 1000, 2),
+                    "statements_per_request": {
+                        sql: round(calls / requests, 2) for sql, calls in stats.statements.most_common()
+                    },
+                }
+            statements = sorted(self._statements.items(), key=lambda item: -item[1].seconds)
+            return {
+                "since": self._started,
+                "endpoints": endpoints,
+                "statements": [
+                    {
+                        "sql": sql,
+                        "calls": stats.calls,
+                        "total_ms": round(stats.seconds * 1000, 2),
+                        "mean_ms": round(stats.seconds / stats.calls * 1000, 3),
+                        "max_ms": round(stats.max_seconds * 1000, 2),
+                        "endpoints": dict(stats.endpoints),
+                    }
+                    for sql, stats in statements[:TOP_STATEMENTS]
+                ],
+                "slow_queries": sorted(self._slow, key=lambda item: -item["ms"])[:MAX_SLOW_QUERIES],
+                "repeated_statements": [
+                    {"endpoint": endpoint, "sql": sql, **counts}
+                    for (endpoint, sql), counts in sorted(self._repeated.items())
+                ],
+            }
+
+
+def create_profiler(config):
+    """Return a QueryProfiler configured from `config`, or None if profiling is off."""
+    if not config.PROFILE_QUERIES:
+        return None
+    return QueryProfiler(config.PROFILE_SLOW_QUERY_MS, config.PROFILE_REPEAT_THRESHOLD)
+
+
+def init_profiling(app, db, profiler):
+    """Profile the Flask app's engines and requests, and serve the snapshot."""
+    with app.app_context():
+        for engine in db.engines.values():
+            profiler.instrument(engine)
+
+    @app.before_request
+    def start_profile():
+        if request.path != PROFILE_PATH:
+            g.profile = (profiler.start_request(), time.perf_counter())
+
+    @app.teardown_request
+    def finish_profile(exc):
+        profile = g.pop("profile", None)
+        if profile is not None:
+            token, start = profile
+            rule = request.url_rule.rule if request.url_rule else "<unmatched>"
+            profiler.finish_request(token, f"{request.method} {rule}", time.perf_counter() - start)
+
+    @app.route(PROFILE_PATH, methods=["GET", "DELETE"])
+    def profile():
+        if request.method == "DELETE":
+            profiler.reset()
+            return "", 204
+        return jsonify(profiler.snapshot())
+
+
+class ProfilingMiddleware:
+    """ASGI middleware recording each HTTP request in a QueryProfiler."""
+
+    def __init__(self, app, profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == PROFILE_PATH:
+            await self.app(scope, receive, send)
+            return
+        token = self.profiler.start_request()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # The router stores the matched route in the scope.
+            route = getattr(scope.get("route"), "path", "<unmatched>")
+            self.profiler.finish_request(token, f"{scope['method']} {route}", time.perf_counter() - start)
@@ -10,6 +10,7 @@ class UserSchema(Schema):
     email = fields.Email(required=True, validate=validate.Length(max=255))
     name = fields.Str(required=True, validate=validate.Length(min=1, max=255))
     created_at = fields.DateTime(dump_only=True)
+    updated_at = fields.DateTime(dump_only=True)
 
     @validates("email")
     def validate_email_format(self, value, **kwargs):
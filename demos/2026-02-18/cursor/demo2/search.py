@@ -0,0 +1,132 @@
+"""Full-text search over user names and emails (SQLite FTS5).
+
+`users_fts` is an external-content FTS5 table over `users(name, email)`: it
+stores only the inverted index, and triggers keep it in step with every
+insert, update and delete, including bulk and raw SQL writes. Each search
+term matches as a prefix ("ali" finds "Alice" and "alice@example.com"), and
+all terms must match. Prefix indexes for 2- and 3-character prefixes keep
+short queries fast.
+
+Results are ordered by BM25 relevance (name matches weigh more than email
+matches) or by id, newest first, and paginated with keyset cursors over
+`(score, id)`. Ordering by id lets FTS5 stop after one page; relevance
+ordering scores every match first.
+"""
+
+import re
+
+from sqlalchemy import text
+
+from pagination import InvalidCursor, decode_token, encode_token
+
+FTS_TABLE = "users_fts"
+ORDERS = ("rank", "id")
+# BM25 weights of the name and email columns
+NAME_WEIGHT = 10.0
+EMAIL_WEIGHT = 1.0
+
+_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        name, email,
+        content='users', content_rowid='id',
+        tokenize="unicode61 remove_diacritics 2",
+        prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON users BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, email) VALUES (new.id, new.name, new.email);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON users BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, email) VALUES ('delete', old.id, old.name, old.email);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, email ON users BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, email) VALUES ('delete', old.id, old.name, old.email);
+        INSERT INTO {FTS_TABLE}(rowid, name, email) VALUES (new.id, new.name, new.email);
+    END""",
+]
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def search_supported(session):
+    """Whether the session's database supports search (SQLite only)."""
+    return session.get_bind().dialect.name == "sqlite"
+
+
+def install_search(connection):
+    """Create the FTS table and its triggers, indexing existing users on first install."""
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": FTS_TABLE},
+    ).first()
+    if not exists:
+        connection.execute(text(_SCHEMA[0]))
+        connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    for statement in _SCHEMA[1:]:
+        connection.execute(text(statement))
+
+
+def match_expression(query):
+    """Turn user input into an FTS5 query: every word, as a quoted prefix, must match.
+
+    Returns None if the input has no searchable words.
+    """
+    terms = _TERM.findall(query)
+    if not terms:
+        return None
+    return " AND ".join(f'"{term}"*' for term in terms)
+
+
+def search_user_ids(session, query, per_page, order="rank", cursor=None):
+    """
+    Return `(ids, next_cursor)` for one page of users matching `query`.
+
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded.
+        ValueError: If `order` is not one of ORDERS.
+    """
+    if order not in ORDERS:
+        raise ValueError(f"order must be one of {', '.join(ORDERS)}")
+    match = match_expression(query)
+    if match is None:
+        return [], None
+
+    params = {"match": match, "limit": per_page + 1}
+    after = ""
+    if cursor:
+        position = decode_token(cursor)
+        try:
+            params["after_id"] = int(position["i"])
+            if order == "rank":
+                params["after_score"] = float(position["s"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidCursor("Invalid cursor") from e
+        if order == "rank":
+            after = "AND (score > :after_score OR (score = :after_score AND id > :after_id))"
+        else:
+            after = "AND rowid < :after_id"
+
+    if order == "rank":
+        sql = f"""
+            SELECT id, score FROM (
+                SELECT rowid AS id, bm25({FTS_TABLE}, {NAME_WEIGHT}, {EMAIL_WEIGHT}) AS score
+                FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match
+            ) WHERE 1 {after}
+            ORDER BY score, id LIMIT :limit
+        """
+    else:
+        sql = f"""
+            SELECT rowid AS id, NULL AS score FROM {FTS_TABLE}
+            WHERE {FTS_TABLE} MATCH :match {after}
+            ORDER BY rowid DESC LIMIT :limit
+        """
+    rows = session.execute(text(sql), params).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last_id, last_score = rows[-1]
+        position = {"i": last_id}
+        if order == "rank":
+            position["s"] = last_score
+        next_cursor = encode_token(position)
+    return [row[0] for row in rows], next_cursor
@@ -0,0 +1,57 @@
+"""Fast serialization of users for the read endpoints.
+
+`UserSchema.dump` walks marshmallow fields over hydrated ORM objects. Here the
+schema's dump fields are compiled once into `(key, attribute, converter)`
+triples, the queries select only those columns as row tuples, and rows are
+turned into dicts with the same keys, order and values as `UserSchema`.
+"""
+
+from marshmallow import fields
+
+from models import User
+from schemas import UserSchema
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def _identity(value):
+    return value
+
+
+# Converters for the field types UserSchema uses, matching their default
+# serialization. Any other field type fails at import time rather than
+# silently diverging from the schema.
+_CONVERTERS = (
+    (fields.DateTime, _isoformat),
+    (fields.Integer, _identity),
+    (fields.String, _identity),
+)
+
+
+def _compile(schema):
+    compiled = []
+    for key, field in schema.dump_fields.items():
+        for field_class, converter in _CONVERTERS:
+            if isinstance(field, field_class):
+                break
+        else:
+            raise TypeError(f"No fast serializer for {type(field).__name__} field {key!r}")
+        compiled.append((key, field.attribute or key, converter))
+    return tuple(compiled)
+
+
+USER_FIELDS = _compile(UserSchema())
+# Columns to select instead of whole User entities.
+USER_COLUMNS = tuple(getattr(User, attribute) for _, attribute, _ in USER_FIELDS)
+
+
+def dump_user(user):
+    """Serialize a row of `USER_COLUMNS` (or a User) exactly as `UserSchema().dump` would."""
+    return {key: converter(getattr(user, attribute)) for key, attribute, converter in USER_FIELDS}
+
+
+def dump_users(users):
+    """Serialize many rows, as `UserSchema(many=True).dump` would."""
+    return [dump_user(user) for user in users]
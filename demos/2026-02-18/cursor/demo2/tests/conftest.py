@@ -0,0 +1,39 @@
+"""Fixtures: the Flask app on a scratch SQLite database."""
+
+import os
+import tempfile
+
+import pytest
+
+# config.py reads DATABASE_URL when first imported, so it is set before app.py loads.
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="users-api-tests-"), "users.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["CACHE_URL"] = "memory://"
+
+from app import app, cache, db, init_db  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    """A test client on an empty database and cache."""
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+    init_db()
+    cache.clear()
+    return app.test_client()
+
+
+@pytest.fixture
+def create_user(client):
+    """Create a user through the API and return its payload."""
+
+    def create(email, name="Test User"):
+        response = client.post("/api/users", json={"email": email, "name": name})
+        assert response.status_code == 201, response.get_json()
+        return response.get_json()
+
+    return create
@@ -0,0 +1,52 @@
+"""Tests for the ASGI deployment; skipped without its optional dependencies."""
+
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("aiosqlite")
+pytest.importorskip("httpx")
+
+from starlette.testclient import TestClient  # noqa: E402
+
+import asgi  # noqa: E402
+
+
+@pytest.fixture
+def asgi_client(client):
+    """A client for the ASGI app on the same scratch database as `client`."""
+    asgi.cache.clear()
+    # Leaving the block runs the lifespan, which disposes the engine before
+    # the next test replaces the database file.
+    with TestClient(asgi.app) as c:
+        yield c
+
+
+def test_duplicate_email_differing_in_case_is_rejected(asgi_client):
+    assert asgi_client.post("/api/users", json={"email": "taken@example.com", "name": "A"}).status_code == 201
+
+    response = asgi_client.post("/api/users", json={"email": "TAKEN@example.com", "name": "B"})
+
+    assert response.status_code == 400
+    assert response.json() == {"error": "Email already in use"}
+
+
+def test_crud_round_trip(asgi_client):
+    user = asgi_client.post("/api/users", json={"email": "A@example.com", "name": " A "}).json()
+    assert (user["email"], user["name"]) == ("a@example.com", "A")
+
+    first = asgi_client.get(f"/api/users/{user['id']}")
+    assert asgi_client.get(f"/api/users/{user['id']}", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    assert asgi_client.put(f"/api/users/{user['id']}", json={"name": "B"}).json()["name"] == "B"
+    assert asgi_client.get(f"/api/users/{user['id']}").json()["name"] == "B"
+    assert asgi_client.get("/api/users").json()["users"][0]["name"] == "B"
+
+    assert asgi_client.delete(f"/api/users/{user['id']}").status_code == 204
+    assert asgi_client.get(f"/api/users/{user['id']}").status_code == 404
+
+
+def test_page_parameter_is_rejected(asgi_client):
+    response = asgi_client.get("/api/users?page=2")
+
+    assert response.status_code == 400
+    assert "cursor" in response.json()["error"]
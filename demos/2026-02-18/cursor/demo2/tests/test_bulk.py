@@ -0,0 +1,126 @@
+"""Tests for the /api/users/bulk endpoints."""
+
+import orjson
+
+import app as users_app
+from app import LIST_VERSION_KEY
+
+NDJSON = {"Content-Type": "application/x-ndjson"}
+
+
+def ndjson(*lines):
+    return b"\n".join(line if isinstance(line, bytes) else orjson.dumps(line) for line in lines)
+
+
+def errors_by_index(body):
+    return {result["index"]: result["errors"] for result in body["results"] if "errors" in result}
+
+
+def test_create_all_ok(client):
+    response = client.post("/api/users/bulk", json=[
+        {"email": "a@example.com", "name": "A"},
+        {"email": "b@example.com", "name": "B"},
+    ])
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert (body["succeeded"], body["failed"]) == (2, 0)
+    emails = {user["email"] for user in client.get("/api/users").get_json()["users"]}
+    assert emails == {"a@example.com", "b@example.com"}
+
+
+def test_partial_failure_is_207_with_per_item_errors(client, create_user):
+    create_user("taken@example.com")
+
+    response = client.post("/api/users/bulk", json=[
+        {"email": "new@example.com", "name": "New"},
+        {"email": "TAKEN@example.com", "name": "Clash with the database"},
+        {"email": "dup@example.com", "name": "First"},
+        {"email": "Dup@Example.com", "name": "Duplicate in the request"},
+        {"email": "not-an-email", "name": "Invalid"},
+        "not an object",
+    ])
+
+    assert response.status_code == 207
+    body = response.get_json()
+    assert (body["succeeded"], body["failed"]) == (2, 4)
+    assert [result["index"] for result in body["results"]] == [0, 1, 2, 3, 4, 5]
+    errors = errors_by_index(body)
+    assert errors[1] == {"email": ["Email already in use"]}
+    assert errors[3] == {"email": ["Duplicate email in request"]}
+    assert "email" in errors[4]
+    assert errors[5] == {"_schema": ["Invalid input type."]}
+
+
+def test_malformed_ndjson_lines_fail_alone(client):
+    body = ndjson(
+        {"email": "a@example.com", "name": "A"},
+        b"{not json",
+        b"",
+        b"   ",
+        {"email": "b@example.com", "name": "B"},
+    )
+
+    response = client.post("/api/users/bulk", data=body, headers=NDJSON)
+
+    assert response.status_code == 207
+    result = response.get_json()
+    assert (result["succeeded"], result["failed"]) == (2, 1)
+    assert errors_by_index(result) == {1: {"_schema": ["Invalid JSON"]}}
+
+
+def test_update_checks_ids_and_emails(client, create_user):
+    a = create_user("a@example.com", "A")
+    b = create_user("b@example.com", "B")
+
+    response = client.put("/api/users/bulk", data=ndjson(
+        {"id": a["id"], "name": "Renamed"},
+        {"id": True, "name": "Bool id"},
+        {"id": b["id"], "email": "A@example.com"},
+        {"id": a["id"], "name": "Same id twice"},
+        {"id": 999, "name": "Missing"},
+    ), headers=NDJSON)
+
+    assert response.status_code == 207
+    errors = errors_by_index(response.get_json())
+    assert errors == {
+        1: {"id": ["Missing or invalid id."]},
+        2: {"email": ["Email already in use"]},
+        3: {"id": ["Duplicate id in request"]},
+        4: {"id": ["User not found"]},
+    }
+    assert client.get(f"/api/users/{a['id']}").get_json()["name"] == "Renamed"
+    assert client.get(f"/api/users/{b['id']}").get_json()["email"] == "b@example.com"
+
+
+def test_delete_rejects_bool_ids(client, create_user):
+    user = create_user("a@example.com")
+
+    response = client.delete("/api/users/bulk", json=[True, {"id": False}, user["id"], user["id"]])
+
+    assert response.status_code == 207
+    errors = errors_by_index(response.get_json())
+    assert errors == {
+        0: {"id": ["Missing or invalid id."]},
+        1: {"id": ["Missing or invalid id."]},
+        3: {"id": ["User not found"]},
+    }
+    assert client.get(f"/api/users/{user['id']}").status_code == 404
+
+
+def test_body_must_be_an_array_or_ndjson(client):
+    assert client.post("/api/users/bulk", json={"email": "a@example.com"}).status_code == 400
+
+
+def test_cache_is_kept_when_nothing_succeeded(client, create_user):
+    create_user("a@example.com")
+    version = users_app.cache.counter(LIST_VERSION_KEY)
+
+    response = client.post("/api/users/bulk", json=[{"email": "a@example.com", "name": "Again"}, {"name": "No email"}])
+
+    assert response.status_code == 207
+    assert response.get_json()["succeeded"] == 0
+    assert users_app.cache.counter(LIST_VERSION_KEY) == version
+
+    client.post("/api/users/bulk", json=[{"email": "b@example.com", "name": "B"}])
+    assert users_app.cache.counter(LIST_VERSION_KEY) == version + 1
@@ -0,0 +1,48 @@
+"""Tests for the payload cache and its invalidation."""
+
+from sqlalchemy import text
+
+import app as users_app
+from app import app, db
+from cache import LRUCache
+
+
+def test_get_is_served_from_cache_until_a_write(client, create_user):
+    user = create_user("cached@example.com", "Before")
+    first = client.get(f"/api/users/{user['id']}")
+
+    assert client.get(f"/api/users/{user['id']}", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    client.put(f"/api/users/{user['id']}", json={"name": "After"})
+    assert client.get(f"/api/users/{user['id']}").get_json()["name"] == "After"
+
+
+def test_read_racing_a_write_does_not_cache_a_stale_payload(client, create_user, monkeypatch):
+    """A payload read before a concurrent write commits must not be served after it."""
+    user = create_user("race@example.com", "Old")
+    real_set = users_app.cache.set
+
+    def set_after_concurrent_write(key, value):
+        # The reader has its (old) row; another request commits a rename and
+        # invalidates before the reader stores it.
+        with db.engine.begin() as connection:
+            connection.execute(text("UPDATE users SET name = 'New' WHERE id = :id"), {"id": user["id"]})
+        users_app.invalidate_users(user["id"])
+        real_set(key, value)
+
+    monkeypatch.setattr(users_app.cache, "set", set_after_concurrent_write)
+    with app.test_request_context():
+        assert users_app.load_user_entry(user["id"])["body"]["name"] == "Old"
+    monkeypatch.undo()
+
+    assert client.get(f"/api/users/{user['id']}").get_json()["name"] == "New"
+
+
+def test_lru_counters_survive_eviction():
+    cache = LRUCache(max_entries=1)
+    cache.incr_many(["a", "b", "a"])
+    cache.set("x", 1)
+    cache.set("y", 2)
+
+    assert (cache.counter("a"), cache.counter("b"), cache.counter("c")) == (2, 1, 0)
+    assert cache.get("x") is None and cache.get("y") == 2
@@ -0,0 +1,122 @@
+"""Tests for the /api/users/changes feed and its handoff from the export."""
+
+import threading
+import time
+
+import orjson
+
+from config import Config
+
+
+def changes(client, since=None, **params):
+    if since:
+        params["since"] = since
+    response = client.get("/api/users/changes", query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_page_keeps_the_latest_change_per_user(client, create_user):
+    a = create_user("a@example.com", "A")
+    b = create_user("b@example.com", "B")
+    client.put(f"/api/users/{a['id']}", json={"name": "A2"})
+    client.put(f"/api/users/{a['id']}", json={"name": "A3"})
+
+    page = changes(client)
+
+    assert [(change["id"], change["op"]) for change in page["changes"]] == [(b["id"], "create"), (a["id"], "update")]
+    assert page["changes"][1]["user"]["name"] == "A3"
+    assert page["has_more"] is False
+
+
+def test_deleted_users_are_tombstones(client, create_user):
+    user = create_user("gone@example.com")
+    head = changes(client)["next"]
+    client.delete(f"/api/users/{user['id']}")
+
+    page = changes(client, head)
+
+    assert page["changes"] == [
+        {"op": "delete", "id": user["id"], "changed_at": page["changes"][0]["changed_at"], "user": None}
+    ]
+
+
+def test_created_then_deleted_user_is_a_tombstone(client, create_user):
+    user = create_user("brief@example.com")
+    client.delete(f"/api/users/{user['id']}")
+
+    [change] = changes(client)["changes"]
+
+    assert (change["op"], change["user"]) == ("delete", None)
+
+
+def test_pages_hand_off_with_next_tokens(client, create_user):
+    ids = [create_user(f"user{i}@example.com")["id"] for i in range(5)]
+
+    seen = []
+    token = None
+    while True:
+        page = changes(client, token, per_page=2)
+        seen.extend(change["id"] for change in page["changes"])
+        token = page["next"]
+        if not page["has_more"]:
+            break
+
+    assert seen == ids
+    assert changes(client, token) == {"changes": [], "next": token, "has_more": False}
+
+    client.put(f"/api/users/{ids[0]}", json={"name": "Later"})
+    assert [change["id"] for change in changes(client, token)["changes"]] == [ids[0]]
+
+
+def test_invalid_token_is_400(client):
+    response = client.get("/api/users/changes?since=nonsense")
+
+    assert response.status_code == 400
+
+
+def test_wait_returns_as_soon_as_this_process_commits(client, create_user, monkeypatch):
+    """A long poll should be woken by the commit, not by its periodic re-check."""
+    monkeypatch.setattr(Config, "CHANGES_POLL_INTERVAL", 10)
+    head = changes(client)["next"]
+    result = {}
+
+    def poll():
+        started = time.monotonic()
+        result["page"] = changes(client.application.test_client(), head, wait=10)
+        result["seconds"] = time.monotonic() - started
+
+    poller = threading.Thread(target=poll)
+    poller.start()
+    time.sleep(0.2)
+    create_user("late@example.com")
+    poller.join(timeout=5)
+
+    assert not poller.is_alive()
+    assert [change["user"]["email"] for change in result["page"]["changes"]] == ["late@example.com"]
+    assert result["seconds"] < 2
+
+
+def test_export_token_hands_off_to_the_feed(client, create_user):
+    """Applying the export and then the feed from its token should give the current table."""
+    a = create_user("a@example.com", "A")
+    b = create_user("b@example.com", "B")
+
+    export = client.get("/api/users/export")
+    token = export.headers["X-Changes-Token"]
+    replica = {user["id"]: user for user in map(orjson.loads, export.data.splitlines())}
+
+    client.put(f"/api/users/{b['id']}", json={"name": "B2"})
+    c = create_user("c@example.com", "C")
+    client.delete(f"/api/users/{b['id']}")
+
+    page = changes(client, token)
+    for change in page["changes"]:
+        if change["user"] is None:
+            replica.pop(change["id"], None)
+        else:
+            replica[change["id"]] = change["user"]
+
+    current = client.get("/api/users/export")
+    assert replica == {user["id"]: user for user in map(orjson.loads, current.data.splitlines())}
+    assert set(replica) == {a["id"], c["id"]}
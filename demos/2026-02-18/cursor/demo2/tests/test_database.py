@@ -0,0 +1,115 @@
+"""Tests for the SQLite connection pragmas and read-replica routing."""
+
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import create_engine, text
+
+from config import Config
+from database import REPLICA_BIND, RoutingSession, configure_engines, install_pragmas
+
+
+def pragma(connection, name):
+    return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_new_connections_get_wal_and_busy_timeout(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    install_pragmas(engine, Config.SQLITE_PRAGMAS)
+
+    with engine.connect() as connection:
+        assert pragma(connection, "journal_mode") == "wal"
+        assert pragma(connection, "busy_timeout") == 5000
+        assert pragma(connection, "synchronous") == 1  # NORMAL
+    engine.dispose()
+
+
+@pytest.mark.parametrize("url, read_only", [("replica.db", True), (":memory:", False)])
+def test_journal_mode_is_left_alone_where_wal_is_unavailable(tmp_path, url, read_only):
+    engine = create_engine("sqlite:///" + (url if url == ":memory:" else str(tmp_path / url)))
+    install_pragmas(engine, Config.SQLITE_PRAGMAS, read_only=read_only)
+
+    with engine.connect() as connection:
+        assert pragma(connection, "journal_mode") != "wal"
+        assert pragma(connection, "busy_timeout") == 5000
+    engine.dispose()
+
+
+@pytest.fixture
+def routed(tmp_path):
+    """An app whose replica bind is a separate database, so reads show where they went."""
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'primary.db'}",
+        SQLALCHEMY_BINDS={REPLICA_BIND: f"sqlite:///{tmp_path / 'replica.db'}"},
+        SQLITE_PRAGMAS=Config.SQLITE_PRAGMAS,
+    )
+    db = SQLAlchemy(app, session_options={"class_": RoutingSession})
+
+    class Note(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        body = db.Column(db.String(80))
+
+    configure_engines(app, db)
+    with app.app_context():
+        for engine in db.engines.values():
+            db.metadata.create_all(engine)
+            with engine.begin() as connection:
+                connection.execute(text("INSERT INTO note (body) VALUES (:body)"), {"body": engine.url.database})
+    yield app, db, Note
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def bodies(db, Note):
+    return [note.body.rsplit("/", 1)[-1] for note in db.session.execute(db.select(Note)).scalars()]
+
+
+@pytest.mark.parametrize("method", ["GET", "HEAD", "OPTIONS"])
+def test_safe_requests_read_from_the_replica(routed, method):
+    app, db, Note = routed
+
+    with app.test_request_context(method=method):
+        assert bodies(db, Note) == ["replica.db"]
+        assert db.session.get_bind() is db.engines[REPLICA_BIND]
+
+
+@pytest.mark.parametrize("method", ["POST", "PUT", "PATCH", "DELETE"])
+def test_writing_requests_use_the_primary(routed, method):
+    app, db, Note = routed
+
+    with app.test_request_context(method=method):
+        assert bodies(db, Note) == ["primary.db"]
+
+
+def test_outside_requests_use_the_primary(routed):
+    app, db, Note = routed
+
+    with app.app_context():
+        assert bodies(db, Note) == ["primary.db"]
+
+
+def test_flushes_during_safe_requests_go_to_the_primary(routed):
+    app, db, Note = routed
+
+    with app.test_request_context(method="GET"):
+        db.session.add(Note(body="written"))
+        db.session.commit()
+
+    with app.app_context():
+        assert bodies(db, Note) == ["primary.db", "written"]
+        with db.engines[REPLICA_BIND].connect() as connection:
+            assert connection.execute(text("SELECT count(*) FROM note")).scalar() == 1
+
+
+def test_replica_bind_is_opened_without_wal(routed):
+    app, db, Note = routed
+
+    with app.app_context():
+        with db.engines[REPLICA_BIND].connect() as connection:
+            assert pragma(connection, "journal_mode") != "wal"
+            assert pragma(connection, "busy_timeout") == 5000
+        with db.engine.connect() as connection:
+            assert pragma(connection, "journal_mode") == "wal"
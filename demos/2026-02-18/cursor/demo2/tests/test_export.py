@@ -0,0 +1,110 @@
+"""Tests for the /api/users/export stream."""
+
+import csv
+import gzip
+import io
+
+import orjson
+import pytest
+from sqlalchemy import text
+
+from app import app, db
+from export import iter_export
+from serializers import USER_FIELDS
+
+HEADER = [key for key, _, _ in USER_FIELDS]
+
+
+def export(client, **params):
+    response = client.get("/api/users/export", query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return response
+
+
+def emails(response):
+    return [user["email"] for user in map(orjson.loads, response.data.splitlines())]
+
+
+def set_updated_at(timestamps):
+    with app.app_context():
+        for user_id, value in timestamps.items():
+            db.session.execute(text("UPDATE users SET updated_at = :value WHERE id = :id"), {"id": user_id, "value": value})
+        db.session.commit()
+
+
+def test_ndjson_lists_every_user_by_id(client, create_user):
+    for name in "abc":
+        create_user(f"{name}@example.com", name.upper())
+
+    response = export(client)
+
+    assert response.mimetype == "application/x-ndjson"
+    assert response.headers["Content-Disposition"] == 'attachment; filename="users.ndjson"'
+    assert emails(response) == ["a@example.com", "b@example.com", "c@example.com"]
+    first = orjson.loads(response.data.splitlines()[0])
+    assert first == client.get(f"/api/users/{first['id']}").get_json()
+
+
+def test_csv_has_a_header_even_without_rows(client):
+    response = export(client, format="csv")
+
+    assert response.mimetype == "text/csv"
+    assert list(csv.reader(io.StringIO(response.get_data(as_text=True)))) == [HEADER]
+
+
+def test_csv_rows_follow_the_header(client, create_user):
+    create_user("a@example.com", 'Comma, "Quoted"')
+
+    rows = list(csv.DictReader(io.StringIO(export(client, format="csv").get_data(as_text=True))))
+
+    assert [(row["email"], row["name"]) for row in rows] == [("a@example.com", 'Comma, "Quoted"')]
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+def test_gzip_round_trips(client, create_user, fmt):
+    for i in range(5):
+        create_user(f"user{i}@example.com")
+    plain = export(client, format=fmt).data
+
+    response = client.get("/api/users/export", query_string={"format": fmt}, headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(response.data) == plain
+
+
+def test_one_chunk_per_batch(client, create_user):
+    for i in range(5):
+        create_user(f"user{i}@example.com")
+
+    with app.app_context():
+        chunks = list(iter_export(db.session, "ndjson", batch_size=2))
+
+    assert [chunk.count(b"\n") for chunk in chunks] == [2, 2, 1]
+
+
+@pytest.mark.parametrize(
+    "since",
+    ["2024-01-02T00:00:00", "2024-01-02 00:00:00", "2024-01-02T00:00:00Z", "2024-01-02T02:00:00+02:00"],
+)
+def test_updated_since_is_inclusive(client, create_user, since):
+    ids = [create_user(f"{name}@example.com")["id"] for name in ("old", "edge", "new", "newest")]
+    set_updated_at({
+        ids[0]: "2024-01-01 23:59:59.999999",
+        ids[1]: "2024-01-02 00:00:00",
+        ids[3]: "2024-01-02 00:00:01",
+        ids[2]: "2024-01-03 00:00:00",
+    })
+
+    response = export(client, updated_since=since)
+
+    # Oldest change first
+    assert emails(response) == ["edge@example.com", "newest@example.com", "new@example.com"]
+
+
+@pytest.mark.parametrize("params", [{"updated_since": "yesterday"}, {"updated_since": "2024-13-01"}, {"format": "xml"}])
+def test_bad_parameters_are_400(client, params):
+    response = client.get("/api/users/export", query_string=params)
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
@@ -0,0 +1,96 @@
+"""Tests for keyset pagination of GET /api/users."""
+
+import pytest
+from sqlalchemy import text
+
+from app import app, db
+from pagination import encode_token
+
+
+def insert_raw(rows):
+    """Insert `(email, created_at)` rows with raw SQL, bypassing the ORM."""
+    with app.app_context():
+        db.session.execute(
+            text("INSERT INTO users (email, name, created_at, updated_at) VALUES (:email, 'Raw', :at, :at)"),
+            [{"email": email, "at": created_at} for email, created_at in rows],
+        )
+        db.session.commit()
+
+
+def stored_timestamps():
+    with app.app_context():
+        return db.session.execute(text("SELECT created_at, updated_at FROM users ORDER BY id")).all()
+
+
+def walk(client, direction, cursor=None, per_page=10):
+    """Follow `direction` cursors from `cursor`; return each page's ids."""
+    pages = []
+    while True:
+        response = client.get("/api/users", query_string={"per_page": per_page, "cursor": cursor or ""})
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        pages.append([user["id"] for user in body["users"]])
+        cursor = body["pagination"][direction]
+        if cursor is None:
+            return pages, body
+        assert len(pages) < 50, "cursor does not advance"
+
+
+def test_pages_forward_and_back_through_tied_timestamps(client, create_user):
+    # Rows written without microseconds, as CURRENT_TIMESTAMP or an import would.
+    insert_raw([(f"raw{i}@example.com", "2026-01-01 10:00:00") for i in range(25)])
+    create_user("api@example.com")
+    insert_raw([("t@example.com", "2026-01-01T09:00:00"), ("tz@example.com", "2026-01-01 12:00:00+02:00")])
+
+    pages, last = walk(client, "next")
+    ids = [user_id for page in pages for user_id in page]
+
+    assert [len(page) for page in pages] == [10, 10, 8]
+    assert sorted(ids) == list(range(1, 29))
+    # Newest first; ties on created_at by id, descending.
+    assert ids[:2] == [26, 28]  # the API user, then 12:00+02:00 (10:00 UTC, but written later)
+    assert ids[2:27] == list(range(25, 0, -1))
+    assert ids[27] == 27
+    assert last["pagination"]["prev"] is not None
+
+    back, first = walk(client, "prev", last["pagination"]["prev"])
+    assert back == pages[-2::-1]
+    assert first["pagination"]["prev"] is None
+
+
+def test_timestamps_are_stored_in_cursor_order(client):
+    insert_raw([("a@example.com", "2026-01-01 10:00:00"), ("b@example.com", "2026-01-01T10:00:00.5Z")])
+
+    assert stored_timestamps() == [
+        ("2026-01-01 10:00:00.000000", "2026-01-01 10:00:00.000000"),
+        ("2026-01-01 10:00:00.500000", "2026-01-01 10:00:00.500000"),
+    ]
+
+    with app.app_context():
+        db.session.execute(text("UPDATE users SET created_at = '2026-02-01 08:00' WHERE id = 1"))
+        db.session.commit()
+    assert stored_timestamps()[0][0] == "2026-02-01 08:00:00.000000"
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["not a cursor!", encode_token({"c": "yesterday", "i": 1, "d": "next"}), encode_token({"c": "2026-01-01", "i": 1, "d": "up"})],
+)
+def test_invalid_cursor_is_rejected(client, cursor):
+    response = client.get("/api/users", query_string={"cursor": cursor})
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid cursor"}
+
+
+def test_counts(client, create_user):
+    for i in range(3):
+        create_user(f"user{i}@example.com")
+
+    exact = client.get("/api/users?count=exact").get_json()["pagination"]
+    estimate = client.get("/api/users?count=estimate").get_json()["pagination"]
+
+    assert exact["total"] == 3 and "total_is_estimate" not in exact
+    assert estimate["total"] >= 3 and estimate["total_is_estimate"] is True
+    assert "total" not in client.get("/api/users").get_json()["pagination"]
+    assert client.get("/api/users?count=all").status_code == 400
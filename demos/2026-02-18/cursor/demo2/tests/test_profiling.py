@@ -0,0 +1,139 @@
+"""Tests for the query profiler, its Flask hooks and its ASGI middleware."""
+
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import create_engine, text
+
+from profiling import PROFILE_PATH, ProfilingMiddleware, QueryProfiler, init_profiling, normalize_sql
+
+
+@pytest.mark.parametrize(
+    "statement, normalized",
+    [
+        ("SELECT *\n  FROM users\tWHERE id = ?", "SELECT * FROM users WHERE id = ?"),
+        ("SELECT * FROM users WHERE id IN (?, ?, ?)", "SELECT * FROM users WHERE id IN (?, ...)"),
+        ("SELECT * FROM users WHERE id IN (?,?)", "SELECT * FROM users WHERE id IN (?, ...)"),
+        ("DELETE FROM users WHERE id IN (:id_1, :id_2)", "DELETE FROM users WHERE id IN (?, ...)"),
+        ("SELECT 1 WHERE x IN (%(a)s, %(b)s)", "SELECT 1 WHERE x IN (?, ...)"),
+        ("SELECT * FROM users WHERE id IN (?)", "SELECT * FROM users WHERE id IN (?)"),
+        ("INSERT INTO t (a, b) VALUES (?, ?)", "INSERT INTO t (a, b) VALUES (?, ...)"),
+    ],
+)
+def test_normalize_sql(statement, normalized):
+    assert normalize_sql(statement) == normalized
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    yield engine
+    engine.dispose()
+
+
+def run_request(profiler, engine, endpoint, *statements):
+    token = profiler.start_request()
+    with engine.connect() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+    profiler.finish_request(token, endpoint, 0.01)
+
+
+def test_finish_request_counts_queries_and_repeats(engine):
+    profiler = QueryProfiler(slow_query_ms=10_000, repeat_threshold=2)
+    profiler.instrument(engine)
+
+    run_request(profiler, engine, "GET /a", "SELECT 1", "SELECT  1", "SELECT 1", "SELECT 2")
+    run_request(profiler, engine, "GET /a", "SELECT 2")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 3"))  # outside any request: not recorded
+
+    snapshot = profiler.snapshot()
+    endpoint = snapshot["endpoints"]["GET /a"]
+    assert endpoint["requests"] == 2
+    assert endpoint["queries_per_request"] == 2.5
+    assert endpoint["max_queries"] == 4
+    assert endpoint["statements_per_request"] == {"SELECT 1": 1.5, "SELECT 2": 1.0}
+    assert {s["sql"]: s["calls"] for s in snapshot["statements"]} == {"SELECT 1": 3, "SELECT 2": 2}
+    assert snapshot["repeated_statements"] == [
+        {"endpoint": "GET /a", "sql": "SELECT 1", "requests": 1, "max_per_request": 3}
+    ]
+    assert snapshot["slow_queries"] == []
+
+
+def test_slow_queries_are_logged_and_kept(engine, caplog):
+    profiler = QueryProfiler(slow_query_ms=0)
+    profiler.instrument(engine)
+
+    with caplog.at_level(logging.WARNING, logger="profiling"):
+        run_request(profiler, engine, "GET /slow", "SELECT 1")
+
+    [slow] = profiler.snapshot()["slow_queries"]
+    assert (slow["endpoint"], slow["sql"]) == ("GET /slow", "SELECT 1")
+    assert "Slow query" in caplog.text
+
+
+def test_reset_clears_everything(engine):
+    profiler = QueryProfiler(slow_query_ms=0)
+    profiler.instrument(engine)
+    run_request(profiler, engine, "GET /a", "SELECT 1", "SELECT 1")
+
+    profiler.reset()
+
+    snapshot = profiler.snapshot()
+    assert (snapshot["endpoints"], snapshot["statements"], snapshot["slow_queries"], snapshot["repeated_statements"]) == (
+        {}, [], [], []
+    )
+
+
+def test_flask_hooks_record_routes_and_serve_the_snapshot():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db = SQLAlchemy(app)
+
+    @app.route("/things/<int:thing_id>")
+    def thing(thing_id):
+        db.session.execute(text("SELECT :id"), {"id": thing_id})
+        return {"id": thing_id}
+
+    profiler = QueryProfiler()
+    init_profiling(app, db, profiler)
+    client = app.test_client()
+
+    client.get("/things/1")
+    client.get("/things/2")
+    client.get("/nowhere")
+
+    endpoints = client.get(PROFILE_PATH).get_json()["endpoints"]
+    assert endpoints["GET /things/<int:thing_id>"]["queries_per_request"] == 1
+    assert endpoints["GET /things/<int:thing_id>"]["requests"] == 2
+    assert endpoints["GET <unmatched>"]["queries_per_request"] == 0
+    assert PROFILE_PATH not in "".join(endpoints)
+
+    assert client.delete(PROFILE_PATH).status_code == 204
+    assert client.get(PROFILE_PATH).get_json()["endpoints"] == {}
+
+
+def test_asgi_middleware_records_the_matched_route(engine):
+    profiler = QueryProfiler()
+    profiler.instrument(engine)
+
+    async def app(scope, receive, send):
+        scope["route"] = SimpleNamespace(path="/things/{id}")
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    async def call(path):
+        await ProfilingMiddleware(app, profiler)({"type": "http", "method": "GET", "path": path}, None, None)
+
+    asyncio.run(call("/things/1"))
+    asyncio.run(call(PROFILE_PATH))
+
+    endpoints = profiler.snapshot()["endpoints"]
+    assert list(endpoints) == ["GET /things/{id}"]
+    assert endpoints["GET /things/{id}"]["requests"] == 1
+    assert endpoints["GET /things/{id}"]["queries_per_request"] == 1
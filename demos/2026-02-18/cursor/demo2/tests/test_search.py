@@ -0,0 +1,119 @@
+"""Tests for full-text search: the FTS triggers and /api/users/search."""
+
+import pytest
+from sqlalchemy import text
+
+from app import app, db
+from search import match_expression
+
+
+def search(client, q, **params):
+    response = client.get("/api/users/search", query_string={"q": q, **params})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def names(client, q, **params):
+    return sorted(user["name"] for user in search(client, q, **params)["users"])
+
+
+def fts_rows():
+    with app.app_context():
+        return db.session.execute(text("SELECT rowid, name, email FROM users_fts ORDER BY rowid")).all()
+
+
+def test_triggers_follow_api_writes(client, create_user):
+    alice = create_user("alice@example.com", "Alice Liddell")
+    create_user("bob@example.com", "Bob Builder")
+    assert names(client, "alice") == ["Alice Liddell"]
+
+    client.put(f"/api/users/{alice['id']}", json={"name": "Alicia Keys"})
+    assert names(client, "liddell") == []
+    assert names(client, "keys") == ["Alicia Keys"]
+
+    client.delete(f"/api/users/{alice['id']}")
+    assert names(client, "alicia") == []
+    assert [row.name for row in fts_rows()] == ["Bob Builder"]
+
+
+def test_triggers_follow_bulk_and_raw_writes(client):
+    client.post("/api/users/bulk", json=[
+        {"email": f"user{i}@example.com", "name": f"Bulk Person{i}"} for i in range(3)
+    ])
+    assert names(client, "bulk") == ["Bulk Person0", "Bulk Person1", "Bulk Person2"]
+
+    client.put("/api/users/bulk", json=[{"id": 1, "name": "Renamed One"}])
+    client.delete("/api/users/bulk", json=[2])
+    with app.app_context():
+        db.session.execute(text("INSERT INTO users (email, name) VALUES ('raw@example.com', 'Raw Insert')"))
+        db.session.execute(text("UPDATE users SET email = 'moved@example.org' WHERE id = 3"))
+        db.session.commit()
+
+    assert names(client, "bulk") == ["Bulk Person2"]
+    assert names(client, "renamed") == ["Renamed One"]
+    assert names(client, "raw") == ["Raw Insert"]
+    assert names(client, "example org") == ["Bulk Person2"]
+    assert [(row.rowid, row.name) for row in fts_rows()] == [(1, "Renamed One"), (3, "Bulk Person2"), (4, "Raw Insert")]
+
+
+def test_terms_match_as_prefixes_and_all_must_match(client, create_user):
+    create_user("alice@example.com", "Alice Smith")
+    create_user("alan@example.com", "Alan Smithee")
+    create_user("zoe@example.net", "Zoë Ali")
+
+    assert names(client, "al") == ["Alan Smithee", "Alice Smith", "Zoë Ali"]
+    assert names(client, "al smith") == ["Alan Smithee", "Alice Smith"]
+    assert names(client, "zoe") == ["Zoë Ali"]  # diacritics are folded
+    assert names(client, "net") == ["Zoë Ali"]  # emails are indexed too
+
+
+@pytest.mark.parametrize("q, expected", [
+    ('"alice', ["Alice Smith"]),
+    ("ali*", ["Alice Smith"]),
+    ("^ali", ["Alice Smith"]),
+    ("-alice", ["Alice Smith"]),
+    # Operators and column filters are just more terms, which nothing matches.
+    ("alice OR bob", []),
+    ("NEAR(alice smith)", []),
+    ("name:alice", []),
+    # Nothing searchable left at all.
+    ('"', []),
+    ("(((", []),
+])
+def test_fts_syntax_in_q_is_neutralized(client, create_user, q, expected):
+    create_user("alice@example.com", "Alice Smith")
+
+    assert names(client, q) == expected
+
+
+def test_match_expression_quotes_every_term():
+    assert match_expression('NEAR("a" b*') == '"NEAR"* AND "a"* AND "b"*'
+    assert match_expression(" *\"() ") is None
+
+
+@pytest.mark.parametrize("order", ["rank", "id"])
+def test_cursors_page_through_every_match_once(client, order):
+    client.post("/api/users/bulk", json=[
+        # Repeated names give tied scores, which the id breaks.
+        {"email": f"p{i}@example.com", "name": "Paula Page" if i % 3 else "Paul"} for i in range(23)
+    ] + [{"email": "other@example.com", "name": "Other"}])
+
+    seen = []
+    cursor = None
+    while True:
+        body = search(client, "pau", order=order, per_page=5, **({"cursor": cursor} if cursor else {}))
+        seen.extend(user["id"] for user in body["users"])
+        cursor = body["pagination"]["next"]
+        if cursor is None:
+            break
+
+    assert sorted(seen) == list(range(1, 24))
+    if order == "id":
+        assert seen == list(range(23, 0, -1))
+
+
+def test_bad_requests(client):
+    assert client.get("/api/users/search").status_code == 400
+    assert client.get("/api/users/search?q=a&order=name").status_code == 400
+    assert client.get("/api/users/search?q=a&per_page=0").status_code == 400
+    assert client.get("/api/users/search?q=a&cursor=bogus").status_code == 400
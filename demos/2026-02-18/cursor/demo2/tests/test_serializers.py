@@ -0,0 +1,59 @@
+"""`serializers.dump_users` must produce exactly what `UserSchema` dumps."""
+
+from datetime import datetime
+
+import pytest
+from flask import Flask
+from sqlalchemy import insert, select, text
+
+from models import User, db
+from schemas import UserSchema
+from serializers import USER_COLUMNS, dump_user, dump_users
+
+USERS = [
+    {"email": "ascii@example.com", "name": "Plain Name",
+     "created_at": datetime(2024, 1, 2, 3, 4, 5), "updated_at": datetime(2024, 1, 2, 3, 4, 5)},
+    {"email": "unicode@example.com", "name": "Zoë Ångström 山田 🚀",
+     "created_at": datetime(2024, 5, 6, 7, 8, 9, 123456), "updated_at": datetime(2025, 1, 1, 0, 0, 0, 1)},
+    {"email": "nulls@example.com", "name": "No Timestamps", "created_at": None, "updated_at": None},
+]
+
+
+@pytest.fixture
+def session():
+    """An app context on a fresh in-memory SQLite database holding USERS."""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(User), USERS)
+        # Column defaults replace explicit Nones on insert; legacy rows can still hold NULL.
+        db.session.execute(
+            text("UPDATE users SET created_at = NULL, updated_at = NULL WHERE email = 'nulls@example.com'")
+        )
+        db.session.commit()
+        yield db.session
+        db.session.remove()
+
+
+def ordered(payloads):
+    """Payloads as lists of (key, value) pairs, so key order is compared too."""
+    return [list(payload.items()) for payload in payloads]
+
+
+def test_dump_users_matches_schema_for_rows(session):
+    users = session.scalars(select(User).order_by(User.id)).all()
+    rows = session.execute(select(*USER_COLUMNS).order_by(User.id)).all()
+
+    expected = UserSchema(many=True).dump(users)
+
+    assert ordered(dump_users(rows)) == ordered(expected)
+    assert [payload["name"] for payload in expected] == [user["name"] for user in USERS]
+    assert expected[1]["created_at"] == "2024-05-06T07:08:09.123456"
+    assert expected[2]["created_at"] is None and expected[2]["updated_at"] is None
+
+
+def test_dump_user_matches_schema_for_entities(session):
+    for user in session.scalars(select(User)):
+        assert list(dump_user(user).items()) == list(UserSchema().dump(user).items())
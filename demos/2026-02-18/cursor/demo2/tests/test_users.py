@@ -0,0 +1,28 @@
+"""Tests for the /api/users endpoints of the Flask app."""
+
+
+def test_duplicate_email_differing_in_case_is_rejected(client, create_user):
+    create_user("taken@example.com")
+
+    response = client.post("/api/users", json={"email": "Taken@Example.COM", "name": "Again"})
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Email already in use"}
+
+
+def test_emails_are_stored_normalized(client, create_user):
+    user = create_user("Mixed.Case@Example.com")
+    other = create_user("other@example.com")
+
+    assert user["email"] == "mixed.case@example.com"
+    response = client.put(f"/api/users/{other['id']}", json={"email": "MIXED.case@example.com"})
+    assert response.status_code == 400
+
+
+def test_page_parameter_is_rejected(client, create_user):
+    create_user("a@example.com")
+
+    response = client.get("/api/users?page=2")
+
+    assert response.status_code == 400
+    assert "cursor" in response.get_json()["error"]
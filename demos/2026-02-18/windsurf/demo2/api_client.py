@@ -1,20 +1,115 @@
-from typing import Any, Dict, List
+import time
+from typing import Any, Dict, List, Optional, Sequence, Type
 import requests
 
+from .graphql import (
+    MAX_PAGE_SIZE,
+    build_history_query,
+    build_repositories_query,
+    extract_history,
+    split_repo_name,
+    to_rest_repository,
+)
+from .instrumentation import RequestEvent, RequestHook, event_from_response
+from .projection import Record, decode_response, streaming_available
+
+API_URL = "https://api.github.com"
+
+
+def graphql_url_for(base_url: str) -> str:
+    """GraphQL endpoint of a REST API root.
+
+    github.com serves both under one root, but GitHub Enterprise Server
+    serves REST at `/api/v3` and GraphQL at `/api/graphql`.
+    """
+    base_url = base_url.rstrip("/")
+    if base_url.endswith("/api/v3"):
+        return base_url[: -len("/v3")] + "/graphql"
+    return f"{base_url}/graphql"
+
 class GitHubAPIClient:
     """Small wrapper around GitHub's REST API.
 
     The client authenticates using a personal access token (PAT) passed in via
     the `Authorization: token ...` header.
+
+    Besides the one-call-per-resource REST methods, the client offers a
+    GraphQL-backed batch mode (`get_repository_summaries` and friends) that
+    fetches repository metadata and commit history for several repositories in
+    a single round trip and returns the same dict shapes as the REST methods.
+
+    The repository and commit methods accept `fields` (dotted paths such as
+    `"commit.author.date"`) to keep only part of each object, and `record` (a
+    class from `projection.record_type`) to return `__slots__` records instead
+    of dicts. With the optional `ijson` package installed the projection is
+    applied while the body streams in, so unused fields are never decoded.
+
+    Every HTTP call is reported to the registered `hooks` (see
+    `instrumentation.MetricsCollector` for a ready-made latency/traffic
+    collector).
     """
 
-    def __init__(self, token: str) -> None:
+    def __init__(
+        self,
+        token: str,
+        hooks: Optional[Sequence[RequestHook]] = None,
+        base_url: str = API_URL,
+        session: Optional[requests.Session] = None,
+        graphql_url: Optional[str] = None,
+    ) -> None:
         """Create a new GitHub API client.
 
         Args:
             token: GitHub personal access token.
+            hooks: Optional request hooks notified after every HTTP call.
+            base_url: API root, e.g. a GitHub Enterprise or local fake server
+                URL.
+            session: Optional `requests.Session` to send requests through,
+                which reuses pooled connections across calls. By default each
+                call goes through `requests` directly.
+            graphql_url: GraphQL endpoint. By default it is derived from
+                `base_url` (see `graphql_url_for`).
         """
         self.token = token
+        self.hooks: List[RequestHook] = list(hooks or [])
+        self.base_url = base_url.rstrip("/")
+        self.session = session
+        self.graphql_url = graphql_url or graphql_url_for(self.base_url)
+
+    def add_hook(self, hook: RequestHook) -> None:
+        """Register a hook notified after every HTTP call."""
+        self.hooks.append(hook)
+
+    def _request(self, method: str, endpoint: str, url: str, **kwargs: Any) -> requests.Response:
+        """Send an authenticated request and report it to the hooks.
+
+        Args:
+            method: HTTP method, e.g. `"GET"`.
+            endpoint: Endpoint template used to group metrics, e.g.
+                `"/repos/{repo}/commits"`.
+            url: Full request URL.
+            **kwargs: Passed through to `requests`.
+        """
+        send = getattr(self.session or requests, method.lower())
+        headers = {"Authorization": f"token {self.token}"}
+        if not self.hooks:
+            return send(url, headers=headers, **kwargs)
+
+        start_time = time.time()
+        started = time.perf_counter()
+        try:
+            response = send(url, headers=headers, **kwargs)
+        except requests.RequestException as e:
+            event = RequestEvent(method, endpoint, url, start_time, time.perf_counter() - started, error=type(e).__name__)
+            self._notify(event)
+            raise
+        elapsed = time.perf_counter() - started
+        self._notify(event_from_response(method, endpoint, url, start_time, elapsed, response, kwargs.get("stream", False)))
+        return response
+
+    def _notify(self, event: RequestEvent) -> None:
+        for hook in self.hooks:
+            hook.on_request(event)
 
     def get_user(self) -> Dict[str, Any]:
         """Fetch the authenticated user's profile.
@@ -22,15 +117,19 @@ class GitHubAPIClient:
         Returns:
             JSON-decoded user object as returned by `GET /user`.
         """
-        response = requests.get("https://api.github.com/user", headers={"Authorization": f"token {self.token}"})
+        response = self._request("GET", "/user", f"{self.base_url}/user")
         return response.json()
 
-    def get_repositories(self) -> List[Dict[str, Any]]:
+    def get_repositories(self, fields: Optional[Sequence[str]] = None, record: Optional[Type[Record]] = None) -> List[Dict[str, Any]]:
         """Fetch repositories visible to the authenticated GitHub user.
 
         This calls the GitHub REST API endpoint `GET /user/repos` using the
         instance token.
 
+        Args:
+            fields: Optional dotted field paths to keep in each repository.
+            record: Optional record type to return instead of dicts.
+
         Returns:
             A JSON-decoded list where each element is a repository object as
             defined by the GitHub API.
@@ -42,15 +141,17 @@ class GitHubAPIClient:
                 list.
         """
         try:
-            response = requests.get(
-                "https://api.github.com/user/repos",
-                headers={"Authorization": f"token {self.token}"},
+            response = self._request(
+                "GET",
+                "/user/repos",
+                f"{self.base_url}/user/repos",
                 timeout=10,
+                **self._stream_kwargs(fields, record),
             )
             response.raise_for_status()
 
             try:
-                data = response.json()
+                data = decode_response(response, fields, record, many=True, streamed=self._streams(fields, record))
             except ValueError as e:
                 raise ValueError("GitHub API returned invalid JSON for repositories") from e
 
@@ -63,41 +164,252 @@ class GitHubAPIClient:
         except requests.RequestException as e:
             raise RuntimeError("Failed to fetch repositories from GitHub") from e
 
-    def get_repository(self, repo_name: str) -> Dict[str, Any]:
+    def get_repository(self, repo_name: str, fields: Optional[Sequence[str]] = None, record: Optional[Type[Record]] = None) -> Dict[str, Any]:
         """Fetch a single repository by its full name.
 
         Args:
             repo_name: Repository full name in the form `owner/repo`.
+            fields: Optional dotted field paths to keep.
+            record: Optional record type to return instead of a dict.
 
         Returns:
             JSON-decoded repository object as returned by `GET /repos/{repo}`.
         """
-        response = requests.get(f"https://api.github.com/repos/{repo_name}", headers={"Authorization": f"token {self.token}"})
-        return response.json()
+        response = self._request(
+            "GET",
+            "/repos/{repo}",
+            f"{self.base_url}/repos/{repo_name}",
+            **self._stream_kwargs(fields, record),
+        )
+        return decode_response(response, fields, record, many=False, streamed=self._streams(fields, record))
 
-    def get_commits(self, repo_name: str) -> List[Dict[str, Any]]:
+    def get_commits(
+        self,
+        repo_name: str,
+        since: Optional[str] = None,
+        per_page: Optional[int] = None,
+        page: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None,
+        record: Optional[Type[Record]] = None,
+    ) -> List[Dict[str, Any]]:
         """List commits for a repository.
 
         Args:
             repo_name: Repository full name in the form `owner/repo`.
+            since: Optional ISO 8601 timestamp; only commits after it are
+                returned.
+            per_page: Optional page size (GitHub allows up to 100).
+            page: Optional 1-based page number.
+            fields: Optional dotted field paths to keep in each commit, e.g.
+                `["sha", "commit.author.date"]`.
+            record: Optional record type to return instead of dicts.
 
         Returns:
             JSON-decoded list of commit objects as returned by
             `GET /repos/{repo}/commits`.
         """
-        response = requests.get(f"https://api.github.com/repos/{repo_name}/commits", headers={"Authorization": f"token {self.token}"})
-        return response.json()
+        params = {"since": since, "per_page": per_page, "page": page}
+        response = self._request(
+            "GET",
+            "/repos/{repo}/commits",
+            f"{self.base_url}/repos/{repo_name}/commits",
+            params={key: value for key, value in params.items() if value is not None} or None,
+            **self._stream_kwargs(fields, record),
+        )
+        return decode_response(response, fields, record, many=True, streamed=self._streams(fields, record))
     
-    def get_commit(self, repo_name: str, commit_sha: str) -> Dict[str, Any]:
+    def get_commit(
+        self,
+        repo_name: str,
+        commit_sha: str,
+        fields: Optional[Sequence[str]] = None,
+        record: Optional[Type[Record]] = None,
+    ) -> Dict[str, Any]:
         """Fetch a single commit.
 
         Args:
             repo_name: Repository full name in the form `owner/repo`.
             commit_sha: Commit SHA.
+            fields: Optional dotted field paths to keep, e.g.
+                `["sha", "stats"]` to skip the `files` list.
+            record: Optional record type to return instead of a dict.
 
         Returns:
             JSON-decoded commit object as returned by
             `GET /repos/{repo}/commits/{sha}`.
         """
-        response = requests.get(f"https://api.github.com/repos/{repo_name}/commits/{commit_sha}", headers={"Authorization": f"token {self.token}"})
-        return response.json()
\ No newline at end of file
+        response = self._request(
+            "GET",
+            "/repos/{repo}/commits/{sha}",
+            f"{self.base_url}/repos/{repo_name}/commits/{commit_sha}",
+            **self._stream_kwargs(fields, record),
+        )
+        return decode_response(response, fields, record, many=False, streamed=self._streams(fields, record))
+
+    @staticmethod
+    def _streams(fields: Optional[Sequence[str]], record: Optional[Type[Record]]) -> bool:
+        return (fields is not None or record is not None) and streaming_available()
+
+    def _stream_kwargs(self, fields: Optional[Sequence[str]], record: Optional[Type[Record]]) -> Dict[str, Any]:
+        return {"stream": True} if self._streams(fields, record) else {}
+
+    def graphql(self, query: str, variables: Optional[Dict[str, Any]] = None, allow_partial: bool = False) -> Dict[str, Any]:
+        """Run a query against GitHub's GraphQL API (`POST` to `graphql_url`).
+
+        Args:
+            query: GraphQL query document.
+            variables: Optional query variables.
+            allow_partial: If true, return the `data` object even when the
+                response also carries errors (e.g. one aliased repository that
+                could not be resolved); the failed fields are then `None`.
+
+        Returns:
+            The JSON-decoded `data` object of the response.
+
+        Raises:
+            TimeoutError: If the request exceeds the configured timeout.
+            RuntimeError: If the request fails for network/HTTP reasons or the
+                query returns errors.
+            ValueError: If the response body is not valid JSON or is not an
+                object.
+        """
+        try:
+            response = self._request(
+                "POST",
+                "/graphql",
+                self.graphql_url,
+                json={"query": query, "variables": variables or {}},
+                timeout=10,
+            )
+            response.raise_for_status()
+
+            try:
+                payload = response.json()
+            except ValueError as e:
+                raise ValueError("GitHub API returned invalid JSON for GraphQL query") from e
+
+            if not isinstance(payload, dict):
+                raise ValueError(f"Expected a GraphQL response object, got {type(payload).__name__}")
+
+            data = payload.get("data")
+            errors = payload.get("errors")
+            if errors and (data is None or not allow_partial):
+                messages = "; ".join(error.get("message", "unknown error") for error in errors)
+                raise RuntimeError(f"GitHub GraphQL query failed: {messages}")
+
+            return data or {}
+        except requests.Timeout as e:
+            raise TimeoutError("Timed out while querying the GitHub GraphQL API") from e
+        except requests.RequestException as e:
+            raise RuntimeError("Failed to query the GitHub GraphQL API") from e
+
+    def get_repository_summaries(
+        self,
+        repo_names: List[str],
+        max_commits: int = 30,
+        since: Optional[str] = None,
+        batch_size: int = 20,
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Fetch metadata and recent commits for several repositories at once.
+
+        Up to `batch_size` repositories are fetched per aliased GraphQL query,
+        together with the first page of each one's default-branch history.
+        Repositories with more than one page of history are then followed with
+        cursor pagination until `max_commits` commits have been collected.
+
+        Args:
+            repo_names: Repository full names in the form `owner/repo`.
+            max_commits: Maximum number of commits to return per repository
+                (newest first). Use 0 to fetch repository metadata only.
+            since: Optional ISO 8601 timestamp; only commits after it are
+                returned.
+            batch_size: Number of repositories per GraphQL query.
+
+        Returns:
+            A dict keyed by repository full name. Each value is
+            `{"repository": ..., "commits": [...]}` where `repository` has the
+            shape of `get_repository` and each commit the shape of
+            `get_commit` (with `stats` but without `files`), or `None` if the
+            repository could not be resolved.
+
+        Raises:
+            ValueError: If a repository name is malformed or `batch_size` is
+                not positive.
+            TimeoutError, RuntimeError: As raised by `graphql`.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+
+        summaries: Dict[str, Optional[Dict[str, Any]]] = {}
+        with_history = max_commits > 0
+        for start in range(0, len(repo_names), batch_size):
+            batch = repo_names[start:start + batch_size]
+            variables: Dict[str, Any] = {}
+            for i, repo_name in enumerate(batch):
+                variables[f"owner{i}"], variables[f"name{i}"] = split_repo_name(repo_name)
+            if with_history:
+                variables.update(first=min(max_commits, MAX_PAGE_SIZE), since=since)
+
+            data = self.graphql(build_repositories_query(len(batch), with_history), variables, allow_partial=True)
+            for i, repo_name in enumerate(batch):
+                node = data.get(f"r{i}")
+                if node is None:
+                    summaries[repo_name] = None
+                    continue
+                commits, cursor = extract_history(node) if with_history else ([], None)
+                if cursor and len(commits) < max_commits:
+                    commits += self._get_history_pages(repo_name, max_commits - len(commits), since, cursor)
+                summaries[repo_name] = {"repository": to_rest_repository(node), "commits": commits[:max_commits]}
+        return summaries
+
+    def get_repository_summary(self, repo_name: str, max_commits: int = 30, since: Optional[str] = None) -> Dict[str, Any]:
+        """Fetch one repository and its recent commits in as few calls as possible.
+
+        This replaces `get_repository` + `get_commits` + one `get_commit` per
+        SHA with a single GraphQL query (plus one per extra page of 100
+        commits). See `get_repository_summaries` for the returned shape.
+
+        Raises:
+            RuntimeError: If the repository could not be resolved, or as
+                raised by `graphql`.
+        """
+        summary = self.get_repository_summaries([repo_name], max_commits=max_commits, since=since)[repo_name]
+        if summary is None:
+            raise RuntimeError(f"Could not resolve repository {repo_name!r}")
+        return summary
+
+    def get_commit_history(self, repo_name: str, max_commits: int = 100, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List default-branch commits with stats using GraphQL cursor pagination.
+
+        Args:
+            repo_name: Repository full name in the form `owner/repo`.
+            max_commits: Maximum number of commits to return (newest first).
+            since: Optional ISO 8601 timestamp; only commits after it are
+                returned.
+
+        Returns:
+            Commits in the shape of `get_commit` (with `stats` but without
+            `files`).
+        """
+        return self._get_history_pages(repo_name, max_commits, since, None)
+
+    def _get_history_pages(self, repo_name: str, limit: int, since: Optional[str], cursor: Optional[str]) -> List[Dict[str, Any]]:
+        owner, name = split_repo_name(repo_name)
+        query = build_history_query()
+        commits: List[Dict[str, Any]] = []
+        while len(commits) < limit:
+            variables = {
+                "owner0": owner,
+                "name0": name,
+                "first": min(limit - len(commits), MAX_PAGE_SIZE),
+                "after0": cursor,
+                "since": since,
+            }
+            data = self.graphql(query, variables)
+            if data.get("r0") is None:
+                raise RuntimeError(f"Could not resolve repository {repo_name!r}")
+            page, cursor = extract_history(data["r0"])
+            commits += page
+            if cursor is None:
+                break
+        return commits[:limit]
@@ -0,0 +1,172 @@
+"""Offline throughput benchmark for `GitHubAPIClient`.
+
+Runs the same bulk crawl against a local `FakeGitHub` server under several
+client modes and reports requests, wall time, requests per second and
+(optionally) peak Python memory for each:
+
+- `baseline`: one `requests.get` per call, a new connection every time.
+- `pooled`: calls go through a shared `requests.Session` (keep-alive).
+- `concurrent`: pooled, with repositories and commit details fetched from a
+  thread pool.
+- `projected`: pooled, with commit details projected to a few fields.
+- `mirror`: re-sync of an up-to-date `CommitMirror` (the cached case).
+
+Usage:
+    python -m demo2.benchmark --repos 10 --commits 300 --details 50 --latency 0.005
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .api_client import GitHubAPIClient
+from .fake_github import FakeGitHub
+from .mirror import CommitMirror
+
+MODES = ("baseline", "pooled", "concurrent", "projected", "mirror")
+
+
+def _pooled_session(pool_size: int) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _all_commits(client: GitHubAPIClient, repo_name: str) -> List[Dict[str, Any]]:
+    commits: List[Dict[str, Any]] = []
+    page = 1
+    while True:
+        batch = client.get_commits(repo_name, per_page=100, page=page)
+        commits += batch
+        if len(batch) < 100:
+            return commits
+        page += 1
+
+
+def crawl(client: GitHubAPIClient, repo_names: List[str], details: int, workers: int = 1, fields: Optional[List[str]] = None) -> int:
+    """Fetch each repository, its full commit list and `details` commit details.
+
+    Returns:
+        Number of commit details fetched.
+    """
+
+    def crawl_repo(repo_name: str) -> int:
+        client.get_repository(repo_name)
+        shas = [commit["sha"] for commit in _all_commits(client, repo_name)[:details]]
+        if workers > 1:
+            with ThreadPoolExecutor(workers) as pool:
+                return len(list(pool.map(lambda sha: client.get_commit(repo_name, sha, fields=fields), shas)))
+        return len([client.get_commit(repo_name, sha, fields=fields) for sha in shas])
+
+    if workers > 1:
+        with ThreadPoolExecutor(workers) as pool:
+            return sum(pool.map(crawl_repo, repo_names))
+    return sum(crawl_repo(repo_name) for repo_name in repo_names)
+
+
+def _measure(server: FakeGitHub, run: Callable[[], Any], track_memory: bool) -> Dict[str, Any]:
+    server.reset_counters()
+    if track_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    run()
+    wall = time.perf_counter() - started
+    peak = None
+    if track_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {
+        "requests": server.requests_served,
+        "wall_seconds": wall,
+        "requests_per_second": server.requests_served / wall if wall else 0.0,
+        "peak_memory_bytes": peak,
+    }
+
+
+def run_benchmark(
+    server: FakeGitHub,
+    modes: List[str],
+    details: int,
+    workers: int,
+    track_memory: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """Run the crawl once per mode against a started server.
+
+    Returns:
+        Results keyed by mode name.
+    """
+    repo_names = list(server.fixtures["repositories"])
+    results = {}
+    for mode in modes:
+        if mode == "baseline":
+            client = GitHubAPIClient(token="bench", base_url=server.url)
+            run: Callable[[], Any] = lambda: crawl(client, repo_names, details)
+        elif mode in ("pooled", "concurrent", "projected"):
+            # The concurrent crawl nests a detail pool inside each repository worker.
+            client = GitHubAPIClient(token="bench", base_url=server.url, session=_pooled_session(max(workers, 1) ** 2))
+            run = {
+                "pooled": lambda: crawl(client, repo_names, details),
+                "concurrent": lambda: crawl(client, repo_names, details, workers=workers),
+                "projected": lambda: crawl(client, repo_names, details, fields=["sha", "stats", "commit.author.date"]),
+            }[mode]
+        elif mode == "mirror":
+            client = GitHubAPIClient(token="bench", base_url=server.url, session=_pooled_session(1))
+            mirror = CommitMirror(client, path=":memory:")
+            for repo_name in repo_names:
+                mirror.sync(repo_name)
+            run = lambda: [mirror.sync(repo_name) for repo_name in repo_names]
+        else:
+            raise ValueError(f"Unknown mode {mode!r}; expected one of {', '.join(MODES)}")
+        results[mode] = _measure(server, run, track_memory)
+    return results
+
+
+def format_results(results: Dict[str, Dict[str, Any]]) -> str:
+    """Format benchmark results as a plain-text table."""
+    lines = [f"{'mode':<12} {'requests':>9} {'wall s':>8} {'req/s':>9} {'peak MiB':>9}"]
+    for mode, result in results.items():
+        peak = result["peak_memory_bytes"]
+        peak_text = f"{peak / 2 ** 20:>9.1f}" if peak is not None else f"{'-':>9}"
+        lines.append(
+            f"{mode:<12} {result['requests']:>9} {result['wall_seconds']:>8.2f} {result['requests_per_second']:>9.1f} {peak_text}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark GitHubAPIClient against a local fake GitHub server")
+    parser.add_argument("--fixtures", help="Recorded fixture file (default: synthetic data)")
+    parser.add_argument("--repos", type=int, default=5, help="Synthetic repositories")
+    parser.add_argument("--commits", type=int, default=200, help="Synthetic commits per repository")
+    parser.add_argument("--details", type=int, default=30, help="Commit details fetched per repository")
+    parser.add_argument("--latency", type=float, default=0.002, help="Server latency per request in seconds")
+    parser.add_argument("--workers", type=int, default=8, help="Threads for the concurrent mode")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated modes to run")
+    parser.add_argument("--memory", action="store_true", help="Track peak memory (slows every mode down)")
+    parser.add_argument("--json", dest="json_path", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        server = FakeGitHub.from_file(args.fixtures, latency=args.latency, rate_limit=10 ** 9)
+    else:
+        server = FakeGitHub.synthetic(repos=args.repos, commits_per_repo=args.commits, latency=args.latency, rate_limit=10 ** 9)
+
+    with server:
+        results = run_benchmark(server, args.modes.split(","), args.details, args.workers, args.memory)
+
+    print(format_results(results))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
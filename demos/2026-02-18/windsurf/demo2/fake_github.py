@@ -0,0 +1,327 @@
+"""Local fake GitHub REST server for offline tests and benchmarks.
+
+`FakeGitHub` serves a subset of the REST endpoints used by `GitHubAPIClient`
+from in-memory fixtures, which can be synthetic (`FakeGitHub.synthetic`) or
+recorded from the real API (`record_fixtures` / `FakeGitHub.from_file`). It
+imitates the behaviour that matters for client performance: `page`/`per_page`
+pagination with `Link` headers, `since` filtering, ETags with
+`304 Not Modified` revalidation, rate-limit headers (and `403` once the budget
+is spent) and a configurable per-request latency. The server speaks HTTP/1.1,
+so clients that pool connections can keep them alive.
+
+Example:
+    with FakeGitHub.synthetic(repos=5, commits_per_repo=200, latency=0.01) as server:
+        client = GitHubAPIClient(token="test", base_url=server.url)
+        client.get_commits("octo/repo0", per_page=100)
+"""
+
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from .api_client import GitHubAPIClient
+
+DEFAULT_PER_PAGE = 30
+MAX_PER_PAGE = 100
+
+# Keys dropped from commit objects in list responses, as GitHub does.
+_DETAIL_ONLY_KEYS = ("files", "stats")
+
+
+def _synthetic_commit(owner: str, name: str, index: int, date: datetime, files_per_commit: int) -> Dict[str, Any]:
+    sha = hashlib.sha1(f"{owner}/{name}/{index}".encode()).hexdigest()
+    parent = hashlib.sha1(f"{owner}/{name}/{index - 1}".encode()).hexdigest()
+    stamp = date.strftime("%Y-%m-%dT%H:%M:%SZ")
+    person = {"name": "Octo Cat", "email": "octocat@example.com", "date": stamp}
+    account = {"login": "octocat", "id": 1, "type": "User", "site_admin": False}
+    files = [
+        {
+            "sha": hashlib.sha1(f"{sha}/{n}".encode()).hexdigest(),
+            "filename": f"src/module_{n}.py",
+            "status": "modified",
+            "additions": 10,
+            "deletions": 2,
+            "changes": 12,
+            "patch": "@@ -1,2 +1,10 @@\n" + "+    value = compute(value)\n" * 10,
+        }
+        for n in range(files_per_commit)
+    ]
+    return {
+        "sha": sha,
+        "node_id": f"C_{sha[:12]}",
+        "url": f"https://api.github.com/repos/{owner}/{name}/commits/{sha}",
+        "html_url": f"https://github.com/{owner}/{name}/commit/{sha}",
+        "commit": {
+            "author": person,
+            "committer": person,
+            "message": f"Commit number {index} in {name}",
+            "tree": {"sha": hashlib.sha1(sha.encode()).hexdigest()},
+            "comment_count": 0,
+        },
+        "author": account,
+        "committer": account,
+        "parents": [{"sha": parent}] if index else [],
+        "stats": {"additions": 10 * files_per_commit, "deletions": 2 * files_per_commit, "total": 12 * files_per_commit},
+        "files": files,
+    }
+
+
+class FakeGitHub:
+    """Threaded local HTTP server imitating part of the GitHub REST API.
+
+    Fixtures are a dict of the form
+    `{"user": {...}, "repositories": {"owner/repo": {"repository": {...}, "commits": [...]}}}`
+    with commits newest first, as `GET /repos/{repo}/commits` returns them.
+    """
+
+    def __init__(
+        self,
+        fixtures: Dict[str, Any],
+        latency: float = 0.0,
+        rate_limit: int = 5000,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        """Create (but do not start) a server.
+
+        Args:
+            fixtures: Data to serve, see the class docstring.
+            latency: Seconds to sleep before answering each request.
+            rate_limit: Requests allowed before the server answers `403`.
+                `304` responses do not count, like on GitHub.
+            host: Interface to bind.
+            port: Port to bind; 0 picks a free port.
+        """
+        self.fixtures = fixtures
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.remaining = rate_limit
+        self.requests_served = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._commit_index = {
+            (repo_name, commit["sha"]): commit
+            for repo_name, repo in fixtures.get("repositories", {}).items()
+            for commit in repo.get("commits", [])
+        }
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def synthetic(
+        cls,
+        repos: int = 3,
+        commits_per_repo: int = 100,
+        files_per_commit: int = 3,
+        owner: str = "octo",
+        **kwargs: Any,
+    ) -> "FakeGitHub":
+        """Create a server with generated repositories named `<owner>/repo<N>`.
+
+        Args:
+            repos: Number of repositories.
+            commits_per_repo: Commits in each repository's history.
+            files_per_commit: Entries in each commit's `files` list, which
+                controls the size of detail responses.
+            owner: Owner login of the repositories.
+            **kwargs: Passed to the constructor (`latency`, `rate_limit`, ...).
+        """
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        repositories = {}
+        for r in range(repos):
+            name = f"repo{r}"
+            commits = [
+                _synthetic_commit(owner, name, i, start + timedelta(hours=i), files_per_commit)
+                for i in reversed(range(commits_per_repo))
+            ]
+            repositories[f"{owner}/{name}"] = {
+                "repository": {
+                    "id": r + 1,
+                    "name": name,
+                    "full_name": f"{owner}/{name}",
+                    "owner": {"login": owner},
+                    "private": False,
+                    "default_branch": "main",
+                    "stargazers_count": r,
+                    "created_at": "2024-01-01T00:00:00Z",
+                    "pushed_at": commits[0]["commit"]["committer"]["date"] if commits else None,
+                },
+                "commits": commits,
+            }
+        return cls({"user": {"login": owner, "id": 1}, "repositories": repositories}, **kwargs)
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs: Any) -> "FakeGitHub":
+        """Create a server from a fixture file written by `record_fixtures`."""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), **kwargs)
+
+    @property
+    def url(self) -> str:
+        """Base URL to pass to `GitHubAPIClient(base_url=...)`."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGitHub":
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and release the port."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeGitHub":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def reset_counters(self) -> None:
+        """Restore the rate-limit budget and zero the request counters."""
+        with self._lock:
+            self.remaining = self.rate_limit
+            self.requests_served = 0
+            self.not_modified = 0
+
+    def route(self, path: str, query: Dict[str, List[str]]) -> Tuple[int, Any, Dict[str, str]]:
+        """Resolve a request path to `(status, body, extra headers)`."""
+        parts = [part for part in path.split("/") if part]
+        if parts == ["user"]:
+            return 200, self.fixtures.get("user", {}), {}
+        if parts == ["user", "repos"]:
+            repos = [repo["repository"] for repo in self.fixtures.get("repositories", {}).values()]
+            return self._paginate(path, query, repos)
+        if len(parts) >= 3 and parts[0] == "repos":
+            repo_name = f"{parts[1]}/{parts[2]}"
+            repo = self.fixtures.get("repositories", {}).get(repo_name)
+            if repo is None:
+                return 404, {"message": "Not Found"}, {}
+            if len(parts) == 3:
+                return 200, repo["repository"], {}
+            if parts[3] == "commits" and len(parts) == 4:
+                commits = repo.get("commits", [])
+                since = query.get("since", [None])[0]
+                if since is not None:
+                    commits = [c for c in commits if c["commit"]["committer"]["date"] >= since]
+                listed = [{k: v for k, v in c.items() if k not in _DETAIL_ONLY_KEYS} for c in commits]
+                return self._paginate(path, query, listed)
+            if parts[3] == "commits" and len(parts) == 5:
+                commit = self._commit_index.get((repo_name, parts[4]))
+                if commit is None:
+                    return 422, {"message": f"No commit found for SHA: {parts[4]}"}, {}
+                return 200, commit, {}
+        return 404, {"message": "Not Found"}, {}
+
+    def _paginate(self, path: str, query: Dict[str, List[str]], items: List[Any]) -> Tuple[int, Any, Dict[str, str]]:
+        per_page = min(int(query.get("per_page", [DEFAULT_PER_PAGE])[0]), MAX_PER_PAGE)
+        page = max(int(query.get("page", [1])[0]), 1)
+        last = max((len(items) + per_page - 1) // per_page, 1)
+        links = []
+        flat = {key: values[0] for key, values in query.items()}
+
+        def link(number: int, rel: str) -> str:
+            return f'<{self.url}{path}?{urlencode({**flat, "page": number, "per_page": per_page})}>; rel="{rel}"'
+
+        if page < last:
+            links += [link(page + 1, "next"), link(last, "last")]
+        if page > 1:
+            links += [link(1, "first"), link(page - 1, "prev")]
+        headers = {"Link": ", ".join(links)} if links else {}
+        return 200, items[(page - 1) * per_page:page * per_page], headers
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                if server.latency:
+                    time.sleep(server.latency)
+                if not self.headers.get("Authorization"):
+                    self._send(401, {"message": "Requires authentication"}, {})
+                    return
+
+                url = urlsplit(self.path)
+                status, body, headers = server.route(url.path, parse_qs(url.query))
+                payload = json.dumps(body).encode()
+                etag = f'W/"{hashlib.sha1(payload).hexdigest()}"'
+
+                with server._lock:
+                    server.requests_served += 1
+                    if status == 200 and self.headers.get("If-None-Match") == etag:
+                        server.not_modified += 1
+                        status, payload = 304, b""
+                    elif server.remaining <= 0:
+                        status, payload = 403, json.dumps({"message": "API rate limit exceeded"}).encode()
+                    else:
+                        server.remaining -= 1
+                    remaining = server.remaining
+
+                headers.update({
+                    "ETag": etag,
+                    "X-RateLimit-Limit": str(server.rate_limit),
+                    "X-RateLimit-Remaining": str(remaining),
+                    "X-RateLimit-Used": str(server.rate_limit - remaining),
+                    "X-RateLimit-Reset": str(int(time.time()) + 3600),
+                })
+                self._send(status, payload, headers)
+
+            def _send(self, status: int, payload: Any, headers: Dict[str, str]) -> None:
+                if not isinstance(payload, bytes):
+                    payload = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+
+def record_fixtures(client: GitHubAPIClient, repo_names: List[str], path: str, max_commits: int = 100) -> Dict[str, Any]:
+    """Record real API responses into a fixture file for `FakeGitHub.from_file`.
+
+    Args:
+        client: Client pointed at the real API.
+        repo_names: Repositories to record, in the form `owner/repo`.
+        path: Output JSON file.
+        max_commits: Number of most recent commits (with details) to record
+            per repository.
+
+    Returns:
+        The recorded fixtures.
+    """
+    repositories = {}
+    for repo_name in repo_names:
+        listed: List[Dict[str, Any]] = []
+        page = 1
+        while len(listed) < max_commits:
+            batch = client.get_commits(repo_name, per_page=MAX_PER_PAGE, page=page)
+            listed += batch
+            if len(batch) < MAX_PER_PAGE:
+                break
+            page += 1
+        commits = [client.get_commit(repo_name, commit["sha"]) for commit in listed[:max_commits]]
+        repositories[repo_name] = {"repository": client.get_repository(repo_name), "commits": commits}
+    fixtures = {"user": client.get_user(), "repositories": repositories}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fixtures, f)
+    return fixtures
@@ -0,0 +1,185 @@
+"""GraphQL query builders and REST-shape converters for `GitHubAPIClient`.
+
+GitHub's GraphQL API can return repository metadata, commit history and
+per-commit stats for several repositories in a single request. The helpers in
+this module build aliased queries for that and translate the GraphQL payloads
+back into the dict shapes returned by the REST endpoints, so callers can switch
+between the two modes without changing how they read the results.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+# GitHub caps connection page sizes at 100 nodes.
+MAX_PAGE_SIZE = 100
+
+REPOSITORY_FIELDS = """
+    id
+    databaseId
+    name
+    nameWithOwner
+    owner { login }
+    isPrivate
+    isFork
+    isArchived
+    url
+    description
+    homepageUrl
+    primaryLanguage { name }
+    stargazerCount
+    forkCount
+    createdAt
+    updatedAt
+    pushedAt
+"""
+
+COMMIT_FIELDS = """
+    id
+    oid
+    url
+    message
+    additions
+    deletions
+    author { name email date user { login } }
+    committer { name email date user { login } }
+    parents(first: 5) { nodes { oid } }
+"""
+
+
+def split_repo_name(repo_name: str) -> Tuple[str, str]:
+    """Split an `owner/repo` full name into its two parts.
+
+    Raises:
+        ValueError: If `repo_name` is not of the form `owner/repo`.
+    """
+    owner, sep, name = repo_name.partition("/")
+    if not sep or not owner or not name or "/" in name:
+        raise ValueError(f"Expected a repository name of the form 'owner/repo', got {repo_name!r}")
+    return owner, name
+
+
+def _history_selection(after_var: str) -> str:
+    return f"""
+        defaultBranchRef {{
+            name
+            target {{
+                ... on Commit {{
+                    history(first: $first, after: ${after_var}, since: $since) {{
+                        pageInfo {{ hasNextPage endCursor }}
+                        nodes {{ {COMMIT_FIELDS} }}
+                    }}
+                }}
+            }}
+        }}
+    """
+
+
+def build_repositories_query(count: int, with_history: bool) -> str:
+    """Build an aliased query fetching `count` repositories at once.
+
+    Each repository is selected under the alias `r<index>` and takes its own
+    `$owner<index>`/`$name<index>` variables (and `$after<index>` when commit
+    history is requested).
+    """
+    params = []
+    selections = []
+    for i in range(count):
+        params.append(f"$owner{i}: String!, $name{i}: String!")
+        history = ""
+        if with_history:
+            params.append(f"$after{i}: String")
+            history = _history_selection(f"after{i}")
+        selections.append(f"r{i}: repository(owner: $owner{i}, name: $name{i}) {{ {REPOSITORY_FIELDS} {history} }}")
+    if with_history:
+        params.append("$first: Int!, $since: GitTimestamp")
+    return f"query({', '.join(params)}) {{ {' '.join(selections)} rateLimit {{ cost remaining }} }}"
+
+
+def build_history_query() -> str:
+    """Build a query for one page of a single repository's commit history."""
+    return (
+        "query($owner0: String!, $name0: String!, $first: Int!, $after0: String, $since: GitTimestamp) {"
+        f" r0: repository(owner: $owner0, name: $name0) {{ {_history_selection('after0')} }}"
+        " rateLimit { cost remaining } }"
+    )
+
+
+def _git_actor(actor: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if actor is None:
+        return None
+    return {"name": actor.get("name"), "email": actor.get("email"), "date": actor.get("date")}
+
+
+def _account(actor: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    user = (actor or {}).get("user")
+    return {"login": user["login"]} if user else None
+
+
+def to_rest_repository(node: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a GraphQL `Repository` node to the `GET /repos/{repo}` shape.
+
+    Only the commonly used subset of the REST fields is populated.
+    """
+    language = node.get("primaryLanguage") or {}
+    default_branch = node.get("defaultBranchRef") or {}
+    return {
+        "id": node.get("databaseId"),
+        "node_id": node.get("id"),
+        "name": node.get("name"),
+        "full_name": node.get("nameWithOwner"),
+        "owner": {"login": (node.get("owner") or {}).get("login")},
+        "private": node.get("isPrivate"),
+        "fork": node.get("isFork"),
+        "archived": node.get("isArchived"),
+        "html_url": node.get("url"),
+        "description": node.get("description"),
+        "homepage": node.get("homepageUrl"),
+        "language": language.get("name"),
+        "stargazers_count": node.get("stargazerCount"),
+        "watchers_count": node.get("stargazerCount"),
+        "forks_count": node.get("forkCount"),
+        "default_branch": default_branch.get("name"),
+        "created_at": node.get("createdAt"),
+        "updated_at": node.get("updatedAt"),
+        "pushed_at": node.get("pushedAt"),
+    }
+
+
+def to_rest_commit(node: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a GraphQL `Commit` node to the `GET /repos/{repo}/commits/{sha}` shape.
+
+    The `files` list is not available through GraphQL and is omitted; `stats`
+    is populated from the commit's additions and deletions.
+    """
+    additions = node.get("additions") or 0
+    deletions = node.get("deletions") or 0
+    parents = (node.get("parents") or {}).get("nodes") or []
+    return {
+        "sha": node.get("oid"),
+        "node_id": node.get("id"),
+        "html_url": node.get("url"),
+        "commit": {
+            "message": node.get("message"),
+            "author": _git_actor(node.get("author")),
+            "committer": _git_actor(node.get("committer")),
+        },
+        "author": _account(node.get("author")),
+        "committer": _account(node.get("committer")),
+        "parents": [{"sha": parent["oid"]} for parent in parents],
+        "stats": {"additions": additions, "deletions": deletions, "total": additions + deletions},
+    }
+
+
+def extract_history(node: Optional[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Return the REST-shaped commits of a history page and the next-page cursor.
+
+    The cursor is `None` when there are no more pages (or the repository has
+    no default branch yet).
+    """
+    target = ((node or {}).get("defaultBranchRef") or {}).get("target") or {}
+    history = target.get("history")
+    if not history:
+        return [], None
+    commits = [to_rest_commit(commit) for commit in history.get("nodes") or []]
+    page_info = history.get("pageInfo") or {}
+    cursor = page_info.get("endCursor") if page_info.get("hasNextPage") else None
+    return commits, cursor
@@ -0,0 +1,268 @@
+"""Request instrumentation hooks for `GitHubAPIClient`.
+
+Every HTTP call made by the client produces a `RequestEvent` that is passed to
+the hooks registered on the client. `MetricsCollector` aggregates events in
+memory into per-endpoint latency histograms and counters; `OpenTelemetryHook`
+exports each call as a span when the optional `opentelemetry-api` package is
+installed.
+"""
+
+import abc
+import bisect
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+# Upper bounds (in seconds) of the default latency histogram buckets.
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class RequestEvent:
+    """Outcome of a single HTTP call made by the client.
+
+    Attributes:
+        method: HTTP method, e.g. `"GET"`.
+        endpoint: Endpoint template such as `"/repos/{repo}/commits"`, used to
+            group calls to the same API.
+        url: Full request URL.
+        start_time: Wall-clock start of the call (seconds since the epoch).
+        elapsed: Duration of the HTTP call in seconds (up to the response
+            headers for streamed bodies, the full body otherwise).
+        status_code: HTTP status, or `None` if no response was received.
+        bytes_received: Body size, or `None` if unknown (e.g. a streamed body
+            without `Content-Length`).
+        retries: Number of transport-level retries before this response.
+        rate_limit_remaining: Value of `X-RateLimit-Remaining`, if present.
+        from_cache: Whether the response was served from a cache (including
+            `304 Not Modified` revalidations).
+        error: Exception class name if the call failed without a response.
+    """
+
+    method: str
+    endpoint: str
+    url: str
+    start_time: float
+    elapsed: float
+    status_code: Optional[int] = None
+    bytes_received: Optional[int] = None
+    retries: int = 0
+    rate_limit_remaining: Optional[int] = None
+    from_cache: bool = False
+    error: Optional[str] = None
+
+
+def event_from_response(method: str, endpoint: str, url: str, start_time: float, elapsed: float, response: Any, streamed: bool) -> RequestEvent:
+    """Build a `RequestEvent` from a `requests.Response`-like object.
+
+    The body size of streamed responses is taken from `Content-Length` so the
+    stream is not consumed.
+    """
+    headers = getattr(response, "headers", None) or {}
+    size: Optional[int] = None
+    if not streamed and hasattr(response, "content"):
+        size = len(response.content or b"")
+    elif headers.get("Content-Length", "").isdigit():
+        size = int(headers["Content-Length"])
+
+    retries = getattr(getattr(getattr(response, "raw", None), "retries", None), "history", None) or ()
+    remaining = headers.get("X-RateLimit-Remaining")
+    status_code = getattr(response, "status_code", None)
+    return RequestEvent(
+        method=method,
+        endpoint=endpoint,
+        url=url,
+        start_time=start_time,
+        elapsed=elapsed,
+        status_code=status_code,
+        bytes_received=size,
+        retries=len(retries),
+        rate_limit_remaining=int(remaining) if remaining is not None and str(remaining).isdigit() else None,
+        from_cache=bool(getattr(response, "from_cache", False)) or status_code == 304,
+    )
+
+
+class RequestHook(abc.ABC):
+    """Interface for objects notified of every request made by the client."""
+
+    @abc.abstractmethod
+    def on_request(self, event: RequestEvent) -> None:
+        """Handle a completed (or failed) request."""
+
+
+@dataclass
+class _EndpointStats:
+    buckets: Sequence[float]
+    counts: List[int] = field(default_factory=list)
+    calls: int = 0
+    errors: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    bytes_received: int = 0
+    retries: int = 0
+    cache_hits: int = 0
+    statuses: Counter = field(default_factory=Counter)
+
+    def __post_init__(self) -> None:
+        self.counts = [0] * (len(self.buckets) + 1)
+
+    def add(self, event: RequestEvent) -> None:
+        self.calls += 1
+        self.counts[bisect.bisect_left(self.buckets, event.elapsed)] += 1
+        self.total_time += event.elapsed
+        self.max_time = max(self.max_time, event.elapsed)
+        self.bytes_received += event.bytes_received or 0
+        self.retries += event.retries
+        self.cache_hits += event.from_cache
+        self.statuses[event.status_code if event.status_code is not None else event.error] += 1
+        if event.error is not None or (event.status_code or 0) >= 400:
+            self.errors += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a latency quantile as the upper bound of its bucket."""
+        rank = q * self.calls
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_time)
+        return self.max_time
+
+
+class MetricsCollector(RequestHook):
+    """In-memory per-endpoint request metrics.
+
+    Latencies are recorded in a fixed-bucket histogram, so memory use does not
+    grow with the number of requests. The collector is thread-safe.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        """Create an empty collector.
+
+        Args:
+            buckets: Sorted upper bounds (seconds) of the latency histogram;
+                an overflow bucket is added automatically.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, _EndpointStats] = {}
+        self.rate_limit_remaining: Optional[int] = None
+
+    def on_request(self, event: RequestEvent) -> None:
+        key = f"{event.method} {event.endpoint}"
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = _EndpointStats(self.buckets)
+            stats.add(event)
+            if event.rate_limit_remaining is not None:
+                self.rate_limit_remaining = event.rate_limit_remaining
+
+    def reset(self) -> None:
+        """Forget all recorded requests."""
+        with self._lock:
+            self._endpoints.clear()
+            self.rate_limit_remaining = None
+
+    def summary(self) -> Dict[str, Any]:
+        """Return aggregated metrics.
+
+        Returns:
+            `{"calls", "total_time", "rate_limit_remaining", "endpoints"}`
+            where `endpoints` maps `"METHOD /endpoint"` to its counters,
+            latency estimates (`p50`, `p90`, `p99`, `max`, `mean`, in seconds)
+            and histogram (`{"le": bounds, "counts": counts}`).
+        """
+        with self._lock:
+            endpoints = {}
+            for key, stats in sorted(self._endpoints.items()):
+                endpoints[key] = {
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "cache_hits": stats.cache_hits,
+                    "retries": stats.retries,
+                    "bytes_received": stats.bytes_received,
+                    "statuses": dict(stats.statuses),
+                    "total_time": stats.total_time,
+                    "mean": stats.total_time / stats.calls,
+                    "p50": stats.quantile(0.5),
+                    "p90": stats.quantile(0.9),
+                    "p99": stats.quantile(0.99),
+                    "max": stats.max_time,
+                    "histogram": {"le": list(self.buckets) + [float("inf")], "counts": list(stats.counts)},
+                }
+            return {
+                "calls": sum(e["calls"] for e in endpoints.values()),
+                "total_time": sum(e["total_time"] for e in endpoints.values()),
+                "rate_limit_remaining": self.rate_limit_remaining,
+                "endpoints": endpoints,
+            }
+
+    def report(self) -> str:
+        """Format `summary` as a plain-text table."""
+        summary = self.summary()
+        lines = [
+            f"{'endpoint':<40} {'calls':>6} {'err':>4} {'cache':>5} {'retry':>5} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'KiB':>9}"
+        ]
+        for key, stats in summary["endpoints"].items():
+            lines.append(
+                f"{key:<40} {stats['calls']:>6} {stats['errors']:>4} {stats['cache_hits']:>5} {stats['retries']:>5} "
+                f"{stats['p50'] * 1000:>8.1f} {stats['p99'] * 1000:>8.1f} {stats['max'] * 1000:>8.1f} "
+                f"{stats['bytes_received'] / 1024:>9.1f}"
+            )
+        lines.append(f"total: {summary['calls']} calls, {summary['total_time']:.2f}s waiting on GitHub")
+        if summary["rate_limit_remaining"] is not None:
+            lines.append(f"rate limit remaining: {summary['rate_limit_remaining']}")
+        return "\n".join(lines)
+
+
+class OpenTelemetryHook(RequestHook):
+    """Export each request as an OpenTelemetry client span.
+
+    Requires the optional `opentelemetry-api` package; spans go to whatever
+    tracer provider the application has configured.
+    """
+
+    def __init__(self, tracer: Any = None) -> None:
+        """Create the hook.
+
+        Args:
+            tracer: Tracer to use; defaults to the global tracer for
+                `demo2.api_client`.
+
+        Raises:
+            ImportError: If `opentelemetry-api` is not installed.
+        """
+        from opentelemetry import trace
+
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer("demo2.api_client")
+
+    def on_request(self, event: RequestEvent) -> None:
+        start_ns = int(event.start_time * 1e9)
+        attributes = {
+            "http.request.method": event.method,
+            "url.full": event.url,
+            "github.endpoint": event.endpoint,
+            "github.retries": event.retries,
+            "github.from_cache": event.from_cache,
+        }
+        if event.status_code is not None:
+            attributes["http.response.status_code"] = event.status_code
+        if event.bytes_received is not None:
+            attributes["http.response.body.size"] = event.bytes_received
+        if event.rate_limit_remaining is not None:
+            attributes["github.rate_limit.remaining"] = event.rate_limit_remaining
+        if event.error is not None:
+            attributes["error.type"] = event.error
+
+        span = self.tracer.start_span(
+            f"{event.method} {event.endpoint}",
+            kind=self._trace.SpanKind.CLIENT,
+            start_time=start_ns,
+            attributes=attributes,
+        )
+        if event.error is not None or (event.status_code or 0) >= 400:
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+        span.end(end_time=start_ns + int(event.elapsed * 1e9))
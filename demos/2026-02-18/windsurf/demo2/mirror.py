@@ -0,0 +1,171 @@
+"""Incremental local mirror of GitHub commit history.
+
+`CommitMirror` keeps the commits of each synced repository in a SQLite
+database together with a high-water mark (the newest SHA and commit date seen).
+Each `sync` only asks GitHub for commits newer than that mark, so repeated runs
+cost API calls proportional to the number of new commits rather than the size
+of the history. Reads are then served from the local store.
+"""
+
+import json
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from .api_client import GitHubAPIClient
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    committed_at TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (repo, sha)
+);
+CREATE INDEX IF NOT EXISTS commits_repo_date ON commits (repo, committed_at);
+CREATE TABLE IF NOT EXISTS sync_state (
+    repo TEXT PRIMARY KEY,
+    sha TEXT,
+    committed_at TEXT,
+    synced_at TEXT NOT NULL
+);
+"""
+
+
+def _commit_date(commit: Dict[str, Any]) -> Optional[str]:
+    committer = (commit.get("commit") or {}).get("committer") or {}
+    return committer.get("date")
+
+
+class CommitMirror:
+    """SQLite-backed mirror of repository commit lists.
+
+    Commits are stored as returned by `GitHubAPIClient.get_commits`. Rewritten
+    history (force pushes) is not detected: commits that disappear upstream stay
+    in the mirror until `reset` is called for the repository.
+    """
+
+    def __init__(self, client: GitHubAPIClient, path: str = "commits.sqlite3", per_page: int = 100) -> None:
+        """Open (or create) a mirror database.
+
+        Args:
+            client: Client used to fetch new commits.
+            path: SQLite database path (`":memory:"` for a throwaway mirror).
+            per_page: Page size used when fetching commits (max 100).
+        """
+        self.client = client
+        self.per_page = per_page
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self.connection.close()
+
+    def __enter__(self) -> "CommitMirror":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def high_water_mark(self, repo_name: str) -> Optional[Dict[str, Optional[str]]]:
+        """Return the newest synced commit of a repository.
+
+        Returns:
+            `{"sha": ..., "date": ..., "synced_at": ...}`, or `None` if the
+            repository has never been synced.
+        """
+        row = self.connection.execute(
+            "SELECT sha, committed_at, synced_at FROM sync_state WHERE repo = ?", (repo_name,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"sha": row[0], "date": row[1], "synced_at": row[2]}
+
+    def sync(self, repo_name: str) -> int:
+        """Fetch commits newer than the high-water mark and store them.
+
+        The first sync of a repository downloads its full history. Later syncs
+        pass the stored commit date as `since`; GitHub treats it inclusively, so
+        the boundary commit is fetched again and ignored on insert. All pages
+        are written in one transaction, so an interrupted sync leaves the
+        previous mark in place.
+
+        Args:
+            repo_name: Repository full name in the form `owner/repo`.
+
+        Returns:
+            Number of commits that were not in the mirror before.
+
+        Raises:
+            ValueError: If GitHub returns something other than a list of
+                commits (e.g. an error object for an unknown repository).
+        """
+        mark = self.high_water_mark(repo_name)
+        since = mark["date"] if mark else None
+        newest_sha, newest_date = (mark["sha"], mark["date"]) if mark else (None, None)
+
+        added = 0
+        page = 1
+        with self.connection:
+            while True:
+                commits = self.client.get_commits(repo_name, since=since, per_page=self.per_page, page=page)
+                if not isinstance(commits, list):
+                    raise ValueError(f"Expected a list of commits for {repo_name}, got {type(commits).__name__}")
+                for commit in commits:
+                    date = _commit_date(commit)
+                    cursor = self.connection.execute(
+                        "INSERT OR IGNORE INTO commits (repo, sha, committed_at, data) VALUES (?, ?, ?, ?)",
+                        (repo_name, commit["sha"], date, json.dumps(commit)),
+                    )
+                    added += cursor.rowcount
+                    if date is not None and (newest_date is None or date > newest_date):
+                        newest_sha, newest_date = commit["sha"], date
+                if len(commits) < self.per_page:
+                    break
+                page += 1
+
+            self.connection.execute(
+                "INSERT OR REPLACE INTO sync_state (repo, sha, committed_at, synced_at) VALUES (?, ?, ?, ?)",
+                (repo_name, newest_sha, newest_date, datetime.now(timezone.utc).isoformat()),
+            )
+        return added
+
+    def get_commits(
+        self,
+        repo_name: str,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """List mirrored commits, newest first, without calling GitHub.
+
+        Args:
+            repo_name: Repository full name in the form `owner/repo`.
+            since: Optional ISO 8601 timestamp; only commits at or after it.
+            until: Optional ISO 8601 timestamp; only commits at or before it.
+            limit: Optional maximum number of commits to return.
+
+        Returns:
+            Commit objects in the shape returned by
+            `GitHubAPIClient.get_commits`.
+        """
+        query = "SELECT data FROM commits WHERE repo = ?"
+        args: List[Any] = [repo_name]
+        if since is not None:
+            query += " AND committed_at >= ?"
+            args.append(since)
+        if until is not None:
+            query += " AND committed_at <= ?"
+            args.append(until)
+        query += " ORDER BY committed_at DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            args.append(limit)
+        return [json.loads(row[0]) for row in self.connection.execute(query, args)]
+
+    def reset(self, repo_name: str) -> None:
+        """Drop a repository's mirrored commits and high-water mark."""
+        with self.connection:
+            self.connection.execute("DELETE FROM commits WHERE repo = ?", (repo_name,))
+            self.connection.execute("DELETE FROM sync_state WHERE repo = ?", (repo_name,))
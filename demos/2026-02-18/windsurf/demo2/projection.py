@@ -0,0 +1,213 @@
+"""Field projection and `__slots__` records for GitHub API responses.
+
+A projection is a list of dotted field paths such as
+`["sha", "commit.author.date"]`. Projected objects keep the nesting of the
+original response but contain only the requested paths; a path that ends on an
+object or array keeps that value whole. Paths only traverse objects, not
+arrays.
+
+When the optional `ijson` package is installed, `iter_projected` applies the
+projection while the body is being parsed, so unused blocks such as `files` or
+the nested `author`/`committer` accounts are never materialised. Without it,
+callers fall back to `project` on the fully decoded body.
+"""
+
+from typing import Any, Dict, IO, Iterator, Mapping, Optional, Sequence, Type
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    ijson = None
+
+
+def _assign(target: Dict[str, Any], path: str, value: Any) -> None:
+    *parents, leaf = path.split(".")
+    for key in parents:
+        target = target.setdefault(key, {})
+    target[leaf] = value
+
+
+def _lookup(obj: Any, path: str) -> Any:
+    for key in path.split("."):
+        if not isinstance(obj, dict) or key not in obj:
+            return None
+        obj = obj[key]
+    return obj
+
+
+def project(obj: Any, fields: Sequence[str]) -> Any:
+    """Return a copy of a decoded object containing only `fields`.
+
+    Paths that are missing from `obj` are omitted. Non-object values are
+    returned unchanged.
+    """
+    if not isinstance(obj, dict):
+        return obj
+    result: Dict[str, Any] = {}
+    for path in fields:
+        value = obj
+        for key in path.split("."):
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            _assign(result, path, value)
+    return result
+
+
+def iter_projected(stream: IO[bytes], fields: Sequence[str], many: bool = True) -> Iterator[Dict[str, Any]]:
+    """Incrementally parse a JSON body and yield projected objects.
+
+    Args:
+        stream: File-like object producing the raw JSON bytes.
+        fields: Dotted field paths to keep.
+        many: Whether the body is an array of objects (yield one projection
+            per element) or a single object (yield one projection).
+
+    Raises:
+        RuntimeError: If `ijson` is not installed.
+        ValueError: If the body is not valid JSON.
+    """
+    if ijson is None:
+        raise RuntimeError("Streaming projection requires the optional 'ijson' package")
+
+    base = "item" if many else ""
+    offset = len(base) + 1 if base else 0
+    wanted = set(fields)
+    result: Optional[Dict[str, Any]] = None
+    builder = None
+    builder_path = ""
+    depth = 0
+    try:
+        for prefix, event, value in ijson.parse(stream, use_float=True):
+            if builder is not None:
+                builder.event(event, value)
+                if event in ("start_map", "start_array"):
+                    depth += 1
+                elif event in ("end_map", "end_array"):
+                    depth -= 1
+                    if depth == 0:
+                        _assign(result, builder_path, builder.value)
+                        builder = None
+                continue
+
+            if prefix == base:
+                if event == "start_map":
+                    result = {}
+                elif event == "end_map" and result is not None:
+                    yield result
+                    result = None
+                continue
+
+            if result is None or event == "map_key":
+                continue
+            path = prefix[offset:]
+            if path not in wanted:
+                continue
+            if event in ("start_map", "start_array"):
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+                builder_path = path
+                depth = 1
+            else:
+                _assign(result, path, value)
+    except ijson.JSONError as e:
+        raise ValueError("Invalid JSON in streamed response") from e
+
+
+class Record:
+    """Base class for the flat `__slots__` records built by `record_type`."""
+
+    __slots__ = ()
+    _fields: Mapping[str, str] = {}
+
+    def __init__(self, **values: Any) -> None:
+        for attr in self.__slots__:
+            setattr(self, attr, values.get(attr))
+
+    @classmethod
+    def from_dict(cls, obj: Dict[str, Any]) -> "Record":
+        """Build a record from a (full or projected) response object."""
+        return cls(**{attr: _lookup(obj, path) for attr, path in cls._fields.items()})
+
+    def _asdict(self) -> Dict[str, Any]:
+        return {attr: getattr(self, attr) for attr in self.__slots__}
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._asdict() == other._asdict()
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{attr}={value!r}" for attr, value in self._asdict().items())
+        return f"{type(self).__name__}({values})"
+
+
+def record_type(name: str, fields: Sequence[str], types: Optional[Mapping[str, type]] = None) -> Type[Record]:
+    """Create a `__slots__` record class for a projection.
+
+    Each dotted path becomes one attribute with dots replaced by underscores,
+    e.g. `commit.author.date` -> `commit_author_date`.
+
+    Args:
+        name: Class name of the record type.
+        fields: Dotted field paths, in attribute order.
+        types: Optional mapping of field path to type, used for the class
+            annotations.
+
+    Returns:
+        A `Record` subclass; pass it as `record=` to the client methods.
+    """
+    types = types or {}
+    attrs = {path.replace(".", "_"): path for path in fields}
+    namespace = {
+        "__slots__": tuple(attrs),
+        "_fields": attrs,
+        "__annotations__": {attr: types.get(path, Any) for attr, path in attrs.items()},
+    }
+    return type(name, (Record,), namespace)
+
+
+def decode_response(
+    response: Any,
+    fields: Optional[Sequence[str]],
+    record: Optional[Type[Record]],
+    many: bool,
+    streamed: bool = False,
+) -> Any:
+    """Decode a response body, applying an optional projection and record type.
+
+    Bodies of error responses (status >= 400) are returned whole. If the
+    response was requested with `stream=True` (`streamed`) and `ijson` is
+    available, the projection is applied while parsing `response.raw`;
+    otherwise after `response.json()`.
+    """
+    if record is not None and fields is None:
+        fields = list(record._fields.values())
+    if fields is None or getattr(response, "status_code", 200) >= 400:
+        return response.json()
+
+    if streamed and ijson is not None:
+        raw = response.raw
+        if hasattr(raw, "decode_content"):
+            raw.decode_content = True
+        try:
+            items = iter_projected(raw, fields, many=many)
+            data: Any = list(items) if many else next(items, {})
+        finally:
+            response.close()
+    else:
+        data = response.json()
+        data = [project(item, fields) for item in data] if many and isinstance(data, list) else project(data, fields)
+
+    if record is None:
+        return data
+    if many and isinstance(data, list):
+        return [record.from_dict(item) for item in data]
+    return record.from_dict(data) if isinstance(data, dict) else data
+
+
+def streaming_available() -> bool:
+    """Return whether incremental projection (`ijson`) is available."""
+    return ijson is not None
+
@@ -174,3 +174,140 @@ def test_get_repositories_non_list_json_raises_value_error(monkeypatch, client):
 
     with pytest.raises(ValueError):
         client.get_repositories()
+
+
+def _graphql_repo(name_with_owner, commits=(), cursor=None):
+    """Build a GraphQL `Repository` node with a page of commit history."""
+    owner, name = name_with_owner.split("/")
+    return {
+        "id": f"R_{name}",
+        "databaseId": 42,
+        "name": name,
+        "nameWithOwner": name_with_owner,
+        "owner": {"login": owner},
+        "stargazerCount": 7,
+        "defaultBranchRef": {
+            "name": "main",
+            "target": {
+                "history": {
+                    "pageInfo": {"hasNextPage": cursor is not None, "endCursor": cursor},
+                    "nodes": [
+                        {
+                            "oid": sha,
+                            "message": f"commit {sha}",
+                            "additions": 3,
+                            "deletions": 1,
+                            "author": {"name": "Octo", "email": "o@example.com", "date": "2024-01-01T00:00:00Z", "user": {"login": "octocat"}},
+                            "committer": None,
+                            "parents": {"nodes": [{"oid": "parent"}]},
+                        }
+                        for sha in commits
+                    ],
+                }
+            },
+        },
+    }
+
+
+def test_get_repository_summaries_batches_repositories_in_one_query(monkeypatch, client):
+    """Several repositories should be fetched with a single aliased GraphQL query."""
+    calls = []
+
+    def fake_post(url, json=None, headers=None, **kwargs):
+        calls.append((url, json, headers))
+        return DummyResponse({"data": {"r0": _graphql_repo("owner/a", ["a1"]), "r1": _graphql_repo("owner/b", ["b1", "b2"])}})
+
+    monkeypatch.setattr(requests, "post", fake_post)
+
+    summaries = client.get_repository_summaries(["owner/a", "owner/b"], max_commits=5)
+    assert len(calls) == 1
+    url, body, headers = calls[0]
+    assert url == "https://api.github.com/graphql"
+    assert headers["Authorization"] == "token test-token"
+    assert body["variables"]["owner1"] == "owner" and body["variables"]["name1"] == "b"
+    assert summaries["owner/a"]["repository"]["full_name"] == "owner/a"
+    assert summaries["owner/a"]["repository"]["stargazers_count"] == 7
+    assert summaries["owner/a"]["repository"]["default_branch"] == "main"
+    commit = summaries["owner/b"]["commits"][1]
+    assert commit["sha"] == "b2"
+    assert commit["commit"]["author"]["date"] == "2024-01-01T00:00:00Z"
+    assert commit["author"] == {"login": "octocat"}
+    assert commit["parents"] == [{"sha": "parent"}]
+    assert commit["stats"] == {"additions": 3, "deletions": 1, "total": 4}
+
+
+def test_get_repository_summary_follows_history_cursor(monkeypatch, client):
+    """History beyond the first page should be fetched with cursor pagination."""
+    pages = [
+        {"data": {"r0": _graphql_repo("owner/repo", ["c1", "c2"], cursor="CUR")}},
+        {"data": {"r0": _graphql_repo("owner/repo", ["c3", "c4"], cursor="CUR2")}},
+    ]
+    afters = []
+
+    def fake_post(url, json=None, **kwargs):
+        afters.append(json["variables"].get("after0"))
+        return DummyResponse(pages.pop(0))
+
+    monkeypatch.setattr(requests, "post", fake_post)
+
+    summary = client.get_repository_summary("owner/repo", max_commits=3)
+    assert [c["sha"] for c in summary["commits"]] == ["c1", "c2", "c3"]
+    assert afters == [None, "CUR"]
+
+
+def test_graphql_errors_raise_runtime_error(monkeypatch, client):
+    """GraphQL error payloads should surface as `RuntimeError`."""
+
+    def fake_post(*args, **kwargs):
+        return DummyResponse({"data": None, "errors": [{"message": "Bad credentials"}]})
+
+    monkeypatch.setattr(requests, "post", fake_post)
+
+    with pytest.raises(RuntimeError, match="Bad credentials"):
+        client.graphql("query { viewer { login } }")
+
+
+@pytest.mark.parametrize(
+    "base_url, graphql_url",
+    [
+        ("https://api.github.com", "https://api.github.com/graphql"),
+        ("https://ghe.example.com/api/v3", "https://ghe.example.com/api/graphql"),
+        ("https://ghe.example.com/api/v3/", "https://ghe.example.com/api/graphql"),
+        ("http://127.0.0.1:8080", "http://127.0.0.1:8080/graphql"),
+    ],
+)
+def test_graphql_posts_to_the_endpoint_derived_from_base_url(monkeypatch, base_url, graphql_url):
+    """GitHub Enterprise serves GraphQL at /api/graphql, not under the REST root."""
+    urls = []
+
+    def fake_post(url, **kwargs):
+        urls.append(url)
+        return DummyResponse({"data": {"viewer": {"login": "octocat"}}})
+
+    monkeypatch.setattr(requests, "post", fake_post)
+
+    GitHubAPIClient(token="test-token", base_url=base_url).graphql("query { viewer { login } }")
+
+    assert urls == [graphql_url]
+
+
+def test_graphql_url_can_be_given_explicitly(monkeypatch):
+    """An explicit `graphql_url` overrides the derived one."""
+    urls = []
+
+    def fake_post(url, **kwargs):
+        urls.append(url)
+        return DummyResponse({"data": {}})
+
+    monkeypatch.setattr(requests, "post", fake_post)
+    client = GitHubAPIClient(token="test-token", base_url="https://proxy.example.com/rest", graphql_url="https://proxy.example.com/gql")
+
+    client.graphql("query { viewer { login } }")
+
+    assert urls == ["https://proxy.example.com/gql"]
+
+
+def test_get_repository_summaries_rejects_malformed_names(client):
+    """Repository names must be of the form `owner/repo`."""
+    with pytest.raises(ValueError):
+        client.get_repository_summaries(["not-a-repo"])
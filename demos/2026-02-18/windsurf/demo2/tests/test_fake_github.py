@@ -0,0 +1,70 @@
+"""Tests running `GitHubAPIClient` against the local `demo2.fake_github` server."""
+
+import pytest
+import requests
+
+from demo2.api_client import GitHubAPIClient
+from demo2.benchmark import run_benchmark
+from demo2.fake_github import FakeGitHub
+from demo2.mirror import CommitMirror
+
+
+@pytest.fixture
+def server():
+    """Start a small synthetic fake GitHub server for one test."""
+    with FakeGitHub.synthetic(repos=2, commits_per_repo=5, files_per_commit=1, rate_limit=100) as s:
+        yield s
+
+
+@pytest.fixture
+def client(server):
+    """Return a client pointed at the fake server."""
+    return GitHubAPIClient(token="test-token", base_url=server.url, session=requests.Session())
+
+
+def test_commit_pagination_and_link_header(server, client):
+    """Commit lists should be paginated with a `Link` header like GitHub's."""
+    response = requests.get(f"{server.url}/repos/octo/repo0/commits?per_page=2", headers={"Authorization": "token x"})
+    assert len(response.json()) == 2
+    assert 'rel="next"' in response.headers["Link"]
+    assert "files" not in response.json()[0]
+
+    last_page = client.get_commits("octo/repo0", per_page=2, page=3)
+    assert len(last_page) == 1
+    assert client.get_commit("octo/repo0", last_page[0]["sha"])["files"]
+
+
+def test_etag_revalidation_returns_not_modified(server):
+    """A matching `If-None-Match` should get a 304 that does not use rate limit."""
+    url = f"{server.url}/repos/octo/repo1"
+    first = requests.get(url, headers={"Authorization": "token x"})
+    second = requests.get(url, headers={"Authorization": "token x", "If-None-Match": first.headers["ETag"]})
+
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert first.headers["X-RateLimit-Remaining"] == second.headers["X-RateLimit-Remaining"] == "99"
+    assert server.not_modified == 1
+
+
+def test_rate_limit_exhaustion_returns_403():
+    """Requests beyond the budget should be rejected."""
+    with FakeGitHub.synthetic(repos=1, commits_per_repo=1, rate_limit=1) as server:
+        client = GitHubAPIClient(token="test-token", base_url=server.url)
+        assert client.get_user()["login"] == "octo"
+        assert client.get_user() == {"message": "API rate limit exceeded"}
+
+
+def test_mirror_resync_against_fake_server(server, client):
+    """An up-to-date mirror should re-sync with a single request per repository."""
+    with CommitMirror(client, path=":memory:") as mirror:
+        assert mirror.sync("octo/repo0") == 5
+        server.reset_counters()
+        assert mirror.sync("octo/repo0") == 0
+        assert server.requests_served == 1
+
+
+def test_run_benchmark_reports_each_mode(server):
+    """The benchmark should issue the same crawl in every client mode."""
+    results = run_benchmark(server, ["baseline", "concurrent"], details=2, workers=2)
+    assert results["baseline"]["requests"] == results["concurrent"]["requests"] == 2 * (1 + 1 + 2)
+    assert results["concurrent"]["requests_per_second"] > 0
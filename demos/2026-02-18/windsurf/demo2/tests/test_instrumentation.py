@@ -0,0 +1,93 @@
+"""Unit tests for `demo2.instrumentation` and the client's request hooks.
+
+All tests mock `requests.get` to avoid real HTTP requests.
+"""
+
+import pytest
+import requests
+
+from demo2.api_client import GitHubAPIClient
+from demo2.instrumentation import MetricsCollector, RequestEvent, RequestHook
+from demo2.tests.test_api_client import DummyResponse
+
+
+class HeaderResponse(DummyResponse):
+    """`DummyResponse` with headers and a body, as read by the hooks."""
+
+    def __init__(self, json_data, *, headers=None, content=b"{}", **kwargs):
+        super().__init__(json_data, **kwargs)
+        self.headers = headers or {}
+        self.content = content
+
+
+class RecordingHook(RequestHook):
+    """Hook that keeps every event it receives."""
+
+    def __init__(self):
+        self.events = []
+
+    def on_request(self, event):
+        self.events.append(event)
+
+
+def test_hooks_receive_endpoint_status_bytes_and_rate_limit(monkeypatch):
+    """Each call should produce one event describing the response."""
+    hook = RecordingHook()
+    client = GitHubAPIClient(token="test-token", hooks=[hook])
+    response = HeaderResponse({"sha": "abc"}, headers={"X-RateLimit-Remaining": "4999"}, content=b'{"sha": "abc"}')
+    monkeypatch.setattr(requests, "get", lambda *args, **kwargs: response)
+
+    client.get_commit("owner/repo", "abc")
+    (event,) = hook.events
+    assert event.method == "GET"
+    assert event.endpoint == "/repos/{repo}/commits/{sha}"
+    assert event.url == "https://api.github.com/repos/owner/repo/commits/abc"
+    assert event.status_code == 200
+    assert event.bytes_received == 14
+    assert event.rate_limit_remaining == 4999
+    assert event.elapsed >= 0
+
+
+def test_failed_requests_are_reported_before_raising(monkeypatch):
+    """Transport errors should still reach the hooks."""
+    hook = RecordingHook()
+    client = GitHubAPIClient(token="test-token", hooks=[hook])
+
+    def fake_get(*args, **kwargs):
+        raise requests.Timeout("boom")
+
+    monkeypatch.setattr(requests, "get", fake_get)
+
+    with pytest.raises(TimeoutError):
+        client.get_repositories()
+    assert hook.events[0].error == "Timeout"
+    assert hook.events[0].status_code is None
+
+
+def test_metrics_collector_summarises_per_endpoint():
+    """The collector should aggregate counts, errors, cache hits and latency."""
+    collector = MetricsCollector(buckets=(0.1, 1.0))
+    for elapsed, status in [(0.05, 200), (0.5, 200), (2.0, 500), (0.01, 304)]:
+        collector.on_request(RequestEvent("GET", "/repos/{repo}", "u", 0.0, elapsed, status_code=status, bytes_received=10, rate_limit_remaining=10, from_cache=status == 304))
+
+    summary = collector.summary()
+    stats = summary["endpoints"]["GET /repos/{repo}"]
+    assert summary["calls"] == 4
+    assert summary["rate_limit_remaining"] == 10
+    assert stats["errors"] == 1
+    assert stats["cache_hits"] == 1
+    assert stats["statuses"] == {200: 2, 500: 1, 304: 1}
+    assert stats["histogram"]["counts"] == [2, 1, 1]
+    assert stats["p50"] == 0.1
+    assert stats["max"] == 2.0
+    assert "GET /repos/{repo}" in collector.report()
+
+
+def test_hook_without_on_request_cannot_be_created():
+    """Subclasses must implement `on_request`."""
+
+    class IncompleteHook(RequestHook):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteHook()
@@ -0,0 +1,71 @@
+"""Unit tests for `demo2.mirror`.
+
+All tests mock `requests.get` to avoid real HTTP requests.
+"""
+
+import pytest
+import requests
+
+from demo2.api_client import GitHubAPIClient
+from demo2.mirror import CommitMirror
+from demo2.tests.test_api_client import DummyResponse
+
+
+def _commit(sha, date):
+    return {"sha": sha, "commit": {"committer": {"date": date}, "message": sha}}
+
+
+@pytest.fixture
+def mirror():
+    """Return an in-memory `CommitMirror` with a small page size."""
+    with CommitMirror(GitHubAPIClient(token="test-token"), path=":memory:", per_page=2) as m:
+        yield m
+
+
+def test_first_sync_pages_through_full_history(monkeypatch, mirror):
+    """The first sync should fetch every page without `since`."""
+    history = [_commit("c3", "2024-01-03T00:00:00Z"), _commit("c2", "2024-01-02T00:00:00Z"), _commit("c1", "2024-01-01T00:00:00Z")]
+    calls = []
+
+    def fake_get(url, headers=None, params=None, **kwargs):
+        calls.append(params)
+        start = (params["page"] - 1) * params["per_page"]
+        return DummyResponse(history[start:start + params["per_page"]])
+
+    monkeypatch.setattr(requests, "get", fake_get)
+
+    assert mirror.sync("owner/repo") == 3
+    assert [c.get("since") for c in calls] == [None, None]
+    assert mirror.high_water_mark("owner/repo")["sha"] == "c3"
+    assert [c["sha"] for c in mirror.get_commits("owner/repo")] == ["c3", "c2", "c1"]
+
+
+def test_incremental_sync_only_fetches_newer_commits(monkeypatch, mirror):
+    """Later syncs should pass the high-water mark as `since`."""
+    responses = [
+        [_commit("c1", "2024-01-01T00:00:00Z")],
+        [_commit("c2", "2024-01-02T00:00:00Z"), _commit("c1", "2024-01-01T00:00:00Z")],
+        [],
+    ]
+    calls = []
+
+    def fake_get(url, headers=None, params=None, **kwargs):
+        calls.append(params)
+        return DummyResponse(responses.pop(0))
+
+    monkeypatch.setattr(requests, "get", fake_get)
+
+    assert mirror.sync("owner/repo") == 1
+    assert mirror.sync("owner/repo") == 1
+    assert calls[1]["since"] == "2024-01-01T00:00:00Z"
+    assert mirror.high_water_mark("owner/repo")["date"] == "2024-01-02T00:00:00Z"
+    assert [c["sha"] for c in mirror.get_commits("owner/repo", since="2024-01-02T00:00:00Z")] == ["c2"]
+
+
+def test_sync_rejects_non_list_response(monkeypatch, mirror):
+    """An error object from GitHub should raise and leave no high-water mark."""
+    monkeypatch.setattr(requests, "get", lambda *args, **kwargs: DummyResponse({"message": "Not Found"}))
+
+    with pytest.raises(ValueError):
+        mirror.sync("owner/missing")
+    assert mirror.high_water_mark("owner/missing") is None
@@ -0,0 +1,108 @@
+"""Unit tests for `demo2.projection` and the client's `fields`/`record` options.
+
+All tests mock `requests.get` to avoid real HTTP requests.
+"""
+
+import io
+import json
+
+import pytest
+import requests
+
+from demo2 import projection
+from demo2.api_client import GitHubAPIClient
+from demo2.projection import iter_projected, project, record_type
+from demo2.tests.test_api_client import DummyResponse
+
+COMMITS = [
+    {
+        "sha": "abc",
+        "commit": {"author": {"name": "Octo", "date": "2024-01-01T00:00:00Z"}, "message": "first"},
+        "author": {"login": "octocat", "id": 1},
+        "files": [{"filename": "a.py", "patch": "@@ big diff @@"}],
+        "stats": {"additions": 1, "deletions": 0, "total": 1},
+    },
+    {"sha": "def", "commit": {"author": {"name": "Cat", "date": "2024-01-02T00:00:00Z"}}},
+]
+
+
+class StreamingResponse:
+    """Stand-in for a `requests.Response` fetched with `stream=True`."""
+
+    def __init__(self, json_data, status_code=200):
+        self.raw = io.BytesIO(json.dumps(json_data).encode())
+        self.status_code = status_code
+        self.closed = False
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def client():
+    """Return a `GitHubAPIClient` configured with a deterministic test token."""
+    return GitHubAPIClient(token="test-token")
+
+
+def test_project_keeps_only_requested_paths():
+    """`project` should keep nested paths and whole sub-objects."""
+    assert project(COMMITS[0], ["sha", "commit.author.date", "stats", "missing.path"]) == {
+        "sha": "abc",
+        "commit": {"author": {"date": "2024-01-01T00:00:00Z"}},
+        "stats": {"additions": 1, "deletions": 0, "total": 1},
+    }
+
+
+def test_iter_projected_matches_project():
+    """Streaming projection should produce the same objects as `project`."""
+    pytest.importorskip("ijson")
+    fields = ["sha", "commit.author.date", "files"]
+    streamed = list(iter_projected(io.BytesIO(json.dumps(COMMITS).encode()), fields))
+    assert streamed == [project(commit, fields) for commit in COMMITS]
+
+
+def test_get_commits_streams_projection_into_records(monkeypatch, client):
+    """`get_commits` should request a streamed body and return slot records."""
+    pytest.importorskip("ijson")
+    captured = {}
+    response = StreamingResponse(COMMITS)
+
+    def fake_get(url, headers=None, **kwargs):
+        captured.update(kwargs)
+        return response
+
+    monkeypatch.setattr(requests, "get", fake_get)
+
+    Commit = record_type("Commit", ["sha", "commit.author.date"])
+    commits = client.get_commits("owner/repo", record=Commit)
+    assert captured["stream"] is True
+    assert response.closed
+    assert commits == [Commit(sha="abc", commit_author_date="2024-01-01T00:00:00Z"), Commit(sha="def", commit_author_date="2024-01-02T00:00:00Z")]
+    assert not hasattr(commits[0], "__dict__")
+
+
+def test_get_commit_projects_after_decode_without_ijson(monkeypatch, client):
+    """Without `ijson`, the projection should be applied to the decoded body."""
+    monkeypatch.setattr(projection, "ijson", None)
+    captured = {}
+
+    def fake_get(url, headers=None, **kwargs):
+        captured.update(kwargs)
+        return DummyResponse(COMMITS[0])
+
+    monkeypatch.setattr(requests, "get", fake_get)
+
+    data = client.get_commit("owner/repo", "abc", fields=["sha", "stats.total"])
+    assert "stream" not in captured
+    assert data == {"sha": "abc", "stats": {"total": 1}}
+
+
+def test_error_bodies_are_not_projected(monkeypatch, client):
+    """Error responses should be returned whole so their message is kept."""
+    pytest.importorskip("ijson")
+    monkeypatch.setattr(requests, "get", lambda *args, **kwargs: DummyResponse({"message": "Not Found"}, status_code=404))
+
+    assert client.get_repository("owner/missing", fields=["full_name"]) == {"message": "Not Found"}